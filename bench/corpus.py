@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# Gerador de corpus sintético e reproduzível para os benchmarks do scanner:
+#   python -m bench.corpus /tmp/foxter-corpus --files 20000 --size-median 16384 --fanout 8 --hash-hits 20
+# Layout: DIR/tree (o que é escaneado), DIR/signatures.fsig (assinaturas dos acertos plantados),
+# DIR/manifest.json (parâmetros, totais e acertos esperados). Mesmos parâmetros e semente, mesmo corpus.
+import os
+import sys
+import json
+import math
+import random
+import shutil
+import hashlib
+import logging
+import argparse
+from infra.signature_db import build_image
+
+MANIFEST = "manifest.json"
+SIGNATURES = "signatures.fsig"
+TREE = "tree"
+CONTENT_HIT = b"trojan"  # Está em infra.signature_db.MALICIOUS_SIGNATURES
+WRITE_SIZE = 1024 * 1024
+
+DEFAULTS = {
+    "files": 10000,
+    "size_median": 16 * 1024,  # Tamanhos log-normais: mediana e dispersão (sigma 0 = todos iguais)
+    "size_sigma": 1.5,
+    "size_max": 64 * 1024 * 1024,
+    "files_per_dir": 64,
+    "fanout": 8,  # Subdiretórios por diretório
+    "hardlinks": 0.0,  # Fração dos arquivos que são hard links para outros do corpus
+    "text_ratio": 0.3,  # Fração com conteúdo textual (comprime e passa pelo sniff como texto)
+    "hash_hits": 10,  # Arquivos cujo SHA-256 vai para signatures.fsig
+    "content_hits": 10,  # Arquivos com um padrão de conteúdo (CONTENT_HIT)
+    "seed": 1,
+}
+
+_WORDS = (b"lorem", b"ipsum", b"dolor", b"sit", b"amet", b"config", b"value", b"data", b"foxter", b"\n")
+
+
+def _sizes(rng, params):
+    median, sigma = params["size_median"], params["size_sigma"]
+    for _ in range(params["files"]):
+        size = median if sigma <= 0 else int(rng.lognormvariate(math.log(max(median, 1)), sigma))
+        yield min(size, params["size_max"])
+
+
+def _directories(params):
+    # Árvore em largura com até `fanout` filhos por diretório, o suficiente para files_per_dir cada
+    count = max(1, math.ceil(params["files"] / max(params["files_per_dir"], 1)))
+    dirs = [""]
+    i = 0
+    while len(dirs) < count:
+        parent = dirs[i]
+        for j in range(params["fanout"]):
+            if len(dirs) >= count:
+                break
+            dirs.append(os.path.join(parent, f"d{j:03d}"))
+        i += 1
+    return dirs
+
+
+def _content(rng, size, text):
+    if not text:
+        return rng.randbytes(size)
+    out = bytearray()
+    while len(out) < size:
+        out += b" ".join(rng.choices(_WORDS, k=256))
+    return bytes(out[:size])
+
+
+def _write(path, rng, size, text, plant=None):
+    # plant: bytes colocados no meio do primeiro bloco (size >= len(plant))
+    digest = hashlib.sha256()
+    with open(path, "wb") as f:
+        offset = 0
+        while offset < size:
+            chunk = _content(rng, min(WRITE_SIZE, size - offset), text)
+            if plant and offset == 0:
+                cut = min(len(chunk) // 2, len(chunk) - len(plant))
+                chunk = chunk[:cut] + plant + chunk[cut + len(plant):]
+            f.write(chunk)
+            digest.update(chunk)
+            offset += len(chunk)
+    return digest.hexdigest()
+
+
+def generate(directory, **params):
+    params = dict(DEFAULTS, **params)
+    rng = random.Random(params["seed"])
+    tree = os.path.join(directory, TREE)
+    if os.path.exists(tree):
+        shutil.rmtree(tree)
+    dirs = _directories(params)
+    for d in dirs:
+        os.makedirs(os.path.join(tree, d), exist_ok=True)
+    files = params["files"]
+    links = int(files * params["hardlinks"])
+    # Índices dos arquivos especiais, sorteados entre os que não são links
+    regular = list(range(files - links))
+    rng.shuffle(regular)
+    hash_hits = set(regular[:params["hash_hits"]])
+    content_hits = set(regular[params["hash_hits"]:params["hash_hits"] + params["content_hits"]])
+    signatures = []
+    written = []
+    planted = set()
+    total_bytes = 0
+    expected = len(hash_hits) + len(content_hits)
+    for i, size in enumerate(_sizes(rng, params)):
+        directory_path = os.path.join(tree, dirs[i % len(dirs)])
+        if i >= files - links and written:
+            target = rng.choice(written)
+            os.link(target, os.path.join(directory_path, f"f{i:07d}.lnk"))
+            expected += target in planted  # O link também é detectado
+            continue
+        text = rng.random() < params["text_ratio"]
+        path = os.path.join(directory_path, f"f{i:07d}.{'txt' if text else 'bin'}")
+        if i in hash_hits or i in content_hits:
+            size = max(size, 64)  # Um acerto vazio marcaria todos os arquivos vazios
+        digest = _write(path, rng, size, text, CONTENT_HIT if i in content_hits else None)
+        if i in hash_hits:
+            signatures.append(digest)
+        if i in hash_hits or i in content_hits:
+            planted.add(path)
+        written.append(path)
+        total_bytes += os.path.getsize(path)
+    with open(os.path.join(directory, SIGNATURES), "wb") as f:
+        f.write(build_image(signatures))
+    manifest = {
+        "params": params,
+        "files": files,
+        "unique_files": files - links,
+        "directories": len(dirs),
+        "bytes": total_bytes,
+        "expected_suspicious": expected,
+    }
+    with open(os.path.join(directory, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def load_manifest(directory):
+    try:
+        with open(os.path.join(directory, MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def ensure(directory, **params):
+    # Reaproveita o corpus existente se os parâmetros forem os mesmos
+    params = dict(DEFAULTS, **params)
+    manifest = load_manifest(directory)
+    if manifest is not None and manifest["params"] == params and os.path.isdir(os.path.join(directory, TREE)):
+        return manifest
+    logging.info(f"Gerando corpus em {directory}: {params['files']} arquivos")
+    os.makedirs(directory, exist_ok=True)
+    return generate(directory, **params)
+
+
+def add_corpus_options(parser):
+    parser.add_argument("--files", type=int, default=DEFAULTS["files"])
+    parser.add_argument("--size-median", type=int, default=DEFAULTS["size_median"], metavar="BYTES")
+    parser.add_argument("--size-sigma", type=float, default=DEFAULTS["size_sigma"],
+                        help="Dispersão log-normal dos tamanhos (0: todos com a mediana)")
+    parser.add_argument("--size-max", type=int, default=DEFAULTS["size_max"], metavar="BYTES")
+    parser.add_argument("--files-per-dir", type=int, default=DEFAULTS["files_per_dir"])
+    parser.add_argument("--fanout", type=int, default=DEFAULTS["fanout"], help="Subdiretórios por diretório")
+    parser.add_argument("--hardlinks", type=float, default=DEFAULTS["hardlinks"], metavar="FRAÇÃO")
+    parser.add_argument("--text-ratio", type=float, default=DEFAULTS["text_ratio"], metavar="FRAÇÃO")
+    parser.add_argument("--hash-hits", type=int, default=DEFAULTS["hash_hits"])
+    parser.add_argument("--content-hits", type=int, default=DEFAULTS["content_hits"])
+    parser.add_argument("--seed", type=int, default=DEFAULTS["seed"])
+
+
+def corpus_params(args):
+    return {key: getattr(args, key) for key in DEFAULTS}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="bench.corpus", description="Gera um corpus sintético para benchmarks")
+    parser.add_argument("directory")
+    parser.add_argument("--force", action="store_true", help="Regera mesmo com os mesmos parâmetros")
+    add_corpus_options(parser)
+    args = parser.parse_args(argv)
+    logging.basicConfig(stream=sys.stderr, level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    if args.force:
+        os.makedirs(args.directory, exist_ok=True)
+        manifest = generate(args.directory, **corpus_params(args))
+    else:
+        manifest = ensure(args.directory, **corpus_params(args))
+    json.dump(manifest, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# Vazão dos padrões de conteúdo (PatternMatcher) em função da quantidade de padrões:
+#   python -m bench.match_bench --patterns 3 --patterns 3000 -o match.json
+# Backends: "numpy" (filtro vetorizado de prefixos) e "re" (alternância compilada, o caminho sem NumPy).
+# Os dados são alimentados em chunks de CHUNK_SIZE, como no hash_file. Código 1 se a vazão com mais padrões
+# cair mais que --max-slowdown em relação à com menos padrões (só o backend numpy é comparado)
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import platform
+from core import pattern_matcher
+from core.scanner import CHUNK_SIZE
+from infra.signature_db import MALICIOUS_SIGNATURES
+
+BACKENDS = ("numpy", "re")
+DEFAULT_PATTERNS = (3, 3000)
+DEFAULT_MAX_SLOWDOWN = 30.0  # %
+ALPHABET = b"abcdefghijklmnopqrstuvwxyz      \n0123456789.,;:-_/"
+
+
+def make_patterns(count, rnd):
+    patterns = list(MALICIOUS_SIGNATURES[:count])
+    while len(patterns) < count:
+        patterns.append(bytes(rnd.choice(ALPHABET) for _ in range(rnd.randint(6, 24))))
+    return patterns
+
+
+def make_data(size, patterns, rnd):
+    # Texto pseudoaleatório com alguns padrões plantados (o pior caso para o matcher antigo era texto, não binário)
+    data = bytearray(rnd.choice(ALPHABET) for _ in range(min(size, 1 << 16))) * (size // (1 << 16) + 1)
+    del data[size:]
+    for _ in range(16):
+        p = rnd.choice(patterns)
+        p = p.encode("utf-8") if isinstance(p, str) else p
+        at = rnd.randrange(0, size - len(p))
+        data[at:at + len(p)] = p
+    return bytes(data)
+
+
+def measure(backend, patterns, data, repeat):
+    numpy = pattern_matcher.np
+    if backend == "re":
+        pattern_matcher.np = None
+    try:
+        build = time.perf_counter()
+        matcher = pattern_matcher.PatternMatcher(patterns)
+        build = time.perf_counter() - build
+    finally:
+        pattern_matcher.np = numpy
+    view = memoryview(data)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        stream = matcher.stream(first_only=False)
+        for i in range(0, len(data), CHUNK_SIZE):
+            stream.update(view[i:i + CHUNK_SIZE])
+        times.append(time.perf_counter() - start)
+    best = min(times)
+    return {"backend": backend, "patterns": len(matcher), "build_s": build, "matches": len(stream.matches),
+            "mb_per_sec": len(data) / best / 1e6}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="bench.match_bench", description="Vazão dos padrões de conteúdo")
+    parser.add_argument("--patterns", type=int, action="append", metavar="N", help="Repetível (padrão: 3 e 3000)")
+    parser.add_argument("--backend", action="append", choices=BACKENDS, help="Repetível (padrão: todos)")
+    parser.add_argument("--size", type=int, default=16, metavar="MB", help="Dados por medição")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--max-slowdown", type=float, default=DEFAULT_MAX_SLOWDOWN, metavar="PCT")
+    parser.add_argument("-o", "--output", metavar="PATH", help="Resultado em JSON (padrão: stdout)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(stream=sys.stderr, level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    counts = sorted(args.patterns or DEFAULT_PATTERNS)
+    backends = args.backend or [b for b in BACKENDS if b != "numpy" or pattern_matcher.np is not None]
+    if "numpy" in backends and pattern_matcher.np is None:
+        logging.error("NumPy não está instalado: use --backend re")
+        return 2
+    rnd = random.Random(args.seed)
+    pattern_sets = {count: make_patterns(count, rnd) for count in counts}
+    data = make_data(args.size * 1000 * 1000, pattern_sets[counts[-1]], rnd)
+    results = []
+    for backend in backends:
+        for count in counts:
+            results.append(measure(backend, pattern_sets[count], data, args.repeat))
+            r = results[-1]
+            logging.info(f"{backend}: {r['patterns']} padrões, {r['mb_per_sec']:.1f} MB/s "
+                         f"(autômato em {r['build_s']:.2f} s)")
+    status = 0
+    flat = [r["mb_per_sec"] for r in results if r["backend"] == "numpy"]
+    if len(flat) > 1:
+        slowdown = (1 - flat[-1] / flat[0]) * 100
+        logging.info(f"numpy: {counts[0]} -> {counts[-1]} padrões, queda de {slowdown:.1f}%")
+        if slowdown > args.max_slowdown:
+            logging.error(f"Queda acima de {args.max_slowdown:.0f}%")
+            status = 1
+    report = {"meta": {"python": platform.python_version(), "platform": platform.platform(),
+                       "numpy": pattern_matcher.np.__version__ if pattern_matcher.np is not None else None,
+                       "size_mb": args.size, "chunk_size": CHUNK_SIZE, "seed": args.seed},
+              "results": results}
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        sys.stdout.write(text + "\n")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
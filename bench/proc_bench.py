@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# Custo por tick da amostragem de processos (ProcessAnalyzer):
+#   python -m bench.proc_bench --spawn 2000 --ticks 20 -o proc.json
+# Cenários: "iter" (psutil.process_iter com os campos, como o analisador fazia a cada tick),
+# "psutil" (ProcessTable + PsutilSampler) e "procfs" (ProcessTable + ProcFsSampler, só Linux).
+# --spawn cria processos ociosos para simular um host com milhares de processos.
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import statistics
+import subprocess
+import psutil
+from core.process_table import ProcessTable, ProcFsSampler, PsutilSampler
+
+SCENARIOS = ("iter", "psutil", "procfs")
+ITER_FIELDS = ['pid', 'name', 'username', 'cpu_percent', 'memory_percent']
+
+
+def tick_iter():
+    # Tabela reconstruída a cada tick (o comportamento anterior)
+    return sum(1 for _ in psutil.process_iter(ITER_FIELDS))
+
+
+def make_tick(scenario):
+    if scenario == "iter":
+        return tick_iter
+    table = ProcessTable()
+    sampler = ProcFsSampler() if scenario == "procfs" else PsutilSampler()
+    return lambda: (table.refresh(sampler), len(table))[1]
+
+
+def measure(scenario, ticks, interval):
+    tick = make_tick(scenario)
+    tick()  # Primeira passada: preenche a tabela (custo de partida, medido à parte)
+    cpu, wall = [], []
+    processes = 0
+    for _ in range(ticks):
+        time.sleep(interval)
+        c, w = time.process_time(), time.perf_counter()
+        processes = tick()
+        cpu.append(time.process_time() - c)
+        wall.append(time.perf_counter() - w)
+    return {"name": scenario, "processes": processes, "ticks": ticks,
+            "cpu_ms_per_tick": statistics.median(cpu) * 1000, "wall_ms_per_tick": statistics.median(wall) * 1000,
+            "cpu_us_per_process": statistics.median(cpu) * 1e6 / max(processes, 1)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="bench.proc_bench", description="Custo por tick da amostragem de processos")
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS, help="Repetível (padrão: todos)")
+    parser.add_argument("--ticks", type=int, default=20)
+    parser.add_argument("--interval", type=float, default=0.1, help="Segundos entre ticks")
+    parser.add_argument("--spawn", type=int, default=0, metavar="N", help="Processos ociosos extras")
+    parser.add_argument("-o", "--output", metavar="PATH", help="Resultado em JSON (padrão: stdout)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(stream=sys.stderr, level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    scenarios = args.scenario or [s for s in SCENARIOS if s != "procfs" or ProcFsSampler.available()]
+    children = []
+    try:
+        for _ in range(args.spawn):
+            children.append(subprocess.Popen(["sleep", "3600"]) if platform.system() != "Windows" else
+                            subprocess.Popen([sys.executable, "-c", "import time; time.sleep(3600)"]))
+        results = []
+        for scenario in scenarios:
+            results.append(measure(scenario, args.ticks, args.interval))
+            r = results[-1]
+            logging.info(f"{scenario}: {r['processes']} processos, {r['cpu_ms_per_tick']:.2f} ms de CPU por tick "
+                         f"({r['cpu_us_per_process']:.1f} µs por processo)")
+    finally:
+        for child in children:
+            child.kill()
+            child.wait()
+    report = {"meta": {"python": platform.python_version(), "platform": platform.platform(),
+                       "psutil": psutil.__version__, "spawned": args.spawn, "interval": args.interval},
+              "results": results}
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        sys.stdout.write(text + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# Benchmark do escaneamento sobre um corpus sintético (bench/corpus.py):
+#   python -m bench.scan_bench --files 20000 -o atual.json
+#   python -m bench.scan_bench --files 20000 --baseline atual.json --max-regression 10
+# Cada medição roda num processo novo (pico de RSS isolado). "cold": cache de escaneamento vazio e páginas
+# do corpus fora do page cache (posix_fadvise, sem precisar de root); "warm": mesmo cache, corpus em memória.
+# Códigos de saída: 0 = ok, 1 = regressão acima do limite ou vereditos errados, 2 = erro
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import platform
+import resource
+import tempfile
+import statistics
+import subprocess
+from bench import corpus
+
+SCENARIOS = ("core", "sharded", "thread")  # Scanner.scan, Scanner.scan_sharded, FileScannerThread
+DEFAULT_CORPUS_DIR = os.path.join(tempfile.gettempdir(), "foxter-bench-corpus")
+DEFAULT_MAX_REGRESSION = 10.0  # %
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Métrica -> True se maior é melhor. Só as marcadas em GATED reprovam a comparação com a baseline
+METRICS = {"files_per_sec": True, "mb_per_sec": True, "peak_rss_kb": False, "first_result_s": False,
+           "seconds": False}
+GATED = ("files_per_sec", "mb_per_sec", "peak_rss_kb")
+
+
+def evict_page_cache(tree):
+    # Tira as páginas do corpus do page cache; não exige root como /proc/sys/vm/drop_caches
+    if not hasattr(os, "posix_fadvise"):
+        return False
+    for dirpath, _, filenames in os.walk(tree):
+        for name in filenames:
+            try:
+                fd = os.open(os.path.join(dirpath, name), os.O_RDONLY)
+            except OSError:
+                continue
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+            finally:
+                os.close(fd)
+    return True
+
+
+def qt_available():
+    # O cenário "thread" mede o FileScannerThread, que depende do PyQt5
+    try:
+        import PyQt5.QtCore
+    except ImportError:
+        return False
+    return True
+
+
+def run_child(spec):
+    # Uma medição, no processo atual: {"scenario", "tree", "signatures", "cache_path", "workers", "processes"}
+    start = time.monotonic()
+    state = {"files": 0, "suspicious": 0, "errors": 0, "first_result": None}
+
+    def on_batch(batch):
+        if state["first_result"] is None and batch:
+            state["first_result"] = time.monotonic() - start
+        state["files"] += len(batch)
+        for result in batch:
+            status = result["status"]
+            if status == "Suspicious":
+                state["suspicious"] += 1
+            elif status not in ("Clean", "Skipped"):
+                state["errors"] += 1
+
+    options = {"workers": spec.get("workers"), "cache_path": spec["cache_path"],
+               "signature_db_path": spec["signatures"], "history_path": None, "checkpoint_dir": None}
+    scenario = spec["scenario"]
+    bytes_read = None
+    if scenario == "thread":
+        from core.file_scanner import FileScannerThread
+        thread = FileScannerThread(spec["tree"], keep_results=False, **options)
+        thread.batch_scanned.connect(on_batch)
+        thread.run()  # No próprio processo: os sinais vão direto para on_batch
+        bytes_read = thread.scanner.pipeline.bytes_done
+    else:
+        from core.scanner import Scanner
+        scanner = Scanner(**options)
+        scanner.open()
+        try:
+            if scenario == "sharded":
+                pipeline = scanner.scan_sharded(spec["tree"], on_batch, processes=spec.get("processes"))
+            else:
+                pipeline = scanner.scan(spec["tree"], on_batch)
+            bytes_read = pipeline.bytes_done
+        finally:
+            scanner.close()
+    seconds = time.monotonic() - start
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return {"seconds": seconds, "files": state["files"], "suspicious": state["suspicious"],
+            "errors": state["errors"], "first_result_s": state["first_result"], "bytes_read": bytes_read,
+            "peak_rss_kb": usage.ru_maxrss, "children_peak_rss_kb": children.ru_maxrss,
+            "cpu_s": usage.ru_utime + usage.ru_stime + children.ru_utime + children.ru_stime}
+
+
+def measure(spec):
+    result = subprocess.run([sys.executable, "-m", "bench.scan_bench", "--child", json.dumps(spec)],
+                            cwd=REPO_ROOT, stdout=subprocess.PIPE, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Medição {spec['scenario']} falhou (código {result.returncode})")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def summarize(name, samples, manifest):
+    seconds = statistics.median(s["seconds"] for s in samples)
+    first = [s["first_result_s"] for s in samples if s["first_result_s"] is not None]
+    summary = {
+        "name": name,
+        "seconds": seconds,
+        "files_per_sec": manifest["files"] / seconds if seconds else None,
+        "mb_per_sec": manifest["bytes"] / (1024 * 1024) / seconds if seconds else None,
+        "peak_rss_kb": max(max(s["peak_rss_kb"], s["children_peak_rss_kb"]) for s in samples),
+        "first_result_s": statistics.median(first) if first else None,
+        "correct": all(s["suspicious"] == manifest["expected_suspicious"] and s["errors"] == 0 for s in samples),
+        "samples": samples,
+    }
+    if not summary["correct"]:
+        logging.error(f"{name}: vereditos diferentes do esperado "
+                      f"({[s['suspicious'] for s in samples]} suspeitos, {manifest['expected_suspicious']} esperados)")
+    return summary
+
+
+def run_benchmarks(args, manifest):
+    tree = os.path.join(args.corpus, corpus.TREE)
+    signatures = os.path.join(args.corpus, corpus.SIGNATURES)
+    results = []
+    for scenario in args.scenario or ["core"]:
+        if scenario == "thread" and not qt_available():
+            logging.warning("Cenário thread ignorado: PyQt5 não está instalado")
+            continue
+        cold, warm = [], []
+        for i in range(args.runs):
+            work = tempfile.mkdtemp(prefix="foxter-bench-")
+            try:
+                spec = {"scenario": scenario, "tree": tree, "signatures": signatures,
+                        "cache_path": os.path.join(work, "scan_cache.db"), "workers": args.workers,
+                        "processes": args.processes}
+                evict_page_cache(tree)
+                cold.append(measure(spec))
+                logging.info(f"{scenario} cold #{i + 1}: {cold[-1]['seconds']:.2f}s")
+                warm.append(measure(spec))  # Mesmo cache, corpus ainda no page cache
+                logging.info(f"{scenario} warm #{i + 1}: {warm[-1]['seconds']:.2f}s")
+            finally:
+                shutil.rmtree(work, ignore_errors=True)
+        results.append(summarize(f"{scenario}-cold", cold, manifest))
+        results.append(summarize(f"{scenario}-warm", warm, manifest))
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, stdout=subprocess.PIPE,
+                              stderr=subprocess.DEVNULL, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare(report, baseline, max_regression):
+    # Imprime a variação de cada métrica; devolve as regressões acima do limite nas métricas GATED
+    base = {r["name"]: r for r in baseline.get("results", [])}
+    regressions = []
+    for result in report["results"]:
+        old = base.get(result["name"])
+        if old is None:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            a, b = old.get(metric), result.get(metric)
+            if not a or b is None:
+                continue
+            change = (b - a) / a * 100
+            worse = -change if higher_is_better else change
+            mark = ""
+            if metric in GATED and worse > max_regression:
+                mark = "  REGRESSÃO"
+                regressions.append((result["name"], metric, change))
+            sys.stderr.write(f"{result['name']:>14} {metric:>15}: {a:12.3f} -> {b:12.3f} ({change:+.1f}%){mark}\n")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="bench.scan_bench", description="Benchmark do scanner de arquivos")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS_DIR, metavar="DIR",
+                        help="Diretório do corpus (gerado se faltar ou se os parâmetros mudarem)")
+    corpus.add_corpus_options(parser)
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS, help="Repetível (padrão: core)")
+    parser.add_argument("--runs", type=int, default=3, help="Pares cold/warm por cenário; vale a mediana")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--processes", type=int, default=None, help="Processos do cenário sharded")
+    parser.add_argument("-o", "--output", metavar="PATH", help="Resultado em JSON (padrão: stdout)")
+    parser.add_argument("--baseline", metavar="PATH", help="JSON de uma execução anterior para comparar")
+    parser.add_argument("--max-regression", type=float, default=DEFAULT_MAX_REGRESSION, metavar="PCT")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        logging.basicConfig(stream=sys.stderr, level=logging.ERROR)  # Sem um aviso por acerto plantado
+        sys.stdout.write(json.dumps(run_child(json.loads(args.child))) + "\n")
+        return 0
+    logging.basicConfig(stream=sys.stderr, level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    baseline = None
+    if args.baseline:
+        try:
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.error(f"Baseline ilegível {args.baseline}: {str(e)}")
+            return 2
+    manifest = corpus.ensure(args.corpus, **corpus.corpus_params(args))
+    try:
+        results = run_benchmarks(args, manifest)
+    except RuntimeError as e:
+        logging.error(str(e))
+        return 2
+    report = {
+        "meta": {"revision": git_revision(), "timestamp": time.time(), "python": platform.python_version(),
+                 "platform": platform.platform(), "cpu_count": os.cpu_count(), "runs": args.runs,
+                 "workers": args.workers, "processes": args.processes},
+        "corpus": manifest,
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        sys.stdout.write(text + "\n")
+    for r in results:
+        logging.info(f"{r['name']}: {r['files_per_sec']:.0f} arquivos/s, {r['mb_per_sec']:.1f} MB/s, "
+                     f"pico {r['peak_rss_kb'] / 1024:.0f} MB, primeiro resultado em {r['first_result_s'] or 0:.3f}s")
+    failed = not all(r["correct"] for r in results)
+    if baseline is not None:
+        if baseline.get("corpus", {}).get("params") != manifest["params"]:
+            logging.warning("Baseline medida com outro corpus; a comparação não é equivalente")
+        regressions = compare(report, baseline, args.max_regression)
+        for name, metric, change in regressions:
+            logging.error(f"Regressão em {name}.{metric}: {change:+.1f}%")
+        failed = failed or bool(regressions)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,276 @@
+import io
+import os
+import bz2
+import gzip
+import lzma
+import zlib
+import logging
+import tarfile
+import zipfile
+from core.file_types import SNIFF_SIZE
+from core.scan_pipeline import ScanCancelled
+
+# Membros de zip/tar/gz/bz2/xz lidos em streaming, sem extrair para o disco.
+# Resultados com caminho "arquivo.zip!pasta/membro" (aninhados: "a.zip!b.tar.gz!c").
+# tar/gz/bz2/xz são lidos uma vez só: o Scanner passa o arquivo aberto por um TeeReader que alimenta os digests
+# do próprio arquivo. zip precisa de seek (diretório central no fim) e é lido de novo.
+# Os limites contam bytes descompactados; o progresso e o limitador de E/S só veem os bytes do disco.
+
+ARCHIVE_SEPARATOR = "!"
+DEFAULT_MAX_DEPTH = 3  # Níveis de aninhamento (o arquivo do disco é o nível 1)
+DEFAULT_MAX_EXPANDED = 512 * 1024 * 1024  # Bytes descompactados por arquivo do disco, somando todos os níveis
+DEFAULT_MAX_MEMBERS = 10000
+DEFAULT_MAX_RATIO = 200  # Descompactado / compactado
+RATIO_FLOOR = 16 * 1024 * 1024  # Abaixo disso a razão não é verificada (texto pequeno comprime muito)
+SPOOL_LIMIT = 64 * 1024 * 1024  # Zip dentro de outro arquivo vai para a memória (zipfile precisa de seek)
+READ_SIZE = 1024 * 1024
+
+_COMPRESSED = (
+    (b"\x1f\x8b", "gz", lambda f: gzip.GzipFile(fileobj=f)),
+    (b"BZh", "bz2", bz2.BZ2File),
+    (b"\xfd7zXZ\x00", "xz", lzma.LZMAFile),
+)
+STREAMING_KINDS = ("tar", "gz", "bz2", "xz")  # Lidos em sequência, sem seek
+_SUFFIXES = {"gz": (".gz", ".tgz"), "bz2": (".bz2", ".tbz2"), "xz": (".xz", ".txz")}
+_ERRORS = (OSError, EOFError, ValueError, RuntimeError, NotImplementedError, zlib.error, lzma.LZMAError,
+           zipfile.BadZipFile, tarfile.TarError)
+
+
+class ArchiveLimitExceeded(Exception):
+    # suspicious: cara de bomba de descompressão (taxa, número de membros); o total descompactado excedido
+    # só deixa o escaneamento incompleto
+    def __init__(self, message, suspicious=True):
+        super().__init__(message)
+        self.suspicious = suspicious
+
+
+class ArchiveLimits:
+    def __init__(self, max_depth=DEFAULT_MAX_DEPTH, max_expanded=DEFAULT_MAX_EXPANDED,
+                 max_members=DEFAULT_MAX_MEMBERS, max_ratio=DEFAULT_MAX_RATIO):
+        self.max_depth = max_depth
+        self.max_expanded = max_expanded
+        self.max_members = max_members
+        self.max_ratio = max_ratio
+
+    def key(self):
+        # Entra na versão do cache de escaneamento: limites diferentes, membros diferentes
+        return f"{self.max_depth}:{self.max_expanded}:{self.max_members}:{self.max_ratio}"
+
+
+def archive_kind(header):
+    if header[:4] in (b"PK\x03\x04", b"PK\x05\x06"):
+        return "zip"
+    if header[257:262] == b"ustar":
+        return "tar"
+    for magic, kind, _ in _COMPRESSED:
+        if header.startswith(magic):
+            return kind
+    return None
+
+
+def container_path(path):
+    # "dir/a.zip!x/y" -> "dir/a.zip": o arquivo real no disco que contém o membro
+    if os.path.lexists(path) or ARCHIVE_SEPARATOR not in path:
+        return path
+    cut = path.find(ARCHIVE_SEPARATOR)
+    while cut >= 0:
+        if os.path.isfile(path[:cut]):
+            return path[:cut]
+        cut = path.find(ARCHIVE_SEPARATOR, cut + 1)
+    return path
+
+
+def _member_name(kind, name):
+    # Nome do conteúdo de um .gz/.bz2/.xz isolado: "log.gz" -> "log", "x.tgz" -> "x.tar"
+    base = os.path.basename(name)
+    for suffix in _SUFFIXES[kind]:
+        if base.lower().endswith(suffix):
+            return base[:-len(suffix)] + (".tar" if suffix.startswith(".t") else "")
+    return base or "data"
+
+
+class TeeReader(io.RawIOBase):
+    # Repõe o cabeçalho já lido e repassa cada byte aos sinks (digests/padrões) e a budget(n) (limites ou
+    # progresso). Sempre em blocos de no máximo READ_SIZE, cada um conferido por budget antes do próximo
+    def __init__(self, header, raw, sinks, budget):
+        self.header = header
+        self.raw = raw
+        self.sinks = sinks
+        self.budget = budget
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            chunks = []
+            while True:
+                chunk = self.read(READ_SIZE)
+                if not chunk:
+                    return b"".join(chunks)
+                chunks.append(chunk)
+        size = min(size, READ_SIZE)
+        if self.header:
+            data, self.header = self.header[:size], self.header[size:]
+        else:
+            data = self.raw.read(size)
+        if data:
+            self._feed(data)
+        return data
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def _feed(self, data):
+        self.budget(len(data))
+        for sink in self.sinks:
+            sink.update(data)
+
+    def drain(self):
+        while self.read(READ_SIZE):
+            pass
+
+
+class ArchiveScanner:
+    # new_hasher() devolve um objeto com update(chunk) e result(caminho) -> (status, digests, content_match)
+    def __init__(self, new_hasher, limits=None):
+        self.new_hasher = new_hasher
+        self.limits = limits or ArchiveLimits()
+
+    def scan(self, file_path, kind, stream=None, size=None):
+        # Membros de um arquivo do disco e o status do próprio arquivo: None se a expansão foi até o fim,
+        # "Suspicious" ou "Error: ..." se um limite a interrompeu. stream: o arquivo já aberto pelo Scanner
+        # (tar/gz/bz2/xz, leitura compartilhada com os digests); sem ele o arquivo é aberto aqui (zip)
+        results = []
+        state = {"expanded": 0, "members": 0}
+        if size is None:
+            try:
+                size = os.path.getsize(file_path)
+            except OSError:
+                size = 0
+        compressed = max(size, 1)
+        limits = self.limits
+        status = None
+
+        def budget(n):
+            state["expanded"] += n
+            if state["expanded"] > limits.max_expanded:
+                raise ArchiveLimitExceeded(f"mais de {limits.max_expanded} bytes descompactados", suspicious=False)
+            if state["expanded"] > RATIO_FLOOR and state["expanded"] / compressed > limits.max_ratio:
+                raise ArchiveLimitExceeded(f"taxa de compressão acima de {limits.max_ratio}:1")
+
+        def member(path):
+            state["members"] += 1
+            if state["members"] > limits.max_members:
+                raise ArchiveLimitExceeded(f"mais de {limits.max_members} membros")
+            state["current"] = path
+
+        try:
+            if stream is not None:
+                self._walk(kind, stream, file_path, 1, results, budget, member)
+            else:
+                with open(file_path, "rb") as f:
+                    self._walk(kind, f, file_path, 1, results, budget, member)
+        except ArchiveLimitExceeded as e:
+            path = state.get("current", file_path + ARCHIVE_SEPARATOR)
+            logging.warning(f"Limite de arquivo compactado em {file_path}: {str(e)}")
+            error = f"Error: limite excedido ({str(e)})"
+            results.append({"path": path, "status": error, "digests": {}})
+            status = "Suspicious" if e.suspicious else error  # O próprio arquivo não sai como limpo
+        except ScanCancelled:
+            raise
+        except Exception as e:
+            logging.error(f"Erro ao abrir arquivo compactado {file_path}: {str(e)}")
+            results.append({"path": file_path + ARCHIVE_SEPARATOR, "status": f"Error: {str(e)}", "digests": {}})
+        for result in results:
+            result["archive"] = file_path
+        return results, status
+
+    def _walk(self, kind, stream, name, depth, results, budget, member):
+        for inner, opened in self._members(kind, stream, name):
+            path = f"{name}{ARCHIVE_SEPARATOR}{inner}"
+            member(path)
+            try:
+                with opened() as raw:
+                    self._scan_member(raw, path, depth, results, budget, member)
+            except ArchiveLimitExceeded:
+                raise
+            except _ERRORS as e:
+                logging.error(f"Erro ao ler {path}: {str(e)}")
+                results.append({"path": path, "status": f"Error: {str(e)}", "digests": {}})
+
+    def _scan_member(self, raw, path, depth, results, budget, member):
+        header = raw.read(SNIFF_SIZE)
+        hasher = self.new_hasher()
+        reader = TeeReader(header, raw, (hasher,), budget)
+        kind = archive_kind(header) if depth < self.limits.max_depth else None
+        if kind == "zip":
+            # zipfile precisa de seek: só zips aninhados pequenos são lidos para a memória
+            data = bytearray()
+            while len(data) <= SPOOL_LIMIT:
+                chunk = reader.read(READ_SIZE)
+                if not chunk:
+                    break
+                data += chunk
+            if len(data) <= SPOOL_LIMIT:
+                self._walk_nested(kind, io.BytesIO(data), path, depth, results, budget, member)
+            else:
+                logging.info(f"Zip aninhado grande demais para expandir: {path}")
+        elif kind is not None:
+            self._walk_nested(kind, reader, path, depth, results, budget, member)
+        reader.drain()
+        status, digests, content_match = hasher.result(path)
+        results.append({"path": path, "status": status, "digests": digests, "content_match": content_match})
+
+    def _walk_nested(self, kind, stream, path, depth, results, budget, member):
+        try:
+            self._walk(kind, stream, path, depth + 1, results, budget, member)
+        except (tarfile.ReadError, zipfile.BadZipFile, EOFError, zlib.error, lzma.LZMAError, OSError) as e:
+            # Parecia compactado mas não é (ou está corrompido): o membro continua sendo escaneado como dado
+            logging.debug(f"Membro {path} não expandido: {str(e)}")
+
+    def _members(self, kind, stream, name):
+        # (nome interno, função que abre o membro em streaming)
+        if kind == "zip":
+            archive = zipfile.ZipFile(stream)
+            for info in archive.infolist():
+                if info.is_dir():
+                    continue
+                if info.flag_bits & 0x1:
+                    yield info.filename, _failing(RuntimeError("membro criptografado"))
+                    continue
+                ratio = info.file_size / max(info.compress_size, 1)
+                if info.file_size > RATIO_FLOOR and ratio > self.limits.max_ratio:
+                    raise ArchiveLimitExceeded(f"{info.filename}: taxa de compressão declarada {ratio:.0f}:1")
+                yield info.filename, lambda info=info: archive.open(info)
+        elif kind == "tar":
+            with tarfile.open(fileobj=stream, mode="r|") as archive:
+                for info in archive:
+                    if info.isreg():
+                        yield _tar_name(info.name), lambda info=info: archive.extractfile(info)
+        else:
+            decompressor = next(c for _, k, c in _COMPRESSED if k == kind)
+            decompressed = decompressor(stream)
+            header = decompressed.read(SNIFF_SIZE)
+            if archive_kind(header) == "tar":
+                yield from self._members("tar", TeeReader(header, decompressed, (), _no_budget), name)
+            else:
+                yield _member_name(kind, name), lambda: TeeReader(header, decompressed, (), _no_budget)
+
+
+def _tar_name(name):
+    while name.startswith("./"):
+        name = name[2:]
+    return name
+
+
+def _no_budget(n):
+    pass
+
+
+def _failing(error):
+    def opened():
+        raise error
+    return opened
@@ -0,0 +1,169 @@
+import os
+import time
+import logging
+from core.process_table import PROC_ROOT, ProcFsSampler
+from core.scanner import hash_file, CHUNK_SIZE
+from infra.signature_db import SignatureSet, DEFAULT_SIGNATURE_DB_PATH
+
+# Confere o executável (/proc/[pid]/exe) e as bibliotecas carregadas (trechos executáveis do /proc/[pid]/maps)
+# de cada processo com a base de assinaturas do scanner. Digests em cache por (dev, inode), válidos enquanto
+# tamanho/mtime/ctime não mudam (como na ScanCache): centenas de processos do mesmo binário custam um hash.
+# Em regime só processos novos, exec e a releitura periódica dos maps geram trabalho, e quase tudo sai do cache.
+# O exe é aberto pelo link do /proc, então um binário apagado do disco ainda em execução também é conferido.
+
+RECHECK_SECONDS = 60.0  # Releitura dos maps (dlopen, troca de biblioteca) de processos já conferidos
+HASH_BUDGET = 64 * 1024 * 1024  # Bytes hasheados por passada; o que passar fica para as seguintes
+MAX_CACHED = 8192  # Acima disso saem os digests que nenhum processo usou recentemente
+DELETED_SUFFIX = " (deleted)"
+
+
+class BinaryChecker:
+    def __init__(self, signature_db_path=DEFAULT_SIGNATURE_DB_PATH, root=PROC_ROOT, libraries=True):
+        self.root = root
+        self.libraries = libraries
+        self.signatures = SignatureSet(signature_db_path)
+        self.algorithms = tuple(self.signatures.algorithms)  # Só os que têm assinaturas carregadas
+        self.buffer = bytearray(CHUNK_SIZE)
+        self.digests = {}  # (dev, inode) -> [(tamanho, mtime, ctime), digests, último uso]
+        self.checked = {}  # pid -> (start, nome, instante da conferência)
+        self.matches = {}  # pid -> caminho do arquivo com assinatura conhecida
+        self.hashed_files = 0  # Arquivos realmente lidos (falhas de cache)
+        self.hashed_bytes = 0
+
+    @staticmethod
+    def available(root=PROC_ROOT):
+        return ProcFsSampler.available(root)
+
+    @property
+    def enabled(self):
+        return bool(self.algorithms)
+
+    def check(self, table):
+        # Uma passada sobre a ProcessTable; devolve {pid: caminho} dos processos com assinatura conhecida
+        if not self.algorithms:
+            return {}
+        now = time.monotonic()
+        for pid in [pid for pid in self.checked if pid not in table.slots]:
+            del self.checked[pid]
+            self.matches.pop(pid, None)
+        budget = [HASH_BUDGET]
+        stats = {}  # Caminho -> stat, uma vez por passada (bibliotecas repetem entre processos)
+        for pid, slot in table.slots.items():
+            start, name = table.start[slot], table.name[slot]
+            previous = self.checked.get(pid)
+            if previous is not None and previous[0] == start and previous[1] == name and \
+                    now - previous[2] < RECHECK_SECONDS:
+                continue
+            if previous is not None and previous[0] != start:
+                self.matches.pop(pid, None)  # Pid reutilizado
+            result = self._check_process(pid, now, stats, budget)
+            if result is None:
+                continue  # Orçamento esgotado: fica para a próxima passada
+            self.checked[pid] = (start, name, now)
+            if result:
+                self.matches[pid] = result
+            else:
+                self.matches.pop(pid, None)
+        if len(self.digests) > MAX_CACHED:
+            stale = now - 2 * RECHECK_SECONDS
+            self.digests = {key: entry for key, entry in self.digests.items() if entry[2] >= stale}
+        return self.matches
+
+    def check_file(self, path):
+        # Executável de um processo que já terminou (visto só no evento de exec): caminho se tem assinatura
+        st = self._stat(path, {}) if self.algorithms else None
+        digests = self._digests(path, st, time.monotonic(), [HASH_BUDGET]) if st is not None else None
+        algorithm = digests and self.signatures.match(digests)
+        if algorithm:
+            logging.warning(f"Assinatura {algorithm} conhecida em {path}")
+            return path
+        return ""
+
+    def invalidate(self, pid):
+        # exec: o programa mudou, confere de novo na próxima passada mesmo com o nome igual
+        self.checked.pop(pid, None)
+
+    def _check_process(self, pid, now, stats, budget):
+        # Caminho do primeiro arquivo com assinatura, "" se nenhum, None se faltou orçamento
+        exe = f"{self.root}/{pid}/exe"
+        files = [(exe, None, None)]
+        if self.libraries:
+            files.extend(self._libraries(pid))
+        for path, inode, fallback in files:
+            st = self._stat(path, stats)
+            if st is not None and inode is not None and st.st_ino != inode:
+                path = fallback  # Trocado no disco depois de mapeado (atualização): confere o que está em uso
+                st = self._stat(path, stats)
+            if st is None:
+                continue  # Processo encerrado ou sem permissão (sem root: só os próprios processos)
+            digests = self._digests(path, st, now, budget)
+            if digests is None:
+                return None
+            algorithm = digests and self.signatures.match(digests)
+            if algorithm:
+                shown = self._display_path(path) if path.startswith(f"{self.root}/{pid}/") else path
+                logging.warning(f"Assinatura {algorithm} conhecida em {shown} (PID {pid})")
+                return shown
+        return ""
+
+    @staticmethod
+    def _stat(path, stats):
+        st = stats.get(path)
+        if st is None:
+            try:
+                st = stats[path] = os.stat(path)  # Nos links do /proc: o inode em uso, mesmo apagado
+            except OSError:
+                return None
+        return st
+
+    def _digests(self, path, st, now, budget):
+        key = (st.st_dev, st.st_ino)
+        ident = (st.st_size, st.st_mtime_ns, st.st_ctime_ns)
+        entry = self.digests.get(key)
+        if entry is not None and entry[0] == ident:
+            entry[2] = now
+            return entry[1]
+        if budget[0] <= 0:
+            return None
+        try:
+            digests, size = hash_file(path, self.buffer, algorithms=self.algorithms)
+        except OSError as e:
+            logging.debug(f"Erro ao calcular hash {path}: {str(e)}")
+            return {}
+        budget[0] -= size
+        self.hashed_files += 1
+        self.hashed_bytes += size
+        self.digests[key] = [ident, digests, now]
+        return digests
+
+    def _libraries(self, pid):
+        # Arquivos com trechos executáveis mapeados (bibliotecas, plugins); dados mapeados (bases, fontes)
+        # ficam de fora. (caminho, inode, alternativa): apagados ou trocados no disco são lidos por map_files
+        # (exige privilégio)
+        try:
+            with open(f"{self.root}/{pid}/maps", "rb") as f:
+                lines = f.read().decode("utf-8", "replace").splitlines()
+        except OSError:
+            return []
+        files, seen = [], set()
+        for line in lines:
+            fields = line.split(None, 5)
+            if len(fields) < 6 or "x" not in fields[1] or not fields[5].startswith("/") or fields[4] == "0":
+                continue
+            path, inode = fields[5], int(fields[4])
+            if (fields[3], inode) in seen:
+                continue
+            seen.add((fields[3], inode))
+            mapped = f"{self.root}/{pid}/map_files/{fields[0]}"
+            if path.endswith(DELETED_SUFFIX):
+                files.append((mapped, None, None))
+            else:
+                files.append((path, inode, mapped))
+        return files
+
+    @staticmethod
+    def _display_path(link):
+        try:
+            return os.readlink(link)  # exe e map_files: "/caminho (deleted)" se o arquivo foi apagado
+        except OSError:
+            return link
@@ -0,0 +1,173 @@
+import os
+import json
+import stat
+import time
+import hashlib
+import logging
+import threading
+from core.walker import DirectoryWalker
+
+DEFAULT_CHECKPOINT_DIR = os.path.join(os.path.expanduser("~"), ".foxter", "checkpoints")
+DEFAULT_CHECKPOINT_INTERVAL = 30.0  # Segundos entre gravações do diário
+JOURNAL_VERSION = 2
+DONE_BUFFER = 1024  # Arquivos concluídos acumulados antes de atualizar os diretórios
+
+
+def _normalize(options):
+    # Tuplas e listas comparam igual depois de um round-trip por JSON
+    return json.loads(json.dumps(options, sort_keys=True))
+
+
+class ScanCheckpoint:
+    # Diário de um escaneamento de diretório: fronteira da travessia, diretórios em andamento e contadores.
+    # Gravado em arquivo temporário + fsync + os.replace: após uma queda vale o diário anterior ou o novo.
+    def __init__(self, directory, root):
+        self.root = os.path.abspath(root)
+        name = hashlib.sha1(os.fsencode(self.root)).hexdigest()
+        self.path = os.path.join(directory, f"{name}.json")
+
+    def load(self, walk_options=None):
+        try:
+            with open(self.path, "r", encoding="utf-8", errors="surrogateescape") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logging.warning(f"Diário de escaneamento ilegível ({self.path}): {str(e)}")
+            return None
+        if state.get("version") != JOURNAL_VERSION or state.get("root") != self.root:
+            return None
+        if state.get("walk_options") != _normalize(walk_options or {}):
+            logging.info(f"Diário de {self.root} ignorado: opções de travessia diferentes")
+            return None
+        return state
+
+    def save(self, state):
+        state = dict(state, version=JOURNAL_VERSION, root=self.root, updated=time.time())
+        state["walk_options"] = _normalize(state.get("walk_options") or {})
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8", errors="surrogateescape") as f:
+            json.dump(state, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        if hasattr(os, "O_DIRECTORY"):
+            # Garante que a renomeação em si chegou ao disco
+            fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def remove(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class ResumableWalker(DirectoryWalker):
+    # DirectoryWalker que sabe quais diretórios já terminaram (listados e com todos os arquivos escaneados).
+    # A fronteira salva é a pilha de diretórios pendentes mais os diretórios em andamento, com os nomes dos
+    # arquivos já concluídos em cada um; ao retomar, os em andamento só relistam os próprios arquivos (os
+    # subdiretórios já estão na pilha ou concluídos) e pulam os concluídos.
+    def __init__(self, root, state=None, **walk_options):
+        super().__init__(root, **walk_options)
+        self.lock = threading.Lock()
+        self.stack = []  # (diretório, profundidade, só arquivos, nomes já concluídos)
+        # diretório -> [profundidade, arquivos gerados, arquivos concluídos, listado, só arquivos,
+        # nomes concluídos]. "gerados" só é escrito pelo thread do walker e "concluídos" só pelo thread dos
+        # resultados: o lock é tomado uma vez por diretório e uma vez a cada DONE_BUFFER arquivos concluídos.
+        self.active = {}
+        self.done_buffer = []
+        self.sizes = {}  # Arquivos gerados e ainda não concluídos -> tamanho
+        self.dirs_completed = state.get("dirs_completed", 0) if state else 0
+        # Contadores do diário: só arquivos entregues nos lotes (os que estavam na fila ao parar são refeitos)
+        self.files_completed = state.get("files_done", 0) if state else 0
+        self.bytes_completed = state.get("bytes_done", 0) if state else 0
+        if state:
+            partial = [(d, depth, True, names) for d, depth, names in state.get("partial", [])]
+            pending = [(d, depth, files_only, names) for d, depth, files_only, names in state.get("pending", [])]
+            self.stack = partial + pending
+
+    def walk(self, should_stop=None):
+        try:
+            root_st = os.stat(self.root)
+        except OSError as e:
+            logging.error(f"Diretório inválido: {self.root}: {str(e)}")
+            self.errors += 1
+            return
+        self.root_dev = root_st.st_dev
+        if stat.S_ISREG(root_st.st_mode):
+            yield from super().walk(should_stop)
+            return
+        if self.root_excluded():
+            return
+        with self.lock:
+            if not self.stack and not self.dirs_completed:
+                self.stack.append((self.root, 0, False, ()))
+        while True:
+            if should_stop is not None and should_stop():
+                return
+            with self.lock:
+                if not self.stack:
+                    return
+                directory, depth, files_only, names = self.stack.pop()
+                done = set(names)
+                entry = self.active[directory] = [depth, 0, 0, False, files_only, done]
+            subdirs = []
+            for path, st in self._list_dir(directory, depth, subdirs, files_only):
+                if done and os.path.basename(path) in done:
+                    continue  # Concluído antes da interrupção
+                entry[1] += 1
+                self.sizes[path] = st.st_size
+                yield path, st
+            with self.lock:
+                self.stack.extend((d, dep, False, ()) for d, dep in reversed(subdirs))
+                entry[3] = True
+                if entry[2] >= entry[1]:
+                    self._complete(directory)
+
+    def _complete(self, directory):
+        del self.active[directory]
+        self.dirs_completed += 1
+
+    def files_done(self, paths):
+        # Chamado pelo thread que recebe os resultados (o mesmo que chama snapshot)
+        self.done_buffer.extend(paths)
+        if len(self.done_buffer) >= DONE_BUFFER:
+            self._apply_done()
+
+    def _apply_done(self):
+        done = {}
+        for path in self.done_buffer:
+            directory, name = os.path.split(path)
+            done.setdefault(directory, []).append(name)
+            self.files_completed += 1
+            self.bytes_completed += self.sizes.pop(path, 0)
+        self.done_buffer = []
+        with self.lock:
+            for directory, names in done.items():
+                entry = self.active.get(directory)
+                if entry is None:
+                    continue
+                entry[2] += len(names)
+                entry[5].update(names)
+                if entry[3] and entry[2] >= entry[1]:
+                    self._complete(directory)
+
+    def snapshot(self):
+        self._apply_done()
+        with self.lock:
+            pending = [[d, depth, files_only, list(names)] for d, depth, files_only, names in self.stack]
+            partial = []
+            for directory, (depth, _, _, listed, files_only, names) in self.active.items():
+                if listed or files_only:
+                    partial.append([directory, depth, sorted(names)])
+                else:
+                    # Listagem interrompida: relista tudo, inclusive subdiretórios, menos os arquivos concluídos
+                    pending.append([directory, depth, False, sorted(names)])
+            return {"pending": pending, "partial": partial, "dirs_completed": self.dirs_completed,
+                    "files_done": self.files_completed, "bytes_done": self.bytes_completed}
@@ -1,72 +1,172 @@
 import os
-import hashlib
+import time
 import logging
 from PyQt5.QtCore import QThread, pyqtSignal
-from infra.signature_db import MALICIOUS_SIGNATURES
+from core.scanner import Scanner
+from core.result_store import ScanResults
+from infra.scan_history import ScanHistory
+from infra.quarantine import QuarantineStore
+from core.file_watcher import DEFAULT_DEBOUNCE, DEFAULT_RESCAN_INTERVAL
+
+EMIT_INTERVAL = 0.05  # Sinais para a GUI agrupados em no máximo ~20 por segundo
+
 
 class FileScannerThread(QThread):
+    # Adaptador Qt sobre core.scanner.Scanner
     progress = pyqtSignal(int)
+    bytes_progress = pyqtSignal(object)
+    files_progress = pyqtSignal(object, object)  # (concluídos, descobertos)
     batch_scanned = pyqtSignal(list)
-    finished = pyqtSignal(list)
+    throttle_state = pyqtSignal(str)  # Estado do limitador (core.throttle), quando ativo
+    finished = pyqtSignal(object)  # ScanResults (ou None com keep_results=False)
 
-    def __init__(self, directory):
+    def __init__(self, directory, keep_results=True, resume=False, **scanner_options):
         super().__init__()
         self.directory = directory
-        self.results = []
-        self.is_running = True
+        self.resume = resume  # Continua do diário de um escaneamento interrompido, se houver
+        self.scanner = Scanner(**scanner_options)
+        self.results = ScanResults() if keep_results else None
+        self.pending = []
+        self.last_emit = 0.0
+
+    @property
+    def is_running(self):
+        return self.scanner.is_running
 
     def run(self):
         if not os.path.exists(self.directory):
             logging.error(f"Diretório inválido: {self.directory}")
-            self.finished.emit([])
-            return
-        total_files = sum(len(files) for _, _, files in os.walk(self.directory))
-        if total_files == 0:
-            self.finished.emit([])
+            self.finished.emit(self.results)
             return
-        processed_files = 0
-        batch = []
-        for root, _, files in os.walk(self.directory):
-            if not self.is_running:
-                break
-            for file_name in files:
-                if not self.is_running:
-                    break
-                file_path = os.path.join(root, file_name)
-                try:
-                    status = self.scan_file(file_path)
-                    result = {"path": file_path, "status": status}
-                    batch.append(result)
-                    self.results.append(result)  # Acumula todos os resultados
-                    processed_files += 1
-                    if len(batch) >= 10:
-                        self.batch_scanned.emit(batch[:])
-                        batch.clear()
-                    if total_files > 0:
-                        progress = int((processed_files / total_files) * 100)
-                        self.progress.emit(progress)
-                except Exception as e:
-                    logging.error(f"Erro ao escanear {file_path}: {str(e)}")
-                    result = {"path": file_path, "status": f"Error: {str(e)}"}
-                    batch.append(result)
-                    self.results.append(result)  # Acumula erros também
-        if batch:
-            self.batch_scanned.emit(batch)
-        self.progress.emit(100)
+        self.scanner.open()
+        try:
+            self.scanner.scan(self.directory, self._on_batch, self._on_progress, resume=self.resume)
+        finally:
+            self.scanner.close()
+        self._emit_pending()
+        if self.scanner.is_running:
+            self.progress.emit(100)
+            logging.info(f"Escaneamento concluído: {self.directory}")
+        else:
+            logging.info(f"Escaneamento interrompido (pode ser retomado): {self.directory}")
         self.finished.emit(self.results)  # Emite todos os resultados
-        logging.info(f"Escaneamento concluído: {self.directory}")
 
-    def scan_file(self, file_path):
+    def _on_batch(self, batch):
+        if self.results is not None:
+            self.results.extend(batch)  # Acumula todos os resultados, inclusive erros
+        self.pending.extend(batch)
+
+    def _emit_pending(self):
+        self.last_emit = time.monotonic()
+        if self.pending:
+            self.batch_scanned.emit(self.pending)
+            self.pending = []
+
+    def _on_progress(self, pipeline):
+        # O pipeline entrega lotes pequenos; a GUI recebe um sinal por intervalo, não um por lote
+        if time.monotonic() - self.last_emit < EMIT_INTERVAL:
+            return
+        self._emit_pending()
+        resumed = self.scanner.resumed_files  # Concluídos antes de uma retomada
+        done = pipeline.files_done + resumed
+        found = max(pipeline.files_found + resumed, done, 1)
+        progress = int((done / found) * 100)
+        if not pipeline.walk_done:
+            progress = min(progress, 99)  # Total ainda desconhecido
+        self.progress.emit(progress)
+        self.files_progress.emit(done, pipeline.files_found + resumed)
+        self.bytes_progress.emit(pipeline.bytes_done)
+        if self.scanner.throttle is not None and self.scanner.throttle.enabled:
+            self.throttle_state.emit(self.scanner.throttle.describe())
+
+    def scan_file(self, file_path, buffer=None, on_chunk=None, st=None, sniffed=None):
+        return self.scanner.scan_file(file_path, buffer, on_chunk, st, sniffed)
+
+    def stop(self):
+        self.scanner.stop()
+
+
+class ReportExportThread(QThread):
+    # Exporta um escaneamento direto do histórico (SQLite), sem passar pela tabela da GUI
+    exported = pyqtSignal(object, str)  # (linhas exportadas ou None se cancelado, erro)
+
+    def __init__(self, history_path, scan_id, out_path, fmt="txt", verdict=None):
+        super().__init__()
+        self.history_path = history_path
+        self.scan_id = scan_id
+        self.out_path = out_path
+        self.fmt = fmt
+        self.verdict = verdict
+        self.is_running = True
+
+    def run(self):
+        try:
+            history = ScanHistory(self.history_path)  # Conexão própria: o WAL não bloqueia o escaneamento
+            try:
+                count = history.export(self.scan_id, self.out_path, self.fmt, self.verdict,
+                                       should_stop=lambda: not self.is_running)
+            finally:
+                history.close()
+            self.exported.emit(count, "")
+        except Exception as e:
+            logging.error(f"Erro ao exportar relatório {self.out_path}: {str(e)}")
+            self.exported.emit(None, str(e))
+
+    def stop(self):
+        self.is_running = False
+
+
+class QuarantineThread(QThread):
+    # Quarentena (ou restauração) em lote fora da thread da GUI: cópias entre dispositivos podem demorar
+    item_done = pyqtSignal(object, object, str)  # (caminho ou id, id ou caminho, erro)
+    finished = pyqtSignal(int, int)  # (concluídos, erros)
+
+    def __init__(self, directory, paths=(), restore_ids=()):
+        super().__init__()
+        self.directory = directory
+        self.paths = list(paths)
+        self.restore_ids = list(restore_ids)
+        self.is_running = True
+
+    def run(self):
+        results = []
         try:
-            with open(file_path, "rb") as f:
-                content = f.read()
-                file_hash = hashlib.sha256(content).hexdigest()
-                if file_hash in MALICIOUS_SIGNATURES:
-                    return "Suspicious"
-            return "Clean"
+            store = QuarantineStore(self.directory)  # Conexão própria desta thread
+            try:
+                should_stop = lambda: not self.is_running
+                if self.paths:
+                    results += store.quarantine_many(self.paths, self.item_done.emit, should_stop)
+                if self.restore_ids:
+                    results += store.restore_many(self.restore_ids, on_item=self.item_done.emit,
+                                                  should_stop=should_stop)
+            finally:
+                store.close()
         except Exception as e:
-            logging.error(f"Erro ao calcular hash {file_path}: {str(e)}")
-            return f"Error: {str(e)}"
+            logging.error(f"Erro na quarentena: {str(e)}")
+            for path in self.paths[len(results):]:
+                self.item_done.emit(path, None, str(e))
+        done = sum(1 for r in results if not r[2])
+        self.finished.emit(done, len(self.paths) + len(self.restore_ids) - done)
 
     def stop(self):
-        self.is_running = False
\ No newline at end of file
+        self.is_running = False
+
+
+class FileWatcherThread(FileScannerThread):
+    # Modo monitor: escaneia só os caminhos alterados, em lotes, com a mesma lógica do scan_file
+    def __init__(self, directory, debounce=DEFAULT_DEBOUNCE, rescan_interval=DEFAULT_RESCAN_INTERVAL,
+                 **scanner_options):
+        super().__init__(directory, **scanner_options)
+        self.watch_options = {"debounce": debounce, "rescan_interval": rescan_interval}
+
+    def run(self):
+        self.scanner.open()
+        try:
+            self.scanner.watch([self.directory], self.batch_scanned.emit, **self.watch_options)
+        except Exception as e:
+            logging.error(f"Erro no monitor de {self.directory}: {str(e)}")
+        finally:
+            self.scanner.close()
+        self.finished.emit(None)
+        logging.info(f"Monitor encerrado: {self.directory}")
+
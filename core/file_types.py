@@ -0,0 +1,142 @@
+import os
+
+# Classificação pelo cabeçalho (magic bytes), antes do hash: decide prioridade e quanto do arquivo ler
+
+SNIFF_SIZE = 512  # Cobre o cabeçalho "ustar" do tar (offset 257)
+
+ACTION_HIGH = "high"  # Escaneamento completo, no início da fila
+ACTION_FULL = "full"
+ACTION_LOW = "low"  # Escaneamento completo, depois de todo o resto
+ACTION_HEADER = "header"  # Só o cabeçalho passa pelos padrões de conteúdo; sem digests
+ACTION_SKIP = "skip"  # Não lido; reportado como "Skipped"
+ACTIONS = (ACTION_HIGH, ACTION_FULL, ACTION_LOW, ACTION_HEADER, ACTION_SKIP)
+
+# Posição na fila do ScanPipeline; None: resolvido no próprio walker, sem ocupar um worker
+PRIORITIES = {ACTION_HIGH: 0, ACTION_FULL: 1, ACTION_HEADER: 1, ACTION_LOW: 2, ACTION_SKIP: None}
+
+FILE_TYPES = ("elf", "pe", "macho", "java", "script", "office", "pdf", "zip", "archive",
+              "image", "media", "text", "data", "empty")
+
+DEFAULT_POLICIES = {
+    "elf": ACTION_HIGH,
+    "pe": ACTION_HIGH,
+    "macho": ACTION_HIGH,
+    "java": ACTION_HIGH,
+    "script": ACTION_HIGH,
+    "office": ACTION_FULL,
+    "pdf": ACTION_FULL,
+    "zip": ACTION_FULL,
+    "archive": ACTION_LOW,
+    "image": ACTION_LOW,
+    "media": ACTION_HEADER,
+    "text": ACTION_FULL,
+    "data": ACTION_FULL,
+    "empty": ACTION_FULL,
+}
+
+# Scripts sem shebang só são reconhecidos pela extensão (e conteúdo textual)
+SCRIPT_EXTENSIONS = frozenset((
+    ".sh", ".bash", ".py", ".pl", ".rb", ".php", ".ps1", ".psm1", ".bat", ".cmd",
+    ".vbs", ".vbe", ".js", ".jse", ".wsf", ".hta", ".lua", ".applescript",
+))
+
+# (offset, magic, tipo), conferidos em ordem
+_MAGIC = (
+    (0, b"\x7fELF", "elf"),
+    (0, b"MZ", "pe"),
+    (0, b"\xfe\xed\xfa\xce", "macho"),
+    (0, b"\xfe\xed\xfa\xcf", "macho"),
+    (0, b"\xce\xfa\xed\xfe", "macho"),
+    (0, b"\xcf\xfa\xed\xfe", "macho"),
+    (0, b"#!", "script"),
+    (0, b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", "office"),
+    (0, b"%PDF-", "pdf"),
+    (0, b"PK\x03\x04", "zip"),
+    (0, b"PK\x05\x06", "zip"),
+    (0, b"\x1f\x8b", "archive"),
+    (0, b"BZh", "archive"),
+    (0, b"\xfd7zXZ\x00", "archive"),
+    (0, b"7z\xbc\xaf\x27\x1c", "archive"),
+    (0, b"Rar!\x1a\x07", "archive"),
+    (0, b"\x28\xb5\x2f\xfd", "archive"),
+    (257, b"ustar", "archive"),
+    (0, b"\x89PNG\r\n\x1a\n", "image"),
+    (0, b"\xff\xd8\xff", "image"),
+    (0, b"GIF87a", "image"),
+    (0, b"GIF89a", "image"),
+    (0, b"ID3", "media"),
+    (0, b"OggS", "media"),
+    (0, b"fLaC", "media"),
+    (0, b"\x1a\x45\xdf\xa3", "media"),
+    (4, b"ftyp", "media"),
+)
+
+_RIFF_TYPES = {b"WEBP": "image", b"AVI ": "media", b"WAVE": "media"}
+_TEXT_BYTES = frozenset(range(0x20, 0x7f)) | frozenset(b"\t\n\r\f\b\x1b")
+
+
+def sniff(header, path=""):
+    if not header:
+        return "empty"
+    if header[:4] == b"\xca\xfe\xba\xbe":
+        # Mesmo magic: binário universal Mach-O (poucas arquiteturas) ou classe Java (versão >= 45)
+        return "java" if int.from_bytes(header[4:8], "big") >= 45 else "macho"
+    for offset, magic, file_type in _MAGIC:
+        if header[offset:offset + len(magic)] == magic:
+            if file_type == "zip" and b"[Content_Types].xml" in header:
+                return "office"  # OOXML (docx, xlsx, pptx)
+            return file_type
+    if header[:4] == b"RIFF" and header[8:12] in _RIFF_TYPES:
+        return _RIFF_TYPES[header[8:12]]
+    if _is_text(header):
+        if os.path.splitext(path)[1].lower() in SCRIPT_EXTENSIONS:
+            return "script"
+        return "text"
+    return "data"
+
+
+def _is_text(header):
+    if b"\x00" in header:
+        return False
+    try:
+        header.decode("utf-8")
+    except UnicodeDecodeError as e:
+        if e.start < len(header) - 3:  # Só um caractere multibyte cortado no fim é aceito
+            return sum(b in _TEXT_BYTES for b in header) >= len(header) * 0.95
+    return True
+
+
+def parse_policies(items):
+    # ["media=skip", "archive=full"] -> {"media": "skip", "archive": "full"}
+    policies = {}
+    for item in items:
+        file_type, sep, action = item.partition("=")
+        file_type, action = file_type.strip().lower(), action.strip().lower()
+        if not sep or file_type not in FILE_TYPES:
+            raise ValueError(f"Tipo de arquivo desconhecido em '{item}' (tipos: {', '.join(FILE_TYPES)})")
+        if action not in ACTIONS:
+            raise ValueError(f"Ação desconhecida em '{item}' (ações: {', '.join(ACTIONS)})")
+        policies[file_type] = action
+    return policies
+
+
+class FileTypePolicy:
+    # Lê os primeiros SNIFF_SIZE bytes, classifica e devolve (prioridade, (tipo, ação, cabeçalho))
+    def __init__(self, policies=None, sniff_size=SNIFF_SIZE):
+        self.policies = dict(DEFAULT_POLICIES, **(policies or {}))
+        for file_type, action in self.policies.items():
+            if action not in ACTIONS:
+                raise ValueError(f"Ação desconhecida para {file_type}: {action}")
+        self.sniff_size = sniff_size
+
+    def action(self, file_type):
+        return self.policies.get(file_type, ACTION_FULL)
+
+    def classify(self, file_path):
+        with open(file_path, "rb", buffering=0) as f:
+            header = f.read(self.sniff_size)
+        file_type = sniff(header, file_path)
+        action = self.action(file_type)
+        if action != ACTION_HEADER:
+            header = None  # Não fica retido na fila à toa
+        return PRIORITIES[action], (file_type, action, header)
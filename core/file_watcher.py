@@ -0,0 +1,332 @@
+import os
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+import logging
+import platform
+import threading
+from core.walker import DirectoryWalker
+
+# inotify(7)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+INOTIFY_EVENT = struct.Struct("iIII")
+
+# fanotify(7)
+FAN_CLOSE_WRITE = 0x00000008
+FAN_Q_OVERFLOW = 0x00004000
+FAN_CLASS_NOTIF = 0x00000000
+FAN_CLOEXEC = 0x00000001
+FAN_NONBLOCK = 0x00000002
+FAN_MARK_ADD = 0x00000001
+FAN_MARK_MOUNT = 0x00000010
+FAN_NOFD = -1
+AT_FDCWD = -100
+FANOTIFY_EVENT = struct.Struct("IBBHQii")
+
+DEFAULT_DEBOUNCE = 1.0  # Segundos sem eventos antes de disparar o lote
+DEFAULT_MAX_DELAY = 10.0  # Limite de espera durante rajadas contínuas
+DEFAULT_RESCAN_INTERVAL = 600.0  # Reescaneamento das subárvores sem watch
+
+_libc = None
+
+
+def _get_libc():
+    global _libc
+    if _libc is None:
+        _libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        _libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        _libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        _libc.fanotify_mark.argtypes = [ctypes.c_int, ctypes.c_uint, ctypes.c_uint64, ctypes.c_int, ctypes.c_char_p]
+    return _libc
+
+
+def is_supported():
+    return platform.system() == "Linux"
+
+
+class FileWatcher:
+    # Monitoramento em tempo real: inotify recursivo (ou fanotify por ponto de montagem quando root),
+    # com eventos agrupados em lotes e entregues a on_paths(lista de caminhos)
+    def __init__(self, roots, on_paths, debounce=DEFAULT_DEBOUNCE, max_delay=DEFAULT_MAX_DELAY,
+                 rescan_interval=DEFAULT_RESCAN_INTERVAL, walk_options=None, use_fanotify=None):
+        self.roots = [os.path.abspath(r) for r in roots]
+        self.on_paths = on_paths
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.rescan_interval = rescan_interval
+        self.walk_options = walk_options or {}
+        # Mesmos filtros da travessia (exclude_paths, globs, max_depth, same_filesystem) para cada evento
+        self.scopes = sorted((DirectoryWalker(r, **self.walk_options) for r in self.roots), key=lambda w: len(w.root),
+                             reverse=True)
+        if use_fanotify is None:
+            use_fanotify = hasattr(os, "geteuid") and os.geteuid() == 0
+        self.use_fanotify = use_fanotify
+        self.stop_event = threading.Event()
+        self.fd = None
+        self.mode = None
+        self.watches = {}  # wd -> diretório
+        self.unwatched = set()  # Subárvores sem watch (limite do kernel atingido)
+        self.pending_files = set()
+        self.pending_dirs = set()
+        self.first_event = None
+        self.last_event = None
+        self.last_rescan = time.monotonic()
+        self.events = 0
+        self.batches = 0
+
+    def stop(self):
+        self.stop_event.set()
+
+    def _excluded(self, path):
+        for scope in self.scopes:
+            if path == scope.root or path.startswith(scope.root.rstrip(os.sep) + os.sep):
+                return scope.excludes(path)
+        return True  # Fora das raízes (fanotify marca o ponto de montagem inteiro)
+
+    # --- inotify ---
+
+    def _init_inotify(self):
+        libc = _get_libc()
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 falhou")
+        self.fd = fd
+        self.mode = "inotify"
+        for root in self.roots:
+            self._watch_tree(root)
+
+    def _add_watch(self, directory):
+        wd = _get_libc().inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            return ctypes.get_errno()
+        self.watches[wd] = directory
+        return 0
+
+    def _watch_tree(self, directory):
+        def visit(path):
+            if self.stop_event.is_set() or self._excluded(path):
+                return False
+            err = self._add_watch(path)
+            if err in (errno.ENOSPC, errno.ENOMEM):
+                if not self.unwatched:
+                    logging.warning("Limite de watches do inotify atingido (fs.inotify.max_user_watches); "
+                                    "subárvores restantes serão reescaneadas periodicamente")
+                self.unwatched.add(path)
+                return False
+            if err:
+                logging.warning(f"Não foi possível monitorar {path}: {os.strerror(err)}")
+                return False
+            return True
+
+        DirectoryWalker(directory, **self.walk_options).visit_directories(visit, self.stop_event.is_set)
+
+    def _unwatch_tree(self, directory):
+        # Diretório renomeado ou movido: os watches dele e dos descendentes apontam para caminhos que não
+        # existem mais. Saem todos; o destino (se estiver sob uma raiz) é monitorado de novo pelo IN_MOVED_TO
+        prefix = directory.rstrip(os.sep) + os.sep
+        libc = _get_libc()
+        for wd, path in list(self.watches.items()):
+            if path == directory or path.startswith(prefix):
+                del self.watches[wd]
+                libc.inotify_rm_watch(self.fd, wd)
+        self.unwatched = {p for p in self.unwatched if p != directory and not p.startswith(prefix)}
+        self.pending_dirs = {p for p in self.pending_dirs if p != directory and not p.startswith(prefix)}
+        self.pending_files = {p for p in self.pending_files if not p.startswith(prefix)}
+
+    def _read_inotify(self):
+        while True:
+            try:
+                data = os.read(self.fd, 256 * 1024)
+            except BlockingIOError:
+                return
+            if not data:
+                return
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+                name = data[offset + INOTIFY_EVENT.size:offset + INOTIFY_EVENT.size + length].rstrip(b"\0")
+                offset += INOTIFY_EVENT.size + length
+                self._handle_inotify(wd, mask, os.fsdecode(name))
+
+    def _handle_inotify(self, wd, mask, name):
+        if mask & IN_Q_OVERFLOW:
+            logging.warning("Fila do inotify estourou; reescaneando as raízes")
+            self._queue_dir(*self.roots)
+            return
+        if mask & IN_IGNORED:
+            self.watches.pop(wd, None)
+            return
+        directory = self.watches.get(wd)
+        if directory is None:
+            return
+        if mask & (IN_MOVE_SELF | IN_DELETE_SELF):
+            # Subdiretórios já saíram no IN_MOVED_FROM do pai; aqui sobram as raízes (o pai não é monitorado)
+            if directory in self.roots:
+                logging.warning(f"Raiz do monitor {'movida' if mask & IN_MOVE_SELF else 'removida'}: {directory}")
+            if mask & IN_MOVE_SELF:
+                self._unwatch_tree(directory)
+            return
+        if not name:
+            return
+        path = os.path.join(directory, name)
+        if mask & IN_ISDIR and mask & IN_MOVED_FROM:
+            self._unwatch_tree(path)
+            return
+        if self._excluded(path):
+            return
+        if mask & IN_ISDIR:
+            if mask & (IN_CREATE | IN_MOVED_TO):
+                # Diretório novo: monitora e escaneia o que já tiver sido criado antes do watch
+                self._watch_tree(path)
+                self._queue_dir(path)
+        elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE):
+            # IN_CREATE: link() cria o arquivo já com conteúdo e sem IN_CLOSE_WRITE. Num arquivo novo em
+            # gravação, o IN_CLOSE_WRITE seguinte cai no mesmo lote ou reenfileira o arquivo
+            self._queue_file(path)
+
+    # --- fanotify ---
+
+    def _init_fanotify(self):
+        libc = _get_libc()
+        fd = libc.fanotify_init(FAN_CLASS_NOTIF | FAN_CLOEXEC | FAN_NONBLOCK, os.O_RDONLY | os.O_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "fanotify_init falhou")
+        self.fd = fd
+        # Uma marca por ponto de montagem cobre a árvore inteira, sem limite de watches.
+        # Sem FAN_REPORT_FID não há eventos de renomeação: cobrimos gravações (close_write).
+        for root in self.roots:
+            if libc.fanotify_mark(fd, FAN_MARK_ADD | FAN_MARK_MOUNT, FAN_CLOSE_WRITE, AT_FDCWD,
+                                  os.fsencode(root)) < 0:
+                err = ctypes.get_errno()
+                os.close(fd)
+                self.fd = None
+                raise OSError(err, f"fanotify_mark falhou em {root}")
+        self.mode = "fanotify"
+        logging.info("fanotify só informa gravações (close_write): arquivos renomeados ou movidos para dentro das "
+                     "raízes e hard links novos não são escaneados até o próximo escaneamento completo")
+
+    def _read_fanotify(self):
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return
+            if not data:
+                return
+            offset = 0
+            while offset + FANOTIFY_EVENT.size <= len(data):
+                event_len, _, _, _, mask, fd, _ = FANOTIFY_EVENT.unpack_from(data, offset)
+                offset += event_len or FANOTIFY_EVENT.size
+                if mask & FAN_Q_OVERFLOW:
+                    self._queue_dir(*self.roots)
+                if fd == FAN_NOFD or fd < 0:
+                    continue
+                try:
+                    path = os.readlink(f"/proc/self/fd/{fd}")
+                except OSError:
+                    continue
+                finally:
+                    os.close(fd)
+                if not self._excluded(path):
+                    self._queue_file(path)
+
+    # --- agrupamento ---
+
+    def _touch(self):
+        now = time.monotonic()
+        self.events += 1
+        if self.first_event is None:
+            self.first_event = now
+        self.last_event = now
+
+    def _queue_file(self, path):
+        self.pending_files.add(path)
+        self._touch()
+
+    def _queue_dir(self, *paths):
+        self.pending_dirs.update(paths)
+        self._touch()
+
+    def _covered(self, path):
+        # Arquivo dentro de um diretório que já será reescaneado inteiro
+        parent = os.path.dirname(path)
+        while parent and parent not in self.pending_dirs:
+            up = os.path.dirname(parent)
+            if up == parent:
+                return False
+            parent = up
+        return bool(parent)
+
+    def _flush(self):
+        dirs = sorted(self.pending_dirs)
+        # Subdiretórios de um diretório pendente também são redundantes
+        collapsed = []
+        for d in dirs:
+            if not collapsed or not (d == collapsed[-1] or d.startswith(collapsed[-1].rstrip(os.sep) + os.sep)):
+                collapsed.append(d)
+        self.pending_dirs = set(collapsed)
+        files = [f for f in self.pending_files if not self._covered(f)]
+        paths = collapsed + sorted(files)
+        self.pending_files = set()
+        self.pending_dirs = set()
+        self.first_event = self.last_event = None
+        if paths:
+            self.batches += 1
+            logging.info(f"Monitor: lote com {len(paths)} caminhos")
+            self.on_paths(paths)
+
+    def _due(self, now):
+        if self.first_event is None:
+            return False
+        return now - self.last_event >= self.debounce or now - self.first_event >= self.max_delay
+
+    def run(self):
+        if not is_supported():
+            raise OSError(errno.ENOSYS, "Monitoramento em tempo real disponível apenas no Linux")
+        if self.use_fanotify:
+            try:
+                self._init_fanotify()
+            except OSError as e:
+                logging.warning(f"fanotify indisponível ({str(e)}); usando inotify")
+        if self.fd is None:
+            self._init_inotify()
+        logging.info(f"Monitor ativo ({self.mode}) em {', '.join(self.roots)}: {len(self.watches)} watches, "
+                     f"{len(self.unwatched)} subárvores em reescaneamento periódico")
+        poller = select.poll()
+        poller.register(self.fd, select.POLLIN)
+        try:
+            while not self.stop_event.is_set():
+                now = time.monotonic()
+                timeout = 0.5
+                if self.first_event is not None:
+                    timeout = max(0.0, min(timeout, self.last_event + self.debounce - now,
+                                           self.first_event + self.max_delay - now))
+                if poller.poll(timeout * 1000):
+                    if self.mode == "fanotify":
+                        self._read_fanotify()
+                    else:
+                        self._read_inotify()
+                now = time.monotonic()
+                if self.unwatched and now - self.last_rescan >= self.rescan_interval:
+                    self.last_rescan = now
+                    self._queue_dir(*self.unwatched)
+                if self._due(now):
+                    self._flush()
+        finally:
+            os.close(self.fd)
+            self.fd = None
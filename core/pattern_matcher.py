@@ -0,0 +1,206 @@
+import re
+import hashlib
+from array import array
+from collections import deque
+
+try:
+    import numpy as np
+except ImportError:  # Opcional: sem NumPy os candidatos saem só da expressão regular (mais lenta com muitos padrões)
+    np = None
+
+PREFIX_BYTES = 4  # Padrões com ao menos esse tamanho passam pelo filtro vetorizado (os menores, pela regex)
+LONG_PREFIX_BYTES = 8  # Até esse tamanho o filtro confere o padrão inteiro; acima, os 8 primeiros bytes
+FILTER_BITS = 22  # Tabela do filtro (4 MB); colisões são descartadas pela comparação exata do prefixo
+HASH_MULTIPLIER = 2654435761  # Hash multiplicativo (Knuth) do prefixo de 4 bytes
+
+
+def _alternation(patterns):
+    # Uma alternância só, fatorada como trie: casa onde algum padrão começa (o resto é conferido pelo autômato)
+    trie = {}
+    for p in patterns:
+        node = trie
+        for byte in p:
+            node = node.setdefault(byte, {})
+        node[None] = True
+
+    def build(node):
+        if None in node:
+            return b""
+        branches = [re.escape(bytes([byte])) + build(child) for byte, child in sorted(node.items())]
+        return branches[0] if len(branches) == 1 else b"(?:" + b"|".join(branches) + b")"
+    return re.compile(build(trie), re.DOTALL)
+
+
+class PatternMatcher:
+    # Autômato Aho-Corasick com tabela de transição plana (estado * 256 + byte)
+    def __init__(self, patterns):
+        self.patterns = []
+        for p in patterns:
+            p = p.encode("utf-8") if isinstance(p, str) else bytes(p)
+            if p and p not in self.patterns:
+                self.patterns.append(p)
+        self.version = hashlib.sha256(b"\0".join(sorted(self.patterns))).hexdigest()[:16]
+        self._build()
+
+    def _build(self):
+        goto = [{}]
+        outputs = [set()]
+        depth = [0]
+        for index, pattern in enumerate(self.patterns):
+            state = 0
+            for byte in pattern:
+                nxt = goto[state].get(byte)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][byte] = nxt
+                    goto.append({})
+                    outputs.append(set())
+                    depth.append(depth[state] + 1)
+                state = nxt
+            outputs[state].add(index)
+        nstates = len(goto)
+        delta = array("i", bytes(4 * 256 * nstates))
+        fail = [0] * nstates
+        queue = deque()
+        for byte, child in goto[0].items():
+            delta[byte] = child
+            queue.append(child)
+        # BFS: cada linha começa como cópia da linha do estado de falha
+        while queue:
+            state = queue.popleft()
+            f = fail[state]
+            row = state << 8
+            delta[row:row + 256] = delta[f << 8:(f << 8) + 256]
+            outputs[state] |= outputs[f]
+            for byte, child in goto[state].items():
+                fail[child] = delta[(f << 8) | byte] if state else 0
+                delta[row | byte] = child
+                queue.append(child)
+        self.delta = delta
+        self.outputs = [tuple(sorted(o)) for o in outputs]
+        self.terminal = bytearray(1 if o else 0 for o in outputs)
+        self.state_count = nstates
+        self.depth = array("i", depth)
+        self.max_length = max(depth)
+        # Candidatos: filtro de prefixos em NumPy (custo por byte independe da quantidade de padrões) e, para os
+        # padrões curtos ou sem NumPy, a alternância compilada. O autômato só roda a partir de cada candidato
+        vectorized = [p for p in self.patterns if len(p) >= PREFIX_BYTES] if np is not None else []
+        rest = [p for p in self.patterns if np is None or len(p) < PREFIX_BYTES]
+        self.prefix_table = None
+        if vectorized:
+            self.prefix_table = np.zeros(1 << FILTER_BITS, dtype=bool)
+            self.prefix_table[_prefix_hash(_prefix_array(vectorized, PREFIX_BYTES, np.uint32))] = True
+            # Conferência exata em C: cada tamanho compara a janela de 8 bytes com máscara
+            self.prefix_sets = []
+            for width in range(PREFIX_BYTES, LONG_PREFIX_BYTES + 1):
+                group = [p for p in vectorized if min(len(p), LONG_PREFIX_BYTES) == width]
+                if group:
+                    self.prefix_sets.append((np.uint64((1 << 8 * width) - 1),
+                                             _prefix_array(group, width, np.uint64)))
+        self.start_re = _alternation(rest) if rest else None
+
+    def __len__(self):
+        return len(self.patterns)
+
+    def stream(self, first_only=True):
+        return MatchStream(self, first_only)
+
+    def candidates(self, data, limit):
+        # Posições < limit onde algum padrão pode começar, em ordem crescente
+        found = []
+        n = len(data)
+        if self.prefix_table is not None:
+            for offset in range(PREFIX_BYTES):
+                count = (n - offset) // PREFIX_BYTES
+                if count <= 0:
+                    break
+                # Janelas nas posições offset, offset+4, ...: quatro leituras cobrem todas as posições
+                words = np.frombuffer(data, dtype="<u4", count=count, offset=offset)
+                hits = np.flatnonzero(self.prefix_table[_prefix_hash(words)])
+                if not len(hits):
+                    continue
+                # Os 4 bytes seguintes são a próxima janela da mesma leitura; a última janela fica para o autômato
+                following = words[np.minimum(hits + 1, count - 1)].astype(np.uint64)
+                long_words = words[hits].astype(np.uint64) | (following << np.uint64(32))
+                keep = hits + 1 >= count
+                for mask, values in self.prefix_sets:
+                    keep |= _member(long_words & mask, values)
+                found.append(hits[keep] * PREFIX_BYTES + offset)
+        if found:
+            positions = np.concatenate(found)
+            positions.sort()
+            found = positions[positions < limit].tolist()
+        if self.start_re is not None:
+            pos = 0
+            while True:
+                hit = self.start_re.search(data, pos)
+                if hit is None or hit.start() >= limit:
+                    break
+                found.append(hit.start())
+                pos = hit.start() + 1
+            if self.prefix_table is not None:
+                found.sort()
+        return found
+
+    def search(self, data):
+        stream = self.stream(first_only=False)
+        stream.update(data)
+        return stream.matched_patterns()
+
+
+def _prefix_array(patterns, width, dtype):
+    return np.array(sorted({int.from_bytes(p[:width], "little") for p in patterns}), dtype=dtype)
+
+
+def _prefix_hash(words):
+    return (words * np.uint32(HASH_MULTIPLIER)) >> np.uint32(32 - FILTER_BITS)
+
+
+def _member(values, table):
+    # Busca binária na tabela ordenada (mais barata que np.isin para poucos candidatos)
+    if not len(table):
+        return np.zeros(len(values), dtype=bool)
+    return table[np.minimum(np.searchsorted(table, values), len(table) - 1)] == values
+
+
+class MatchStream:
+    # Guarda os últimos max_length-1 bytes: padrões que cruzam a fronteira entre chunks também casam
+    def __init__(self, matcher, first_only=True):
+        self.matcher = matcher
+        self.first_only = first_only
+        self.tail = b""
+        self.matches = set()
+        self.done = not matcher.patterns
+
+    def update(self, data):
+        if self.done:
+            return
+        keep = self.matcher.max_length - 1
+        if self.tail:
+            # Só os padrões que começam na cauda: os demais aparecem na varredura do próprio chunk
+            self._scan(self.tail + bytes(data[:keep]), len(self.tail))
+            if self.done:
+                return
+        self._scan(data, len(data))
+        if keep:
+            self.tail = bytes(data[-keep:]) if len(data) >= keep else (self.tail + bytes(data))[-keep:]
+
+    def _scan(self, data, limit):
+        m = self.matcher
+        delta, depth, terminal, outputs = m.delta, m.depth, m.terminal, m.outputs
+        n = len(data)
+        for start in m.candidates(data, limit):
+            # Percorre só a trie a partir do candidato: sai na primeira transição de falha
+            state = 0
+            for i in range(start, min(start + m.max_length, n)):
+                state = delta[(state << 8) | data[i]]
+                if depth[state] != i - start + 1:
+                    break
+                if terminal[state]:
+                    self.matches.update(outputs[state])
+                    if self.first_only:
+                        self.done = True
+                        return
+
+    def matched_patterns(self):
+        return [self.matcher.patterns[i] for i in sorted(self.matches)]
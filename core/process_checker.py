@@ -1,38 +1,146 @@
+import time
 import psutil
 import logging
+from core.process_table import ProcessTable, default_sampler
+from core import process_series
+from core.binary_checker import BinaryChecker
+from core.process_watcher import EVENT_EXEC, EVENT_EXIT, EVENT_RESYNC
+
+CPU_THRESHOLD = 80  # % de um núcleo
+MEMORY_THRESHOLD = 50  # % da memória total
+
 
 class ProcessAnalyzer:
-    def __init__(self):
-        self.last_processes = {}
+    def __init__(self, sampler=None, window=process_series.DEFAULT_WINDOW, binary_checker=None):
+        # Tabela persistente por (pid, create_time): a cada tick só entram os novos e saem os encerrados
+        self.table = ProcessTable()
+        # Com NumPy: histórico por processo e pontuação por EWMA/z-score/duração no lugar dos limites instantâneos
+        self.series = process_series.ProcessSeries(window) if process_series.available() else None
+        if self.series is None:
+            logging.info("NumPy não instalado: processos avaliados só pelos limites instantâneos")
+        # /proc no Linux, psutil nas outras plataformas; io e descritores só interessam às séries
+        self.sampler = sampler or default_sampler(extended=self.series is not None)
+        # Linux: executável e bibliotecas de cada processo conferidos com a base de assinaturas do scanner
+        self.binaries = binary_checker
+        if self.binaries is None and BinaryChecker.available():
+            self.binaries = BinaryChecker()
         self.suspicious_names = ["keylogger", "malware", "botnet", "stealer"]
+        self.last_delta = {"new": 0, "exited": 0, "reused": 0}
+
+    @property
+    def processes(self):
+        return self.table.slots
+
+    def refresh(self):
+        self.last_delta = self.table.refresh(self.sampler)
+        return self.last_delta
 
     def detect_suspicious(self):
         suspicious = []
         try:
-            for proc in psutil.process_iter(['pid', 'name', 'username', 'cpu_percent', 'memory_percent']):
-                info = proc.info
-                if not info.get('username'):
-                    continue
-                pid = info['pid']
-                name = info['name'].lower() if info['name'] else ""
-                # Heurísticas
-                if any(term in name for term in self.suspicious_names):
-                    info['suspeito'] = True
-                elif info['cpu_percent'] > 80 or info['memory_percent'] > 50:
-                    info['suspeito'] = True
-                    logging.warning(f"Suspeito (recursos): {name}, PID: {pid}")
-                else:
-                    info['suspeito'] = False
-                if info['suspeito']:
+            start = time.monotonic()
+            self.refresh()
+            table = self.table
+            reasons = self.series.update(table) if self.series is not None else None
+            matches = self.binaries.check(table) if self.binaries is not None else {}
+            for pid, slot in table.slots.items():
+                info = self._evaluate(pid, slot, reasons, matches)
+                if info is not None:
                     suspicious.append(info)
-                self.last_processes[pid] = info
+            logging.debug(f"Processos: {len(table)} na tabela, {self.last_delta['new']} novos, "
+                          f"{self.last_delta['exited']} encerrados, {self.last_delta['reused']} pids reutilizados "
+                          f"({(time.monotonic() - start) * 1000:.1f} ms)")
         except Exception as e:
             logging.error(f"Process detect error: {str(e)}")
         return suspicious
 
+    def apply_events(self, events):
+        # Lote do ProcessWatcher: só os pids dos eventos são lidos, sem passada completa. Devolve os que
+        # passaram a ser suspeitos, inclusive processos que já terminaram (pelo nome e executável do exec)
+        table = self.table
+        suspicious = []
+        try:
+            if any(kind == EVENT_RESYNC for kind, _, _ in events):
+                flagged = {pid for pid, slot in table.slots.items() if table.flagged[slot]}
+                return [p for p in self.detect_suspicious() if p['pid'] not in flagged]
+            latest = {}  # pid -> (último evento, detalhe do exec)
+            for kind, pid, detail in events:
+                latest[pid] = (kind, detail or latest.get(pid, (None, None))[1])
+            sampled = []
+            now = time.monotonic()
+            for pid, (kind, detail) in latest.items():
+                if kind != EVENT_EXIT and table.sample(self.sampler, pid, now) is not None:
+                    if kind == EVENT_EXEC and self.binaries is not None:
+                        self.binaries.invalidate(pid)
+                    sampled.append(pid)
+                    continue
+                if pid in table.slots:
+                    table.remove(pid)
+                if detail is not None:
+                    info = self._evaluate_exited(pid, *detail)
+                    if info is not None:
+                        suspicious.append(info)
+            matches = self.binaries.check(table) if sampled and self.binaries is not None else {}
+            for pid in sampled:
+                slot = table.slots.get(pid)
+                if slot is None or table.flagged[slot]:
+                    continue
+                info = self._evaluate(pid, slot, None, matches, resources=False)
+                if info is not None:
+                    suspicious.append(info)
+        except Exception as e:
+            logging.error(f"Process event error: {str(e)}")
+        return suspicious
+
+    def _evaluate(self, pid, slot, reasons, matches, resources=True):
+        # resources=False (eventos): só nome e assinatura; uso de recursos de um processo recém-criado não diz nada
+        table = self.table
+        username = table.username(slot)
+        if not username:
+            return None
+        name = table.name[slot].lower()
+        # Heurísticas; a primeira amostra só estabelece a base do uso de CPU
+        reason = ""
+        if any(term in name for term in self.suspicious_names):
+            reason = "nome"
+        elif pid in matches:
+            reason = "assinatura"
+        elif reasons is not None:
+            reason = process_series.describe(int(reasons[slot]))
+        elif resources and table.samples[slot] > 1 and (table.cpu[slot] > CPU_THRESHOLD or
+                                                          table.memory_percent(slot) > MEMORY_THRESHOLD):
+            reason = "recursos"
+        if reason and not table.flagged[slot]:
+            logging.warning(f"Suspeito ({reason}): {name}, PID: {pid}")
+        table.flagged[slot] = bool(reason)
+        if not reason:
+            return None
+        info = table.info(slot)
+        info['motivo'] = reason
+        if pid in matches:
+            info['arquivo'] = matches[pid]
+        return info
+
+    def _evaluate_exited(self, pid, name, exe):
+        # Processo de vida curta: terminou antes de ser amostrado, sobra o que o evento de exec registrou
+        reason = ""
+        if any(term in name.lower() for term in self.suspicious_names):
+            reason = "nome"
+        elif self.binaries is not None and self.binaries.check_file(exe):
+            reason = "assinatura"
+        if not reason:
+            return None
+        logging.warning(f"Suspeito ({reason}), já encerrado: {name}, PID: {pid}, {exe}")
+        return {'pid': pid, 'name': name, 'username': "", 'cmdline': "", 'cpu_percent': 0.0,
+                'memory_percent': 0.0, 'create_time': 0.0, 'suspeito': True, 'motivo': reason, 'arquivo': exe,
+                'encerrado': True}
+
     def terminate_process(self, pid):
         try:
             process = psutil.Process(pid)
+            slot = self.table.slots.get(pid)
+            if slot is not None and abs(process.create_time() - self.table.start[slot]) > 1:
+                raise psutil.NoSuchProcess(pid)  # O pid da lista agora é de outro processo
             process.terminate()
             process.wait(timeout=3)
         except psutil.NoSuchProcess:
@@ -41,4 +149,4 @@ class ProcessAnalyzer:
             process.kill()
             raise Exception("Process forcibly terminated")
         except Exception as e:
-            raise Exception(f"Error: {str(e)}")
\ No newline at end of file
+            raise Exception(f"Error: {str(e)}")
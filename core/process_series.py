@@ -0,0 +1,157 @@
+try:
+    import numpy as np
+except ImportError:  # Opcional: sem NumPy o ProcessAnalyzer volta aos limites instantâneos
+    np = None
+
+# Séries temporais por processo num anel de tamanho fixo: values[métrica, slot, posição], com os slots da
+# ProcessTable. Memória = capacidade x janela x métricas, independente de quanto tempo o monitor roda.
+# A cada tick tudo é pontuado de uma vez (NumPy): EWMA de média/variância, z-score da amostra nova contra a
+# própria história do processo e regra de duração (CPU alta durante toda a janela SUSTAINED_SECONDS).
+# Picos isolados (compilação, carga de banco) não marcam: o z-score precisa se manter por ANOMALY_STREAK
+# amostras e a CPU só conta pela duração.
+
+METRICS = ("cpu", "rss", "io", "fds", "threads")  # % de um núcleo, bytes, bytes/s, descritores, threads
+DEFAULT_WINDOW = 120  # Amostras guardadas por processo
+EWMA_ALPHA = 0.1
+OUTLIER_ALPHA = 0.01  # Amostras fora da curva mexem pouco na linha de base (um novo patamar é absorvido devagar)
+MIN_SAMPLES = 10  # Antes disso a EWMA ainda não representa o processo
+Z_THRESHOLD = 6.0
+ANOMALY_STREAK = 3  # Amostras seguidas acima de Z_THRESHOLD
+HIGH_MEMORY = 50.0  # Média EWMA de memória (% do total)
+SUSTAINED_CPU = 50.0
+SUSTAINED_SECONDS = 600.0
+# Desvio mínimo por métrica no z-score: variação pequena num processo estável não é anomalia
+STD_FLOOR = (5.0, 256 * 1024 * 1024, 1024 * 1024, 8.0, 4.0)
+
+REASON_SUSTAINED_CPU = 1
+REASON_HIGH_MEMORY = 2
+REASON_ANOMALY = 4
+REASON_NAMES = {
+    REASON_SUSTAINED_CPU: "CPU alta contínua",
+    REASON_HIGH_MEMORY: "memória alta",
+    REASON_ANOMALY: "comportamento anômalo",
+}
+
+
+def available():
+    return np is not None
+
+
+def describe(reasons):
+    return ", ".join(name for bit, name in REASON_NAMES.items() if reasons & bit)
+
+
+class ProcessSeries:
+    def __init__(self, window=DEFAULT_WINDOW, sustained_seconds=SUSTAINED_SECONDS):
+        self.window = window
+        self.sustained_seconds = sustained_seconds
+        self.capacity = 0
+        self.cursor = 0
+        self.times = np.zeros(window)  # Instante de cada posição do anel: todos os processos são amostrados juntos
+        self.values = np.zeros((len(METRICS), 0, window), dtype=np.float32)
+        self.mean = np.zeros((len(METRICS), 0))
+        self.var = np.zeros((len(METRICS), 0))
+        self.pid = np.zeros(0, dtype=np.int64)
+        self.start = np.zeros(0)
+        self.first = np.zeros(0)  # Primeira amostra do processo
+        self.count = np.zeros(0, dtype=np.int64)
+        self.zscore = np.zeros(0)  # Maior z-score da última amostra (sem a CPU)
+        self.streak = np.zeros(0, dtype=np.int64)  # Amostras seguidas com zscore acima do limite
+        self.reasons = np.zeros(0, dtype=np.uint8)
+        self.floor = np.array(STD_FLOOR)[:, None]
+
+    def _grow(self, capacity):
+        extra = capacity - self.capacity
+        self.values = np.concatenate(
+            (self.values, np.zeros((len(METRICS), extra, self.window), dtype=np.float32)), axis=1)
+        self.mean = np.concatenate((self.mean, np.zeros((len(METRICS), extra))), axis=1)
+        self.var = np.concatenate((self.var, np.zeros((len(METRICS), extra))), axis=1)
+        for name in ("pid", "start", "first", "count", "zscore", "streak", "reasons"):
+            column = getattr(self, name)
+            setattr(self, name, np.concatenate((column, np.zeros(extra, dtype=column.dtype))))
+        self.capacity = capacity
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.values, self.mean, self.var, self.pid, self.start, self.first,
+                                      self.count, self.zscore, self.streak, self.reasons, self.times))
+
+    def update(self, table):
+        # Registra a passada mais recente da ProcessTable e devolve os motivos (bits REASON_*) por slot
+        if table.capacity > self.capacity:
+            self._grow(table.capacity)
+        now = table.last_refresh
+        # Visões sem cópia sobre os array.array da tabela (recriadas a cada tick: a tabela pode ter crescido)
+        pid = np.frombuffer(table.pid, dtype=np.int64)
+        start = np.frombuffer(table.start)
+        active = (pid != 0) & (np.frombuffer(table.sampled) == now)
+        cap = table.capacity
+        x = np.stack((np.frombuffer(table.cpu), np.frombuffer(table.rss, dtype=np.int64),
+                      np.frombuffer(table.io_rate), np.frombuffer(table.fds, dtype=np.int64),
+                      np.frombuffer(table.threads, dtype=np.int64))).astype(np.float64)
+
+        # Slot ocupado por outro processo (novo ou pid reutilizado): história zerada
+        reset = active & ((pid != self.pid[:cap]) | (start != self.start[:cap]))
+        if reset.any():
+            self.pid[:cap][reset] = pid[reset]
+            self.start[:cap][reset] = start[reset]
+            self.first[:cap][reset] = now
+            self.count[:cap][reset] = 0
+            self.streak[:cap][reset] = 0
+            self.values[:, :cap][:, reset] = 0
+            self.mean[:, :cap][:, reset] = x[:, reset]
+            self.var[:, :cap][:, reset] = 0
+        self.count[:cap][~active] = 0  # Slots livres
+
+        mean, var = self.mean[:, :cap], self.var[:, :cap]
+        delta = x - mean
+        z = delta / np.maximum(np.sqrt(var), self.floor)
+        alpha = np.where(z > Z_THRESHOLD, OUTLIER_ALPHA, EWMA_ALPHA) * active  # Slot inativo: alpha 0
+        mean += alpha * delta
+        var *= 1 - alpha
+        var += (1 - alpha) * alpha * delta * delta
+
+        c = self.cursor
+        self.values[:, :cap, c] = x
+        self.times[c] = now
+        self.cursor = (c + 1) % self.window
+        count = self.count[:cap]
+        count += active
+        warm = count > MIN_SAMPLES
+
+        zscore = np.where(warm, z[1:].max(axis=0), 0.0)
+        self.zscore[:cap] = zscore
+        streak = self.streak[:cap]
+        streak[:] = np.where(zscore > Z_THRESHOLD, streak + 1, 0)
+        reasons = np.zeros(cap, dtype=np.uint8)
+        reasons |= np.where(streak >= ANOMALY_STREAK, REASON_ANOMALY, 0).astype(np.uint8)
+        if table.total_memory:
+            memory = mean[1] * 100.0 / table.total_memory
+            reasons |= np.where(warm & (memory > HIGH_MEMORY), REASON_HIGH_MEMORY, 0).astype(np.uint8)
+        reasons |= np.where(self._sustained(cap, now), REASON_SUSTAINED_CPU, 0).astype(np.uint8)
+        reasons[~active] = 0
+        self.reasons[:cap] = reasons
+        return reasons
+
+    def _sustained(self, cap, now):
+        # CPU acima de SUSTAINED_CPU em todas as amostras dos últimos sustained_seconds (ou do anel inteiro,
+        # se ele cobrir menos tempo), para processos que existem desde antes do início desse período
+        recorded = self.times > 0
+        if not recorded.any():
+            return np.zeros(cap, dtype=bool)
+        oldest = self.times[recorded].min()
+        if not recorded.all() and now - oldest < self.sustained_seconds:
+            return np.zeros(cap, dtype=bool)  # Monitor ainda sem história suficiente
+        since = max(now - self.sustained_seconds, oldest)
+        in_window = recorded & (self.times >= since)
+        if in_window.sum() < 2:
+            return np.zeros(cap, dtype=bool)
+        cpu = self.values[0, :cap][:, in_window]
+        # first < since: a primeira amostra (só a base do uso de CPU, sempre 0) fica fora da janela
+        return (self.first[:cap] < since) & (cpu > SUSTAINED_CPU).all(axis=1)
+
+    def history(self, slot, metric="cpu"):
+        # Amostras do slot em ordem cronológica (mais antiga primeiro)
+        n = min(int(self.count[slot]), self.window)
+        order = (np.arange(self.window) + self.cursor) % self.window
+        return self.values[METRICS.index(metric), slot][order][-n:] if n else self.values[0, slot][:0]
@@ -0,0 +1,329 @@
+import os
+import time
+import array
+import logging
+import platform
+
+try:
+    import pwd
+except ImportError:  # Windows: o dono vem como nome (psutil.Process.username)
+    pwd = None
+
+# Tabela de processos por slot: colunas em arrays pré-alocados (array.array), slots reaproveitados por uma
+# lista livre; pid -> slot no dicionário. Chave de identidade (pid, start): start diferente no mesmo pid
+# é outro processo. Quem lê os dados é um sampler: ProcFsSampler (Linux, direto do /proc) ou PsutilSampler.
+
+PROC_ROOT = "/proc"
+INITIAL_CAPACITY = 1024  # Dobra quando enche
+STAT_SIZE = 4096  # /proc/[pid]/stat cabe com folga
+CMDLINE_SIZE = 4096  # Linhas de comando maiores são truncadas
+
+_INT_COLUMNS = ("pid", "rss", "threads", "samples", "flagged", "io", "fds")
+_FLOAT_COLUMNS = ("start", "cpu_time", "sampled", "cpu", "io_rate")
+_OBJECT_COLUMNS = ("name", "cmdline", "owner", "handle")
+
+
+class ProcessTable:
+    def __init__(self, capacity=INITIAL_CAPACITY):
+        self.slots = {}  # pid -> slot
+        self.free = []
+        self.capacity = 0
+        self.total_memory = 0
+        self.last_refresh = 0.0  # Instante (monotonic) da última passada; sampled[slot] igual = amostrado nela
+        self.users = {}  # uid -> nome
+        for column in _INT_COLUMNS:
+            setattr(self, column, array.array("q"))
+        for column in _FLOAT_COLUMNS:
+            setattr(self, column, array.array("d"))
+        for column in _OBJECT_COLUMNS:
+            setattr(self, column, [])
+        self._grow(capacity)
+
+    def __len__(self):
+        return len(self.slots)
+
+    def _grow(self, capacity):
+        extra = capacity - self.capacity
+        for column in _INT_COLUMNS + _FLOAT_COLUMNS:
+            values = getattr(self, column)
+            values.frombytes(bytes(extra * values.itemsize))
+        for column in _OBJECT_COLUMNS:
+            getattr(self, column).extend([None] * extra)
+        self.free.extend(range(capacity - 1, self.capacity - 1, -1))  # pop() devolve o menor slot livre
+        self.capacity = capacity
+
+    def add(self, pid, start):
+        if not self.free:
+            self._grow(self.capacity * 2)
+        slot = self.free.pop()
+        self.slots[pid] = slot
+        self.pid[slot] = pid
+        self.start[slot] = start
+        self.cpu_time[slot] = self.sampled[slot] = self.cpu[slot] = self.io_rate[slot] = 0.0
+        self.rss[slot] = self.threads[slot] = self.samples[slot] = self.flagged[slot] = self.io[slot] = 0
+        self.fds[slot] = 0
+        self.name[slot] = self.cmdline[slot] = ""
+        self.owner[slot] = self.handle[slot] = None
+        return slot
+
+    def remove(self, pid):
+        slot = self.slots.pop(pid)
+        self.pid[slot] = 0
+        self.handle[slot] = None  # Libera o psutil.Process
+        self.free.append(slot)
+
+    def refresh(self, sampler):
+        # Uma passada incremental: pids que sumiram saem, novos e reutilizados entram, o resto é amostrado.
+        # Devolve {"new", "exited", "reused"}
+        now = time.monotonic()
+        self.last_refresh = now
+        pids = sampler.pids()
+        current = set(pids)
+        exited = [pid for pid in self.slots if pid not in current]
+        for pid in exited:
+            self.remove(pid)
+        new = reused = 0
+        for pid in pids:
+            status = self.sample(sampler, pid, now)
+            if status == "new":
+                new += 1
+            elif status == "reused":
+                reused += 1
+        return {"new": new, "exited": len(exited), "reused": reused}
+
+    def sample(self, sampler, pid, now=None):
+        # Lê um pid só (passadas completas ou eventos de processo). Devolve "new", "reused", "" (já estava
+        # na tabela) ou None (encerrou ou sem permissão)
+        if now is None:
+            now = time.monotonic()
+        self.total_memory = self.total_memory or sampler.total_memory()
+        slot = self.slots.get(pid)
+        sample = sampler.read(self, pid, slot)
+        if sample is None:
+            if slot is not None:
+                self.remove(pid)
+            return None
+        handle, start, name, cpu_time, rss, threads, owner, cmdline, io, fds = sample
+        status = ""
+        if slot is not None and start != self.start[slot]:
+            self.remove(pid)  # Mesmo pid, outro processo
+            slot = None
+            status = "reused"
+        elif slot is None:
+            status = "new"
+        if slot is None:
+            slot = self.add(pid, start)
+        if self.samples[slot]:
+            elapsed = now - self.sampled[slot]
+            if elapsed > 0:
+                self.cpu[slot] = max(0.0, (cpu_time - self.cpu_time[slot]) / elapsed * 100)
+                self.io_rate[slot] = max(0.0, (io - self.io[slot]) / elapsed)
+        self.cpu_time[slot] = cpu_time
+        self.io[slot] = io
+        self.fds[slot] = fds
+        self.sampled[slot] = now
+        self.samples[slot] += 1
+        self.name[slot] = name
+        self.rss[slot] = rss
+        self.threads[slot] = threads
+        self.handle[slot] = handle
+        if owner is not None:
+            self.owner[slot] = owner
+        if cmdline is not None:
+            self.cmdline[slot] = cmdline
+        return status
+
+    def memory_percent(self, slot):
+        return self.rss[slot] * 100.0 / self.total_memory if self.total_memory else 0.0
+
+    def username(self, slot):
+        owner = self.owner[slot]
+        if not isinstance(owner, int):
+            return owner or ""
+        name = self.users.get(owner)
+        if name is None:
+            try:
+                name = pwd.getpwuid(owner).pw_name
+            except KeyError:
+                name = str(owner)
+            self.users[owner] = name
+        return name
+
+    def info(self, slot):
+        return {'pid': self.pid[slot], 'name': self.name[slot], 'username': self.username(slot),
+                'cmdline': self.cmdline[slot], 'cpu_percent': self.cpu[slot],
+                'memory_percent': self.memory_percent(slot), 'create_time': self.start[slot],
+                'suspeito': bool(self.flagged[slot])}
+
+
+def _read_into(path, buffer):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        return os.readv(fd, [buffer])
+    finally:
+        os.close(fd)
+
+
+class ProcFsSampler:
+    # Linux: /proc/[pid]/stat a cada passada; status (dono) e cmdline só para processos novos ou após exec.
+    # extended também lê io (bytes lidos/escritos) e o número de descritores abertos
+    def __init__(self, root=PROC_ROOT, extended=False):
+        self.root = root
+        self.extended = extended
+        self.clock_ticks = os.sysconf("SC_CLK_TCK")
+        self.page_size = os.sysconf("SC_PAGE_SIZE")
+        self.stat_buffer = bytearray(STAT_SIZE)
+        self.cmdline_buffer = bytearray(CMDLINE_SIZE)
+        self.boot_time = 0.0
+        with open(os.path.join(root, "stat"), "rb") as f:
+            for line in f:
+                if line.startswith(b"btime "):
+                    self.boot_time = float(line.split()[1])
+                    break
+
+    @staticmethod
+    def available(root=PROC_ROOT):
+        return platform.system() == "Linux" and os.path.exists(os.path.join(root, "self", "stat"))
+
+    def pids(self):
+        return [int(name) for name in os.listdir(self.root) if name.isdigit()]
+
+    def total_memory(self):
+        with open(os.path.join(self.root, "meminfo"), "rb") as f:
+            for line in f:
+                if line.startswith(b"MemTotal:"):
+                    return int(line.split()[1]) * 1024
+        return 0
+
+    def read(self, table, pid, slot):
+        buffer = self.stat_buffer
+        try:
+            n = _read_into(f"{self.root}/{pid}/stat", buffer)
+        except OSError:
+            return None
+        # "pid (comm) estado ppid ...": comm pode ter espaços e parênteses, por isso o último ")"
+        close = buffer.rfind(b")", 0, n)
+        if close < 0:
+            return None
+        name = buffer[buffer.find(b"(", 0, close) + 1:close].decode("utf-8", "replace")
+        fields = buffer[close + 2:n].split(None, 22)  # Campos 3 em diante do proc(5)
+        try:
+            ticks = int(fields[11]) + int(fields[12])  # utime + stime
+            threads = int(fields[17])
+            start = self.boot_time + int(fields[19]) / self.clock_ticks
+            rss = int(fields[21]) * self.page_size
+        except (IndexError, ValueError):
+            return None
+        owner = cmdline = None
+        if slot is None or start != table.start[slot]:
+            owner = self._owner(pid)
+            cmdline = self._cmdline(pid)
+        elif name != table.name[slot]:
+            cmdline = self._cmdline(pid)  # exec trocou o programa
+        io = fds = 0
+        if self.extended:
+            io, fds = self._io(pid), self._fds(pid)
+        return None, start, name, ticks / self.clock_ticks, rss, threads, owner, cmdline, io, fds
+
+    def _io(self, pid):
+        # rchar + wchar: todo byte que passou por read/write, inclusive rede e pipes (sem root: só os próprios)
+        buffer = self.stat_buffer
+        try:
+            n = _read_into(f"{self.root}/{pid}/io", buffer)
+            fields = buffer[:n].split(None, 4)
+            return int(fields[1]) + int(fields[3])
+        except (OSError, ValueError, IndexError):
+            return 0
+
+    def _fds(self, pid):
+        path = f"{self.root}/{pid}/fd"
+        try:
+            count = os.stat(path).st_size  # Linux >= 6.2 informa o número de descritores no tamanho
+            return count if count else len(os.listdir(path))
+        except OSError:
+            return 0
+
+    def _owner(self, pid):
+        try:
+            with open(f"{self.root}/{pid}/status", "rb") as f:
+                for line in f:
+                    if line.startswith(b"Uid:"):
+                        return int(line.split()[1])  # Uid real
+        except (OSError, ValueError, IndexError):
+            pass
+        return ""
+
+    def _cmdline(self, pid):
+        try:
+            n = _read_into(f"{self.root}/{pid}/cmdline", self.cmdline_buffer)
+        except OSError:
+            return ""
+        return self.cmdline_buffer[:n].rstrip(b"\0").replace(b"\0", b" ").decode("utf-8", "replace")
+
+
+class PsutilSampler:
+    # Outras plataformas: um psutil.Process guardado por slot, lido dentro de oneshot()
+    def __init__(self, extended=False):
+        import psutil
+        self.psutil = psutil
+        self.extended = extended
+
+    def pids(self):
+        return self.psutil.pids()
+
+    def total_memory(self):
+        return self.psutil.virtual_memory().total
+
+    def read(self, table, pid, slot):
+        psutil = self.psutil
+        handle = table.handle[slot] if slot is not None else None
+        try:
+            if handle is None or not handle.is_running():  # is_running compara (pid, create_time)
+                handle = psutil.Process(pid)
+            with handle.oneshot():
+                start = handle.create_time()
+                name = handle.name()
+                try:
+                    times = handle.cpu_times()
+                    cpu_time = times.user + times.system
+                    rss = handle.memory_info().rss
+                    threads = handle.num_threads()
+                except psutil.AccessDenied:  # Processos protegidos: só nome e dono entram nas heurísticas
+                    cpu_time, rss, threads = 0.0, 0, 0
+                io = fds = 0
+                if self.extended:
+                    io, fds = self._extended(handle)
+                owner = cmdline = None
+                if slot is None or start != table.start[slot]:
+                    try:
+                        owner = handle.uids().real if pwd else handle.username()
+                        cmdline = " ".join(handle.cmdline())
+                    except psutil.AccessDenied:
+                        owner, cmdline = "", ""
+        except (psutil.NoSuchProcess, psutil.ZombieProcess, psutil.AccessDenied):
+            return None
+        return handle, start, name, cpu_time, rss, threads, owner, cmdline, io, fds
+
+    def _extended(self, handle):
+        psutil = self.psutil
+        io = fds = 0
+        try:
+            counters = handle.io_counters()
+            io = getattr(counters, "read_chars", counters.read_bytes) + getattr(counters, "write_chars",
+                                                                                counters.write_bytes)
+        except (psutil.AccessDenied, AttributeError, NotImplementedError):
+            pass
+        try:
+            fds = handle.num_fds() if hasattr(handle, "num_fds") else handle.num_handles()
+        except (psutil.AccessDenied, AttributeError):
+            pass
+        return io, fds
+
+
+def default_sampler(extended=False):
+    if ProcFsSampler.available():
+        try:
+            return ProcFsSampler(extended=extended)
+        except OSError as e:
+            logging.warning(f"/proc indisponível, usando psutil: {str(e)}")
+    return PsutilSampler(extended=extended)
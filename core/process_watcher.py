@@ -0,0 +1,236 @@
+import os
+import time
+import errno
+import select
+import socket
+import struct
+import logging
+import platform
+import threading
+from core.process_table import PROC_ROOT
+
+# Eventos de processos para o ProcessAnalyzer, entre as passadas completas do monitor: conector de processos
+# do kernel via netlink (Linux, root: fork/exec/exit no momento em que acontecem) ou, sem ele, consulta
+# adaptativa da lista de pids. Lotes de (evento, pid, detalhe) vão para on_events; o detalhe do exec é
+# (nome, executável), lido na hora porque o processo pode terminar antes de ser amostrado.
+
+# connector.h / cn_proc.h
+NETLINK_CONNECTOR = 11
+CN_IDX_PROC = 1
+CN_VAL_PROC = 1
+NLMSG_DONE = 3
+PROC_CN_MCAST_LISTEN = 1
+PROC_CN_MCAST_IGNORE = 2
+PROC_EVENT_NONE = 0x00000000  # Resposta ao LISTEN, com o código de erro
+PROC_EVENT_FORK = 0x00000001
+PROC_EVENT_EXEC = 0x00000002
+PROC_EVENT_EXIT = 0x80000000
+NLMSG_HEADER = struct.Struct("=IHHII")
+CN_MSG = struct.Struct("=IIIIHH")
+PROC_EVENT = struct.Struct("=IIQ")  # what, cpu, timestamp; seguido dos dados do evento
+FORK_EVENT = struct.Struct("=IIII")  # parent_pid, parent_tgid, child_pid, child_tgid
+PID_EVENT = struct.Struct("=II")  # process_pid, process_tgid (exec e exit)
+RECV_BUFFER = 4 * 1024 * 1024  # Folga para rajadas de fork
+ACK_TIMEOUT = 1.0
+
+EVENT_FORK = "fork"
+EVENT_EXEC = "exec"  # Também processos novos vistos pela consulta periódica (sem detalhe)
+EVENT_EXIT = "exit"
+EVENT_RESYNC = "resync"  # Eventos perdidos (buffer do socket cheio): a tabela precisa de uma passada completa
+
+DEFAULT_BATCH_DELAY = 0.1  # Agrupa fork + exec e rajadas num lote só
+MIN_POLL_INTERVAL = 0.25  # Consulta adaptativa: volta ao mínimo quando a lista de pids muda
+MAX_POLL_INTERVAL = 1.0  # e dobra a cada consulta sem mudança até este limite
+
+
+def connector_supported():
+    return platform.system() == "Linux" and hasattr(socket, "AF_NETLINK")
+
+
+class ProcessWatcher:
+    def __init__(self, on_events, batch_delay=DEFAULT_BATCH_DELAY, use_connector=None, root=PROC_ROOT):
+        self.on_events = on_events
+        self.batch_delay = batch_delay
+        if use_connector is None:
+            use_connector = connector_supported() and hasattr(os, "geteuid") and os.geteuid() == 0
+        self.use_connector = use_connector
+        self.root = root
+        self.stop_event = threading.Event()
+        self.sock = None
+        self.mode = None
+        self.known = None  # Pids da última consulta (modo polling)
+        self.interval = MIN_POLL_INTERVAL
+        self.pending = []
+        self.first_event = None
+        self.events = 0
+        self.batches = 0
+
+    def stop(self):
+        self.stop_event.set()
+
+    # --- conector de processos (netlink) ---
+
+    @staticmethod
+    def _control(op):
+        payload = struct.pack("=I", op)
+        cn = CN_MSG.pack(CN_IDX_PROC, CN_VAL_PROC, 0, 0, len(payload), 0)
+        return NLMSG_HEADER.pack(NLMSG_HEADER.size + len(cn) + len(payload), NLMSG_DONE, 0, 0, 0) + cn + payload
+
+    def _open_connector(self):
+        sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_CONNECTOR)
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECV_BUFFER)
+            sock.bind((0, CN_IDX_PROC))
+            sock.send(self._control(PROC_CN_MCAST_LISTEN))
+            # Sem CAP_NET_ADMIN o bind funciona, mas o kernel recusa o LISTEN na resposta
+            sock.settimeout(ACK_TIMEOUT)
+            deadline = time.monotonic() + ACK_TIMEOUT
+            while True:
+                data = sock.recv(65536)
+                err = self._ack_error(data)
+                if err is not None:
+                    break
+                if time.monotonic() > deadline:
+                    raise OSError(errno.ETIMEDOUT, "sem resposta do conector de processos")
+            if err:
+                raise OSError(err, os.strerror(err))
+        except (OSError, socket.timeout):
+            sock.close()
+            raise
+        sock.setblocking(False)
+        self.sock = sock
+        self.mode = "connector"
+
+    @staticmethod
+    def _ack_error(data):
+        offset = NLMSG_HEADER.size + CN_MSG.size
+        if len(data) < offset + PROC_EVENT.size + 4:
+            return None
+        if PROC_EVENT.unpack_from(data, offset)[0] != PROC_EVENT_NONE:
+            return None
+        return struct.unpack_from("=I", data, offset + PROC_EVENT.size)[0]
+
+    def _read_connector(self):
+        while True:
+            try:
+                data = self.sock.recv(65536)
+            except BlockingIOError:
+                return
+            except OSError as e:
+                if e.errno != errno.ENOBUFS:
+                    raise
+                logging.warning("Eventos de processos perdidos (buffer cheio); relendo a tabela")
+                self._queue(EVENT_RESYNC, 0, None)
+                continue
+            offset = 0
+            while offset + NLMSG_HEADER.size + CN_MSG.size + PROC_EVENT.size <= len(data):
+                length = NLMSG_HEADER.unpack_from(data, offset)[0]
+                if length < NLMSG_HEADER.size:
+                    break
+                self._handle_connector(data, offset + NLMSG_HEADER.size)
+                offset += (length + 3) & ~3
+
+    def _handle_connector(self, data, offset):
+        idx, val = CN_MSG.unpack_from(data, offset)[:2]
+        if idx != CN_IDX_PROC or val != CN_VAL_PROC:
+            return
+        offset += CN_MSG.size
+        what = PROC_EVENT.unpack_from(data, offset)[0]
+        offset += PROC_EVENT.size
+        # pid != tgid: thread, não processo
+        if what == PROC_EVENT_FORK:
+            _, _, pid, tgid = FORK_EVENT.unpack_from(data, offset)
+            if pid == tgid:
+                self._queue(EVENT_FORK, pid, None)
+        elif what == PROC_EVENT_EXEC:
+            pid, tgid = PID_EVENT.unpack_from(data, offset)
+            if pid == tgid:
+                self._queue(EVENT_EXEC, pid, self._describe(pid))
+        elif what == PROC_EVENT_EXIT:
+            pid, tgid = PID_EVENT.unpack_from(data, offset)
+            if pid == tgid:
+                self._queue(EVENT_EXIT, pid, None)
+
+    def _describe(self, pid):
+        try:
+            with open(f"{self.root}/{pid}/comm", "rb") as f:
+                name = f.read().rstrip(b"\n").decode("utf-8", "replace")
+            return name, os.readlink(f"{self.root}/{pid}/exe")
+        except OSError:
+            return None  # Já terminou
+
+    # --- consulta periódica ---
+
+    def _pids(self):
+        if connector_supported():
+            return {int(name) for name in os.listdir(self.root) if name.isdigit()}
+        import psutil
+        return set(psutil.pids())
+
+    def _poll(self):
+        pids = self._pids()
+        changed = False
+        if self.known is not None:
+            for pid in pids - self.known:
+                self._queue(EVENT_EXEC, pid, None)
+                changed = True
+            for pid in self.known - pids:
+                self._queue(EVENT_EXIT, pid, None)
+                changed = True
+        self.known = pids
+        self.interval = MIN_POLL_INTERVAL if changed else min(self.interval * 2, MAX_POLL_INTERVAL)
+
+    # --- agrupamento ---
+
+    def _queue(self, kind, pid, detail):
+        self.pending.append((kind, pid, detail))
+        self.events += 1
+        if self.first_event is None:
+            self.first_event = time.monotonic()
+
+    def _flush(self):
+        batch = self.pending
+        self.pending = []
+        self.first_event = None
+        self.batches += 1
+        self.on_events(batch)
+
+    def run(self):
+        if self.use_connector:
+            try:
+                self._open_connector()
+            except OSError as e:
+                logging.warning(f"Conector de processos indisponível ({str(e)}); usando consulta periódica")
+        if self.sock is None:
+            self.mode = "polling"
+        logging.info(f"Eventos de processos: {self.mode}")
+        poller = None
+        if self.sock is not None:
+            poller = select.poll()
+            poller.register(self.sock.fileno(), select.POLLIN)
+        next_poll = 0.0
+        try:
+            while not self.stop_event.is_set():
+                now = time.monotonic()
+                timeout = 0.5
+                if self.first_event is not None:
+                    timeout = max(0.0, min(timeout, self.first_event + self.batch_delay - now))
+                if poller is not None:
+                    if poller.poll(timeout * 1000):
+                        self._read_connector()
+                else:
+                    if self.stop_event.wait(max(0.0, min(timeout, next_poll - now))):
+                        break
+                    if time.monotonic() >= next_poll:
+                        self._poll()
+                        next_poll = time.monotonic() + self.interval
+                if self.first_event is not None and time.monotonic() - self.first_event >= self.batch_delay:
+                    self._flush()
+        finally:
+            if self.sock is not None:
+                try:
+                    self.sock.send(self._control(PROC_CN_MCAST_IGNORE))
+                except OSError:
+                    pass
+                self.sock.close()
+                self.sock = None
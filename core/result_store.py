@@ -0,0 +1,162 @@
+import os
+import sys
+from array import array
+
+STATUS_CLEAN = 0
+STATUS_SUSPICIOUS = 1
+STATUS_ERROR = 2
+STATUS_SKIPPED = 3  # Descartado pela política de tipo de arquivo (core.file_types)
+STATUS_NAMES = ("Clean", "Suspicious", "Error", "Skipped")
+
+_SEPARATORS = tuple(s for s in (os.sep, os.altsep) if s)
+
+
+def status_code(status):
+    if status == "Suspicious":
+        return STATUS_SUSPICIOUS
+    if status == "Clean":
+        return STATUS_CLEAN
+    if status == "Skipped":
+        return STATUS_SKIPPED
+    return STATUS_ERROR
+
+
+def split_path(path):
+    # Divide em (prefixo com separador final, nome): prefixo + nome reconstrói o caminho exato
+    cut = max(path.rfind(s) for s in _SEPARATORS) + 1
+    return path[:cut], path[cut:]
+
+
+class ScanResults:
+    # Resultados em arrays: diretórios internados, nomes num blob único, status em bytes
+    # e digests binários contíguos por algoritmo. Nenhum objeto Python por arquivo.
+    def __init__(self):
+        self.dirs = []  # id -> prefixo do diretório
+        self.dir_ids = {}  # prefixo -> id
+        self.row_dirs = array("I")
+        self.names = bytearray()  # Nomes em UTF-8 (surrogateescape), concatenados
+        self.name_offsets = array("Q", [0])
+        self.statuses = bytearray()
+        self.algorithms = []  # Ordem dos bits em digest_flags
+        self.digest_bits = {}  # algoritmo -> bit em digest_flags
+        self.digest_sizes = {}
+        self.digest_data = {}  # algoritmo -> bytearray com len(self) * tamanho bytes
+        self.digest_flags = bytearray()  # Bit i: linha tem digest de algorithms[i]
+        self.errors = {}  # linha -> mensagem, só para linhas com erro
+        self.actions = {}  # linha -> ação aplicada (quarentena, exclusão)
+        self.counts = [0] * len(STATUS_NAMES)
+
+    def __len__(self):
+        return len(self.statuses)
+
+    def _dir_id(self, prefix):
+        dir_id = self.dir_ids.get(prefix)
+        if dir_id is None:
+            dir_id = self.dir_ids[prefix] = len(self.dirs)
+            self.dirs.append(prefix)
+        return dir_id
+
+    def _add_algorithm(self, algorithm, size):
+        if len(self.algorithms) >= 8:
+            raise ValueError(f"Algoritmos de hash demais no resultado: {algorithm}")
+        self.digest_bits[algorithm] = 1 << len(self.algorithms)
+        self.algorithms.append(algorithm)
+        self.digest_sizes[algorithm] = size
+        self.digest_data[algorithm] = bytearray(len(self.statuses) * size)  # Linhas antigas sem digest
+
+    def append(self, path, status, digests=None):
+        code = status_code(status)
+        row = len(self.statuses)
+        if code == STATUS_ERROR:
+            self.errors[row] = status
+        prefix, name = split_path(path)
+        self.row_dirs.append(self._dir_id(prefix))
+        self.names += name.encode("utf-8", "surrogateescape")
+        self.name_offsets.append(len(self.names))
+        flags = 0
+        digests = digests or {}
+        for algorithm, hexdigest in digests.items():
+            if algorithm not in self.digest_sizes:
+                self._add_algorithm(algorithm, len(hexdigest) // 2)
+        for algorithm in self.algorithms:
+            hexdigest = digests.get(algorithm)
+            size = self.digest_sizes[algorithm]
+            if hexdigest and len(hexdigest) == size * 2:
+                self.digest_data[algorithm] += bytes.fromhex(hexdigest)
+                flags |= self.digest_bits[algorithm]
+            else:
+                self.digest_data[algorithm] += bytes(size)
+        self.digest_flags.append(flags)
+        self.statuses.append(code)
+        self.counts[code] += 1
+
+    def extend(self, batch):
+        for result in batch:
+            self.append(result["path"], result["status"], result.get("digests"))
+
+    def path(self, row):
+        name = self.names[self.name_offsets[row]:self.name_offsets[row + 1]]
+        return self.dirs[self.row_dirs[row]] + name.decode("utf-8", "surrogateescape")
+
+    def status_code(self, row):
+        return self.statuses[row]
+
+    def status(self, row):
+        code = self.statuses[row]
+        if code == STATUS_ERROR:
+            return self.errors.get(row, "Error")
+        return STATUS_NAMES[code]
+
+    def digest(self, row, algorithm):
+        if not self.digest_flags[row] & self.digest_bits.get(algorithm, 0):
+            return None
+        size = self.digest_sizes[algorithm]
+        return self.digest_data[algorithm][row * size:(row + 1) * size].hex()
+
+    def digests(self, row):
+        flags = self.digest_flags[row]
+        return {a: self.digest(row, a) for a in self.algorithms if flags & self.digest_bits[a]}
+
+    def digest_text(self, row):
+        flags = self.digest_flags[row]
+        return " ".join(f"{a}={self.digest(row, a)}" for a in sorted(self.algorithms) if flags & self.digest_bits[a])
+
+    def action(self, row):
+        return self.actions.get(row, "")
+
+    def set_action(self, row, action):
+        self.actions[row] = action
+
+    def count(self, code=None):
+        return len(self.statuses) if code is None else self.counts[code]
+
+    def rows(self, code=None):
+        if code is None:
+            return range(len(self.statuses))
+        return (row for row, c in enumerate(self.statuses) if c == code)
+
+    def paths(self, code=None):
+        for row in self.rows(code):
+            yield self.path(row)
+
+    def memory_usage(self):
+        arrays = (self.row_dirs, self.names, self.name_offsets, self.statuses, self.digest_flags)
+        total = sum(len(a) * getattr(a, "itemsize", 1) for a in arrays)
+        total += sum(len(d) for d in self.digest_data.values())
+        total += sum(sys.getsizeof(d) for d in self.dirs)
+        return total
+
+    def sort_key(self, column):
+        # Chaves por coluna para sorted(range(n), key=...): ordenação sem chamadas ao modelo Qt
+        if column == 0:
+            return self.path
+        if column == 1:
+            return self.statuses.__getitem__
+        if column == 2:
+            return self.action
+        return None
+
+    def __iter__(self):
+        # (caminho, status, ação, digests em texto) sem montar um dict por arquivo
+        for row in range(len(self.statuses)):
+            yield self.path(row), self.status(row), self.action(row), self.digest_text(row)
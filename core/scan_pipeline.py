@@ -0,0 +1,172 @@
+import os
+import sys
+import queue
+import logging
+import threading
+
+DEFAULT_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+QUEUE_PER_WORKER = 64
+PRIORITY_WINDOW = 16384  # Itens enfileirados com classificação: quanto maior, mais longe a prioridade alcança
+_DONE_PRIORITY = sys.maxsize  # Depois de qualquer item real
+_DONE = object()
+
+
+class ScanCancelled(Exception):
+    pass
+
+
+class ScanPipeline:
+    # walker (produtor) -> fila limitada -> pool de workers -> sink no thread chamador.
+    # Com classify(caminho, stat) -> (prioridade, contexto), a fila de trabalho é de prioridade
+    # (menor primeiro, ordem do walker entre iguais) e o contexto chega ao scan_file.
+    # Prioridade None: o walker resolve o arquivo na hora, sem passar pelos workers.
+    def __init__(self, walker, scan_file, workers=None, batch_size=10, buffer_size=1024 * 1024, classify=None,
+                 throttle=None):
+        self.walker = walker
+        self.scan_file = scan_file
+        self.classify = classify
+        self.throttle = throttle  # core.throttle.Throttle: limites de taxa e prioridade dos threads
+        self.workers = max(1, workers or DEFAULT_WORKERS)
+        self.batch_size = batch_size
+        self.buffer_size = buffer_size
+        # Filas limitadas: o walker bloqueia quando os workers não dão conta (backpressure)
+        if classify is None:
+            self.work_queue = queue.Queue(maxsize=self.workers * QUEUE_PER_WORKER)
+        else:
+            self.work_queue = queue.PriorityQueue(maxsize=max(self.workers * QUEUE_PER_WORKER, PRIORITY_WINDOW))
+        self.result_queue = queue.Queue(maxsize=self.workers * QUEUE_PER_WORKER)
+        self.stop_event = threading.Event()
+        self.lock = threading.Lock()
+        self.files_found = 0
+        self.files_done = 0
+        self.bytes_done = 0
+        self.walk_done = False
+
+    def stop(self):
+        self.stop_event.set()
+
+    @property
+    def is_running(self):
+        return not self.stop_event.is_set()
+
+    def _put(self, q, item, force=False):
+        while True:
+            if not force and self.stop_event.is_set():
+                return False
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+
+    def _walk(self):
+        seq = 0
+        if self.throttle is not None:
+            self.throttle.apply_priority()
+        try:
+            for file_path, st in self.walker.walk(self.stop_event.is_set):
+                priority, context = 0, None
+                if self.classify is not None:
+                    try:
+                        priority, context = self.classify(file_path, st)
+                    except Exception as e:
+                        logging.error(f"Erro ao classificar {file_path}: {str(e)}")
+                with self.lock:
+                    self.files_found += 1
+                if priority is None:
+                    self._scan(file_path, st, context)
+                    continue
+                seq += 1
+                if not self._put(self.work_queue, (priority, seq, file_path, st, context)):
+                    break
+        except Exception as e:
+            logging.error(f"Erro ao percorrer {self.walker.root}: {str(e)}")
+        finally:
+            self.walk_done = True
+            for _ in range(self.workers):
+                seq += 1
+                self._put(self.work_queue, (_DONE_PRIORITY, seq, _DONE, None, None), force=True)
+
+    def _scan(self, file_path, st, context, buffer=None, on_chunk=None, file_bytes=None):
+        members = ()
+        try:
+            status, digests, *extra = self.scan_file(file_path, buffer, on_chunk, st, context)
+            if extra:
+                members = extra[0]  # Resultados adicionais (membros de compactados)
+        except ScanCancelled:
+            return
+        except Exception as e:
+            logging.error(f"Erro ao escanear {file_path}: {str(e)}")
+            status, digests = f"Error: {str(e)}", {}
+        if self.stop_event.is_set():
+            return
+        with self.lock:
+            self.files_done += 1
+            if file_bytes is not None:
+                self.bytes_done += file_bytes[0]
+        self._put(self.result_queue, {"path": file_path, "status": status, "digests": digests})
+        for member in members:
+            self._put(self.result_queue, member)
+
+    def _work(self):
+        buffer = bytearray(self.buffer_size)  # Um buffer por worker, reutilizado
+        file_bytes = [0]
+        throttle = self.throttle
+        if throttle is not None:
+            throttle.apply_priority()
+
+        def on_chunk(n):
+            file_bytes[0] += n
+            if throttle is not None:
+                throttle.wait_bytes(n, self.stop_event.is_set)
+            if self.stop_event.is_set():
+                raise ScanCancelled()
+
+        try:
+            while True:
+                _, _, file_path, st, context = self.work_queue.get()
+                if file_path is _DONE:
+                    break
+                if throttle is not None:
+                    throttle.wait_file(self.stop_event.is_set)
+                if self.stop_event.is_set():
+                    continue
+                file_bytes[0] = 0
+                self._scan(file_path, st, context, buffer, on_chunk, file_bytes)
+        finally:
+            self._put(self.result_queue, _DONE, force=True)
+
+    def run(self, on_batch, on_progress=None):
+        threads = [threading.Thread(target=self._walk, name="scan-walker", daemon=True)]
+        for i in range(self.workers):
+            threads.append(threading.Thread(target=self._work, name=f"scan-worker-{i}", daemon=True))
+        for t in threads:
+            t.start()
+        active = self.workers
+        batch = []
+        while active:
+            try:
+                item = self.result_queue.get(timeout=0.1)
+            except queue.Empty:
+                item = None
+            # Esvazia o que já estiver pronto para emitir em lotes
+            while item is not None:
+                if item is _DONE:
+                    active -= 1
+                elif self.is_running:
+                    batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self.result_queue.get_nowait()
+                except queue.Empty:
+                    item = None
+            if batch:
+                on_batch(batch)
+                batch = []
+                if on_progress:
+                    on_progress(self)
+        for t in threads:
+            t.join()
+        if on_progress and self.is_running:
+            on_progress(self)
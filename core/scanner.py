@@ -0,0 +1,426 @@
+import os
+import mmap
+import time
+import hashlib
+import logging
+from core.scan_pipeline import ScanPipeline, ScanCancelled
+from core.pattern_matcher import PatternMatcher
+from core.walker import DirectoryWalker, PathListWalker
+from core.file_types import (FileTypePolicy, DEFAULT_POLICIES, PRIORITIES, SNIFF_SIZE, ACTION_FULL, ACTION_HEADER,
+                             ACTION_SKIP)
+from core.archive_scanner import (ArchiveScanner, ArchiveLimits, TeeReader, archive_kind, ARCHIVE_SEPARATOR,
+                                  STREAMING_KINDS)
+from core.throttle import Throttle
+from core.shard_scanner import ShardCoordinator
+from core.checkpoint import ScanCheckpoint, ResumableWalker, DEFAULT_CHECKPOINT_DIR, DEFAULT_CHECKPOINT_INTERVAL
+from infra.scan_cache import ScanCache, DEFAULT_CACHE_PATH
+from infra.scan_history import ScanHistory, DEFAULT_HISTORY_PATH
+from infra.signature_db import SignatureSet, DEFAULT_SIGNATURE_DB_PATH, MALICIOUS_SIGNATURES
+
+# Núcleo de escaneamento sem Qt: usado pela GUI (core/file_scanner.py) e pela CLI (foxter.py)
+
+CHUNK_SIZE = 1024 * 1024  # 1 MiB por leitura
+MMAP_THRESHOLD = 256 * 1024 * 1024  # Arquivos maiores que isso usam mmap
+DEFAULT_DIGEST_ALGORITHMS = ("md5", "sha1", "sha256")
+CONTAINER_TYPES = ("zip", "office", "archive")  # Tipos do core.file_types que podem ser compactados (OOXML é zip)
+
+
+def hash_file(file_path, buffer=None, on_chunk=None, use_mmap=True, sinks=(), algorithms=("sha256",)):
+    # Hash em streaming: memória por arquivo limitada ao tamanho do buffer.
+    # Todos os digests e sinks (ex.: o matcher de padrões) recebem os mesmos chunks na mesma leitura.
+    if buffer is None:
+        buffer = bytearray(CHUNK_SIZE)
+    view = memoryview(buffer)
+    chunk_size = len(buffer)
+    digests = {a: hashlib.new(a) for a in algorithms}
+    sinks = tuple(digests.values()) + tuple(sinks)
+    total = 0
+    with open(file_path, "rb", buffering=0) as f:
+        size = os.fstat(f.fileno()).st_size
+        if use_mmap and size >= MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                mm_view = memoryview(mm)
+                try:
+                    for offset in range(0, size, chunk_size):
+                        chunk = mm_view[offset:offset + chunk_size]
+                        for sink in sinks:
+                            sink.update(chunk)
+                        total += len(chunk)
+                        if on_chunk:
+                            on_chunk(len(chunk))
+                        chunk.release()
+                finally:
+                    mm_view.release()
+        else:
+            while True:
+                n = f.readinto(view)
+                if not n:
+                    break
+                chunk = view[:n]
+                for sink in sinks:
+                    sink.update(chunk)
+                total += n
+                if on_chunk:
+                    on_chunk(n)
+    return {a: d.hexdigest() for a, d in digests.items()}, total
+
+
+class MemberHasher:
+    # Digests e padrões de um membro de arquivo compactado, alimentados pelo ArchiveScanner
+    def __init__(self, scanner):
+        self.scanner = scanner
+        self.digests = {a: hashlib.new(a) for a in scanner.digest_algorithms}
+        self.stream = scanner.matcher.stream() if len(scanner.matcher) else None
+
+    def update(self, chunk):
+        for digest in self.digests.values():
+            digest.update(chunk)
+        if self.stream is not None:
+            self.stream.update(chunk)
+
+    def result(self, path):
+        digests = {a: d.hexdigest() for a, d in self.digests.items()}
+        content_match = self.scanner.content_match(path, self.stream)
+        return self.scanner.verdict(path, digests, content_match), digests, content_match
+
+
+class Scanner:
+    def __init__(self, workers=None, cache_path=DEFAULT_CACHE_PATH, walk_options=None,
+                 signature_db_path=DEFAULT_SIGNATURE_DB_PATH, patterns=MALICIOUS_SIGNATURES,
+                 digest_algorithms=DEFAULT_DIGEST_ALGORITHMS, history_path=DEFAULT_HISTORY_PATH,
+                 checkpoint_dir=DEFAULT_CHECKPOINT_DIR, checkpoint_interval=DEFAULT_CHECKPOINT_INTERVAL,
+                 file_policies=DEFAULT_POLICIES, archive_limits=None, scan_archives=True, throttle_options=None):
+        # Opções de construção, repassadas aos processos do escaneamento distribuído
+        self.options = {"workers": workers, "cache_path": cache_path, "walk_options": walk_options,
+                        "signature_db_path": signature_db_path, "patterns": patterns,
+                        "digest_algorithms": digest_algorithms, "history_path": history_path,
+                        "checkpoint_dir": checkpoint_dir, "checkpoint_interval": checkpoint_interval,
+                        "file_policies": file_policies, "archive_limits": archive_limits,
+                        "scan_archives": scan_archives, "throttle_options": throttle_options}
+        self.signatures = SignatureSet(signature_db_path)
+        # Calcula sempre os algoritmos configurados e os que têm assinaturas carregadas
+        self.digest_algorithms = tuple(sorted(set(digest_algorithms) | set(self.signatures.algorithms)))
+        unknown = [a for a in self.digest_algorithms if a not in hashlib.algorithms_available]
+        if unknown:
+            raise ValueError(f"Algoritmo de hash desconhecido: {', '.join(unknown)}")
+        self.matcher = PatternMatcher(patterns or ())  # Assinaturas de conteúdo
+        # Tipo de arquivo -> ação (core.file_types); None desativa a classificação e a fila de prioridade
+        self.file_policy = FileTypePolicy(file_policies) if file_policies is not None else None
+        # Argumentos de core.throttle.Throttle (limites por processo); None lê o mais rápido possível
+        self.throttle = Throttle(**throttle_options) if throttle_options else None
+        # Membros de zip/tar/gz/bz2/xz; scan_archives=False trata os compactados como um blob só
+        self.archives = None
+        if scan_archives:
+            self.archives = ArchiveScanner(lambda: MemberHasher(self), archive_limits or ArchiveLimits())
+        self.walk_options = walk_options or {}  # exclude_globs, exclude_paths, max_depth, same_filesystem
+        self.workers = workers
+        self.cache_path = cache_path  # None desativa o cache incremental
+        self.cache = None
+        self.history_path = history_path  # None desativa o histórico
+        self.history = None
+        self.last_scan_id = None
+        self.checkpoint_dir = checkpoint_dir  # None desativa o diário de retomada
+        self.checkpoint_interval = checkpoint_interval
+        self.resumed_files = 0  # Arquivos concluídos antes da retomada
+        self.is_running = True
+        self.pipeline = None
+        self.watcher = None
+
+    def open(self):
+        if self.cache_path and self.cache is None:
+            try:
+                # Padrões e limites de expansão mudam o resultado: ambos invalidam o cache
+                archives = self.archives.limits.key() if self.archives else "off"
+                self.cache = ScanCache(self.cache_path, f"{self.matcher.version}/{archives}")
+            except Exception as e:
+                logging.error(f"Cache de escaneamento indisponível ({self.cache_path}): {str(e)}")
+                self.cache = None
+        if self.history_path and self.history is None:
+            try:
+                self.history = ScanHistory(self.history_path)
+            except Exception as e:
+                logging.error(f"Histórico de escaneamento indisponível ({self.history_path}): {str(e)}")
+                self.history = None
+
+    def close(self):
+        if self.cache:
+            logging.info(f"Cache: {self.cache.hits} reaproveitados, {self.cache.misses} calculados")
+            self.cache.close()
+            self.cache = None
+        if self.history:
+            self.history.close()
+            self.history = None
+        stats = self.signatures.filter_stats()
+        if stats["enabled"]:
+            logging.info(f"Pré-filtro: {stats['rejected']}/{stats['lookups']} descartados, "
+                         f"{stats['false_positives']} falsos positivos")
+
+    def run(self, walker, on_batch, on_progress=None):
+        self.pipeline = ScanPipeline(walker, self.scan_file, workers=self.workers, buffer_size=CHUNK_SIZE,
+                                     classify=self.classify if self.file_policy else None, throttle=self.throttle)
+        if not self.is_running:
+            self.pipeline.stop()
+        self.pipeline.run(on_batch, on_progress)
+        return self.pipeline
+
+    def _begin_scan(self, root, kind):
+        if not self.history:
+            return None
+        try:
+            self.last_scan_id = self.history.begin_scan(root, kind)
+        except Exception as e:
+            logging.error(f"Erro ao registrar escaneamento no histórico: {str(e)}")
+            return None
+        return self.last_scan_id
+
+    def _finish_scan(self, scan_id):
+        if scan_id is not None:
+            self.history.finish_scan(scan_id, "done" if self.is_running else "cancelled")
+
+    def _recorder(self, scan_id, on_batch):
+        # Os lotes são gravados no histórico no mesmo thread que os entrega
+        if scan_id is None:
+            return on_batch
+
+        def record(batch):
+            self.history.add_results(scan_id, batch)
+            on_batch(batch)
+        return record
+
+    def checkpoint(self, directory):
+        # Diário de um escaneamento interrompido de directory (compatível com as opções atuais), ou None
+        if not self.checkpoint_dir:
+            return None
+        return ScanCheckpoint(self.checkpoint_dir, directory).load(self.walk_options)
+
+    def scan(self, directory, on_batch, on_progress=None, resume=False):
+        if not self.checkpoint_dir:
+            scan_id = self._begin_scan(os.path.abspath(directory), "scan")
+            try:
+                return self.run(DirectoryWalker(directory, **self.walk_options), self._recorder(scan_id, on_batch),
+                                on_progress)
+            finally:
+                self._finish_scan(scan_id)
+        return self._scan_resumable(directory, on_batch, on_progress, resume)
+
+    def _scan_resumable(self, directory, on_batch, on_progress, resume):
+        checkpoint = ScanCheckpoint(self.checkpoint_dir, directory)
+        state = checkpoint.load(self.walk_options) if resume else None
+        scan_id = state.get("scan_id") if state else None
+        if scan_id is not None and self.history and self.history.resume_scan(scan_id):
+            self.last_scan_id = scan_id  # Os resultados anteriores já estão no histórico
+        else:
+            scan_id = self._begin_scan(checkpoint.root, "scan")
+        if state:
+            logging.info(f"Retomando {checkpoint.root}: {state.get('files_done', 0)} arquivos já escaneados, "
+                         f"{len(state.get('pending', []))} diretórios pendentes")
+        walker = ResumableWalker(directory, state, **self.walk_options)
+        self.resumed_files = state.get("files_done", 0) if state else 0
+        record = self._recorder(scan_id, on_batch)
+        last_save = [time.monotonic()]
+
+        def save():
+            # Resultados e cache vão para o disco antes do diário que os declara concluídos
+            try:
+                if self.history:
+                    self.history.flush()
+                if self.cache:
+                    self.cache.flush()
+                state = walker.snapshot()  # Contadores do walker: só o que já chegou ao histórico
+                state.update(scan_id=scan_id, walk_options=self.walk_options)
+                checkpoint.save(state)
+            except Exception as e:
+                logging.error(f"Erro ao gravar diário de escaneamento {checkpoint.path}: {str(e)}")
+            last_save[0] = time.monotonic()
+
+        def on_checkpointed_batch(batch):
+            record(batch)
+            # Membros de compactados não são arquivos do diretório
+            walker.files_done([result["path"] for result in batch if "archive" not in result])
+            if time.monotonic() - last_save[0] >= self.checkpoint_interval:
+                save()
+
+        completed = False
+        try:
+            pipeline = self.run(walker, on_checkpointed_batch, on_progress)
+            completed = self.is_running
+            return pipeline
+        finally:
+            if completed:
+                checkpoint.remove()  # Concluído: nada a retomar
+            elif self.pipeline is not None:
+                save()
+            self._finish_scan(scan_id)
+
+    def scan_sharded(self, directory, on_batch, on_progress=None, processes=None):
+        # Vários processos com roubo de trabalho (core/shard_scanner.py); sem diário de retomada
+        scan_id = self._begin_scan(os.path.abspath(directory), "scan")
+        self.pipeline = ShardCoordinator(directory, self.options, processes)
+        if not self.is_running:
+            self.pipeline.stop()
+        try:
+            return self.pipeline.run(self._recorder(scan_id, on_batch), on_progress)
+        finally:
+            self._finish_scan(scan_id)
+
+    def scan_paths(self, paths, on_batch, on_progress=None, scan_id=None, roots=None):
+        # roots: raízes de onde os caminhos vieram (modo monitor), cujos filtros de travessia valem para eles
+        walker = PathListWalker(paths, roots, **self.walk_options)
+        own_scan = scan_id is None
+        if own_scan:
+            scan_id = self._begin_scan(walker.root, "scan")
+        try:
+            pipeline = self.run(walker, self._recorder(scan_id, on_batch), on_progress)
+        finally:
+            if own_scan:
+                self._finish_scan(scan_id)
+            elif scan_id is not None:
+                self.history.flush()
+        if self.cache:
+            self.cache.flush()
+        return pipeline
+
+    def watch(self, roots, on_batch, **watch_options):
+        # Importado sob demanda: só o modo monitor precisa de inotify/fanotify
+        from core.file_watcher import FileWatcher
+        scan_id = self._begin_scan(", ".join(os.path.abspath(r) for r in roots), "watch")
+        self.watcher = FileWatcher(roots, lambda paths: self.is_running and self.scan_paths(
+                                       paths, on_batch, scan_id=scan_id, roots=self.watcher.roots),
+                                   walk_options=self.walk_options, **watch_options)
+        try:
+            if self.is_running:
+                self.watcher.run()
+        finally:
+            if scan_id is not None:
+                self.history.finish_scan(scan_id)  # Parar o monitor encerra a sessão normalmente
+
+    def verdict(self, file_path, digests, content_match):
+        algorithm = self.signatures.match(digests)
+        if algorithm:
+            logging.warning(f"Assinatura {algorithm} conhecida em {file_path}")
+            return "Suspicious"
+        return "Suspicious" if content_match else "Clean"
+
+    def classify(self, file_path, st):
+        # Roda no thread do walker, antes da fila: arquivos inalterados no cache nem são abertos
+        if self.cache and st is not None and self.cache.contains(st, self.digest_algorithms):
+            return PRIORITIES[ACTION_FULL], None
+        try:
+            return self.file_policy.classify(file_path)
+        except OSError:
+            return PRIORITIES[ACTION_FULL], None  # O erro aparece no escaneamento completo
+
+    def scan_header(self, file_path, header):
+        if not len(self.matcher):
+            return "Clean"
+        stream = self.matcher.stream()
+        stream.update(header)
+        if stream.matches:
+            names = ", ".join(p.decode("utf-8", "replace") for p in stream.matched_patterns())
+            logging.warning(f"Padrão de conteúdo ({names}) encontrado no cabeçalho de {file_path}")
+            return "Suspicious"
+        return "Clean"
+
+    def content_match(self, file_path, stream):
+        if not (stream and stream.matches):
+            return False
+        names = ", ".join(p.decode("utf-8", "replace") for p in stream.matched_patterns())
+        logging.warning(f"Padrão de conteúdo ({names}) encontrado em {file_path}")
+        return True
+
+    def scan_file(self, file_path, buffer=None, on_chunk=None, st=None, sniffed=None):
+        # sniffed: (tipo, ação, cabeçalho) vindo de classify.
+        # Compactados devolvem também os resultados dos membros: (status, digests, membros)
+        if sniffed is not None:
+            if sniffed[1] == ACTION_SKIP:
+                return "Skipped", {}
+            if sniffed[1] == ACTION_HEADER:
+                return self.scan_header(file_path, sniffed[2]), {}
+        cache = self.cache
+        claimed = None
+        try:
+            if cache:
+                if st is None:
+                    st = os.stat(file_path)
+                claimed = st
+                hit = cache.acquire(st, self.digest_algorithms)
+                if hit is not None:
+                    # Arquivo inalterado: nem abre, só confere os digests (do arquivo e dos membros) com o feed atual
+                    status = self.verdict(file_path, hit[0], hit[1])
+                    if hit[2] is None:
+                        return status, hit[0]
+                    members = self._cached_members(file_path, hit[2])
+                    return self._archive_status(status, members, hit[2]["status"]), hit[0], members
+            stream = self.matcher.stream() if len(self.matcher) else None
+            if self.archives and (sniffed is None or sniffed[0] in CONTAINER_TYPES):
+                scanned = self._scan_archive(file_path, buffer, on_chunk, st, stream)
+                if scanned is not None:
+                    return scanned
+            digests, _ = hash_file(file_path, buffer, on_chunk=on_chunk, sinks=(stream,) if stream else (),
+                                   algorithms=self.digest_algorithms)
+            content_match = self.content_match(file_path, stream)
+            if cache:
+                cache.store(st, digests, content_match)
+            return self.verdict(file_path, digests, content_match), digests
+        except ScanCancelled:
+            raise
+        except Exception as e:
+            logging.error(f"Erro ao calcular hash {file_path}: {str(e)}")
+            return f"Error: {str(e)}", {}
+        finally:
+            if claimed is not None:
+                cache.release(claimed)
+
+    def _scan_archive(self, file_path, buffer, on_chunk, st, stream):
+        # None se não é compactado. tar/gz/bz2/xz: uma leitura só, os membros e os digests do arquivo saem do
+        # mesmo TeeReader (on_chunk conta só bytes do disco). zip: hash_file e depois o zipfile (precisa de seek)
+        with open(file_path, "rb", buffering=0) as f:
+            header = f.read(SNIFF_SIZE)
+            kind = archive_kind(header)
+            if kind is None:
+                return None
+            if kind in STREAMING_KINDS:
+                digests = {a: hashlib.new(a) for a in self.digest_algorithms}
+                sinks = tuple(digests.values()) + ((stream,) if stream else ())
+                reader = TeeReader(header, f, sinks, on_chunk or (lambda n: None))
+                members, aborted = self.archives.scan(file_path, kind, reader, os.fstat(f.fileno()).st_size)
+                reader.drain()
+                digests = {a: d.hexdigest() for a, d in digests.items()}
+        if kind not in STREAMING_KINDS:
+            digests, _ = hash_file(file_path, buffer, on_chunk=on_chunk, sinks=(stream,) if stream else (),
+                                   algorithms=self.digest_algorithms)
+            members, aborted = self.archives.scan(file_path, kind)
+        content_match = self.content_match(file_path, stream)
+        if self.cache:
+            prefix = len(file_path) + len(ARCHIVE_SEPARATOR)
+            self.cache.store(st, digests, content_match, {
+                "status": aborted,
+                "members": [[m["path"][prefix:], m["digests"], m.get("content_match", False),
+                             m["status"] if m["status"].startswith("Error") else None] for m in members]})
+        for m in members:
+            m.pop("content_match", None)
+        return self._archive_status(self.verdict(file_path, digests, content_match), members, aborted), \
+            digests, members
+
+    def _cached_members(self, file_path, archive):
+        # Membros de um compactado inalterado: vereditos refeitos com o feed atual, sem descompactar
+        members = []
+        for inner, digests, content_match, error in archive["members"]:
+            path = f"{file_path}{ARCHIVE_SEPARATOR}{inner}"
+            status = error or self.verdict(path, digests, content_match)
+            members.append({"path": path, "status": status, "digests": digests, "archive": file_path})
+        return members
+
+    @staticmethod
+    def _archive_status(status, members, aborted):
+        # Expansão interrompida num limite ou membro suspeito: o arquivo do disco não sai como limpo
+        if status == "Suspicious" or aborted == "Suspicious" or any(m["status"] == "Suspicious" for m in members):
+            return "Suspicious"
+        return aborted or status
+
+    def stop(self):
+        self.is_running = False
+        if self.pipeline:
+            self.pipeline.stop()
+        if self.watcher:
+            self.watcher.stop()
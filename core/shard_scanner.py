@@ -0,0 +1,286 @@
+import os
+import time
+import queue
+import signal
+import logging
+import threading
+import multiprocessing
+from core.walker import DirectoryWalker
+
+# Escaneamento de árvores enormes em N processos. O coordenador reparte a árvore em shards de diretório;
+# cada processo percorre os seus com uma pilha local e, quando um fica ocioso, o coordenador pede ao
+# mais ocupado que doe metade da pilha (os diretórios mais rasos, isto é, as maiores subárvores).
+# A comunicação é só por mensagens (tuplas) em filas: o mesmo protocolo serve para um socket.
+#
+#   coordenador -> worker: ("shard", diretório, profundidade, só arquivos), ("steal",), ("stop",)
+#   worker -> coordenador: ("idle", id), ("donate", id, shards), ("done", id, estatísticas),
+#                          ("results", id, lote, diretórios pendentes, encontrados, concluídos, bytes)
+
+DEFAULT_PROCESSES = os.cpu_count() or 1
+THREADS_PER_PROCESS = 4  # Threads de hash dentro de cada processo
+RESULTS_BATCH = 256  # Resultados por mensagem
+RESULTS_INTERVAL = 0.05  # Segundos máximos de resultados parados no worker
+POLL_INTERVAL = 0.2
+
+
+class ShardWalker(DirectoryWalker):
+    # Walker de um processo worker: pilha local alimentada por shards do coordenador e doada sob pedido
+    def __init__(self, root, worker_id, inbox, outbox, **walk_options):
+        super().__init__(root, **walk_options)
+        self.worker_id = worker_id
+        self.inbox = inbox
+        self.outbox = outbox
+        self.lock = threading.Lock()
+        self.stack = []  # (diretório, profundidade, só arquivos)
+        self.stopped = False
+
+    def pending(self):
+        return len(self.stack)
+
+    def _handle(self, message):
+        kind = message[0]
+        if kind == "shard":
+            with self.lock:
+                self.stack.append(tuple(message[1:]))
+        elif kind == "steal":
+            with self.lock:
+                half = (len(self.stack) + 1) // 2
+                donated, self.stack = self.stack[:half], self.stack[half:]  # Fundo da pilha: os mais rasos
+            self.outbox.put(("donate", self.worker_id, donated))
+        elif kind == "stop":
+            self.stopped = True
+
+    def _poll(self):
+        while not self.stopped:
+            try:
+                self._handle(self.inbox.get_nowait())
+            except queue.Empty:
+                return
+
+    def walk(self, should_stop=None):
+        self.root_dev = os.stat(self.root).st_dev
+        idle = False
+        while True:
+            self._poll()
+            if self.stopped or (should_stop is not None and should_stop()):
+                return
+            with self.lock:
+                item = self.stack.pop() if self.stack else None
+            if item is None:
+                if not idle:
+                    self.outbox.put(("idle", self.worker_id))
+                    idle = True
+                try:
+                    self._handle(self.inbox.get(timeout=POLL_INTERVAL))
+                except queue.Empty:
+                    pass
+                continue
+            idle = False
+            directory, depth, files_only = item
+            subdirs = []
+            yield from self._list_dir(directory, depth, subdirs, files_only)
+            with self.lock:
+                self.stack.extend((d, dep, False) for d, dep in reversed(subdirs))
+
+
+def _worker_main(worker_id, root, inbox, outbox, cancel_event, scanner_options, threads):
+    # Processo worker: um Scanner próprio (cache compartilhado em disco, sem histórico nem diário)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # O cancelamento vem do coordenador
+    from core.scanner import Scanner
+    scanner = Scanner(**dict(scanner_options, workers=threads, history_path=None, checkpoint_dir=None))
+    walker = ShardWalker(root, worker_id, inbox, outbox, **scanner.walk_options)
+    pending = []
+    last_send = [time.monotonic()]
+    stats = {"files": 0, "errors": 0}
+
+    def send(pipeline):
+        outbox.put(("results", worker_id, pending[:], walker.pending(),
+                    pipeline.files_found, pipeline.files_done, pipeline.bytes_done))
+        pending.clear()
+        last_send[0] = time.monotonic()
+
+    def on_batch(batch):
+        pending.extend(batch)
+        if len(pending) >= RESULTS_BATCH or time.monotonic() - last_send[0] >= RESULTS_INTERVAL:
+            send(scanner.pipeline)
+
+    def on_progress(pipeline):
+        if pending and time.monotonic() - last_send[0] >= RESULTS_INTERVAL:
+            send(pipeline)
+
+    def watch_cancel():
+        # is_set() em laço, não wait(): set() no pai travaria esperando waiters de processos já encerrados
+        while not cancel_event.is_set():
+            time.sleep(POLL_INTERVAL)
+        scanner.stop()
+
+    threading.Thread(target=watch_cancel, daemon=True).start()
+    scanner.open()
+    try:
+        pipeline = scanner.run(walker, on_batch, on_progress)
+        send(pipeline)
+        stats = {"files": pipeline.files_done, "errors": walker.errors, "dirs": walker.dirs_scanned}
+        if scanner.cache:
+            stats.update(cache_hits=scanner.cache.hits, cache_misses=scanner.cache.misses)
+    except Exception as e:
+        logging.error(f"Erro no worker {worker_id}: {str(e)}")
+    finally:
+        scanner.close()
+        outbox.put(("done", worker_id, stats))
+
+
+class ShardCoordinator:
+    # Distribui os shards, arbitra o roubo de trabalho e junta os resultados num fluxo só (thread chamador)
+    def __init__(self, root, scanner_options, processes=None, threads_per_process=THREADS_PER_PROCESS):
+        self.root = os.path.abspath(root)
+        self.scanner_options = scanner_options
+        self.processes = max(1, processes or DEFAULT_PROCESSES)
+        self.threads_per_process = threads_per_process
+        self.context = multiprocessing.get_context("spawn")  # Seguro com threads (GUI, SQLite) no pai
+        self.cancel_event = self.context.Event()
+        self.pool = []  # Shards ainda sem dono
+        self.idle = set()
+        self.stealing = None  # Worker de quem se espera uma doação
+        self.pending = {}  # worker -> diretórios pendentes informados por último
+        self.counters = {}  # worker -> (encontrados, concluídos, bytes)
+        self.stats = {}
+        self.totals = {"files": 0, "suspicious": 0, "errors": 0, "skipped": 0}
+        self.steals = 0
+        self.walk_done = False
+        self.incomplete = False
+
+    @property
+    def is_running(self):
+        return not self.cancel_event.is_set()
+
+    @property
+    def files_found(self):
+        return sum(c[0] for c in self.counters.values())
+
+    @property
+    def files_done(self):
+        return sum(c[1] for c in self.counters.values())
+
+    @property
+    def bytes_done(self):
+        return sum(c[2] for c in self.counters.values())
+
+    def stop(self):
+        self.cancel_event.set()
+
+    def _initial_shards(self, walker):
+        # Arquivos da raiz num shard só de arquivos; cada subdiretório vira um shard
+        if walker.root_excluded():
+            return []
+        subdirs = []
+        if walker.max_depth is None or walker.max_depth > 0:
+            walker.root_dev = os.stat(self.root).st_dev
+            try:
+                with os.scandir(self.root) as it:
+                    for entry in it:
+                        try:
+                            if entry.is_dir(follow_symlinks=False) and walker._descend(entry, 0):
+                                subdirs.append((entry.path, 1, False))
+                        except OSError:
+                            pass
+            except OSError as e:
+                logging.warning(f"Sem acesso a {self.root}: {str(e)}")
+        return [(self.root, 0, True)] + sorted(subdirs)
+
+    def run(self, on_batch, on_progress=None):
+        walk_options = self.scanner_options.get("walk_options") or {}
+        self.pool = self._initial_shards(DirectoryWalker(self.root, **walk_options))
+        outbox = self.context.Queue()
+        inboxes = [self.context.Queue() for _ in range(self.processes)]
+        workers = []
+        for i in range(self.processes):
+            p = self.context.Process(target=_worker_main, name=f"shard-worker-{i}", daemon=True,
+                                     args=(i, self.root, inboxes[i], outbox, self.cancel_event,
+                                           self.scanner_options, self.threads_per_process))
+            p.start()
+            workers.append(p)
+        running = set(range(self.processes))
+        stopping = False
+        try:
+            while running:
+                try:
+                    message = outbox.get(timeout=POLL_INTERVAL)
+                except queue.Empty:
+                    for i in list(running):
+                        if not workers[i].is_alive():
+                            logging.error(f"Worker {i} terminou sem concluir; resultados incompletos")
+                            self.incomplete = True
+                            running.discard(i)
+                            self.idle.add(i)
+                            if self.stealing == i:
+                                self.stealing = None
+                    message = None
+                if message is not None:
+                    self._dispatch(message, on_batch, inboxes, running)
+                if not stopping and (self.cancel_event.is_set() or self._finished()):
+                    stopping = True
+                    self.walk_done = True
+                    for i in running:
+                        inboxes[i].put(("stop",))
+                if on_progress:
+                    on_progress(self)
+        finally:
+            for p in workers:
+                p.join(timeout=5)
+                if p.is_alive():
+                    p.terminate()
+        hits = sum(s.get("cache_hits", 0) for s in self.stats.values())
+        misses = sum(s.get("cache_misses", 0) for s in self.stats.values())
+        logging.info(f"Escaneamento em {self.processes} processos: {self.totals['files']} arquivos, "
+                     f"{self.steals} roubos de trabalho, cache: {hits} reaproveitados, {misses} calculados")
+        return self
+
+    def _finished(self):
+        return not self.pool and self.stealing is None and len(self.idle) == self.processes
+
+    def _dispatch(self, message, on_batch, inboxes, running):
+        kind, worker = message[0], message[1]
+        if kind == "results":
+            batch = message[2] if self.is_running else []  # Depois do cancelamento nada é entregue
+            self.pending[worker] = message[3]
+            self.counters[worker] = message[4:7]
+            for result in batch:
+                self.totals["files"] += 1
+                status = result["status"]
+                if status == "Suspicious":
+                    self.totals["suspicious"] += 1
+                elif status == "Skipped":
+                    self.totals["skipped"] += 1
+                elif status != "Clean":
+                    self.totals["errors"] += 1
+            if batch:
+                on_batch(batch)
+        elif kind == "idle":
+            self.idle.add(worker)
+            self.pending[worker] = 0
+        elif kind == "donate":
+            self.stealing = None
+            if message[2]:
+                self.steals += 1
+                self.pool.extend(tuple(shard) for shard in message[2])
+            self.pending[worker] = max(0, self.pending.get(worker, 0) - len(message[2]))
+        elif kind == "done":
+            self.stats[worker] = message[2]
+            running.discard(worker)
+            return
+        if self.is_running:
+            self._assign(inboxes, running)
+
+    def _assign(self, inboxes, running):
+        for worker in sorted(self.idle):
+            if not self.pool:
+                break
+            if worker in running:
+                self.idle.discard(worker)
+                inboxes[worker].put(("shard", *self.pool.pop(0)))
+        if self.idle & running and not self.pool and self.stealing is None:
+            # Rouba do worker com mais diretórios pendentes
+            busy = [(n, w) for w, n in self.pending.items() if w in running and w not in self.idle and n > 0]
+            if busy:
+                self.stealing = max(busy)[1]
+                inboxes[self.stealing].put(("steal",))
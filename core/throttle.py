@@ -0,0 +1,192 @@
+import os
+import time
+import ctypes
+import ctypes.util
+import logging
+import platform
+import threading
+
+# Escaneamento em segundo plano com impacto limitado: token bucket de bytes/s e arquivos/s,
+# prioridade de CPU/IO dos workers e recuo quando a carga ou o iowait do sistema passam do limite.
+
+SAMPLE_INTERVAL = 1.0  # Segundos entre leituras de /proc/loadavg e /proc/stat
+MIN_SCALE = 1 / 32  # Menor fração do limite configurado durante o recuo
+RECOVER_FACTOR = 1.25  # Recuperação por amostra abaixo do limite (a queda é pela metade)
+PAUSE_STEP = 0.1
+MAX_PAUSE = 5.0  # Mesmo sob carga contínua cada worker avança um bloco a cada MAX_PAUSE segundos
+
+_IOPRIO_CLASS_IDLE = 3
+_IOPRIO_CLASS_SHIFT = 13
+_IOPRIO_WHO_PROCESS = 1  # Com o id do thread, vale só para ele
+_SYS_IOPRIO_SET = {"x86_64": 251, "amd64": 251, "i386": 289, "i686": 289, "aarch64": 30, "armv7l": 314}
+
+_libc = None
+
+
+def _get_libc():
+    global _libc
+    if _libc is None:
+        _libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+    return _libc
+
+
+def set_idle_io_priority():
+    # Equivalente a "ionice -c3" para o thread chamador (Linux)
+    number = _SYS_IOPRIO_SET.get(platform.machine().lower())
+    if platform.system() != "Linux" or number is None:
+        return False
+    ioprio = _IOPRIO_CLASS_IDLE << _IOPRIO_CLASS_SHIFT
+    if _get_libc().syscall(number, _IOPRIO_WHO_PROCESS, threading.get_native_id(), ioprio) != 0:
+        logging.warning(f"ioprio_set falhou: {os.strerror(ctypes.get_errno())}")
+        return False
+    return True
+
+
+def read_load():
+    # Carga média de 1 minuto por CPU
+    with open("/proc/loadavg") as f:
+        return float(f.read().split()[0]) / (os.cpu_count() or 1)
+
+
+def read_cpu_times():
+    # (iowait, total) acumulados desde o boot
+    with open("/proc/stat") as f:
+        fields = [int(v) for v in f.readline().split()[1:]]
+    return fields[4], sum(fields[:8])
+
+
+class TokenBucket:
+    def __init__(self, rate, burst=None):
+        self.rate = rate  # Tokens por segundo
+        self.burst = burst or rate  # Capacidade: um segundo de tokens
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, n, scale=1.0, should_stop=None):
+        # Bloqueia até haver n tokens; pedidos maiores que a capacidade ficam devendo (saldo negativo)
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                rate = self.rate * scale
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * rate)
+                self.updated = now
+                if self.tokens > 0:
+                    self.tokens -= n
+                    return
+                delay = -self.tokens / rate
+            if should_stop is not None and should_stop():
+                return
+            time.sleep(min(delay, PAUSE_STEP))
+
+
+class Throttle:
+    # Compartilhado pelos workers de um escaneamento; limites None ficam desativados
+    def __init__(self, bytes_per_sec=None, files_per_sec=None, max_load=None, max_iowait=None,
+                 idle_priority=False, nice=None):
+        self.bytes = TokenBucket(bytes_per_sec) if bytes_per_sec else None
+        self.files = TokenBucket(files_per_sec) if files_per_sec else None
+        self.max_load = max_load  # Carga de 1 minuto por CPU
+        self.max_iowait = max_iowait  # Fração do tempo de CPU em iowait (0-1)
+        self.idle_priority = idle_priority  # SCHED_IDLE + ionice idle
+        self.nice = nice
+        self.scale = 1.0
+        self.overloaded = False
+        self.load = None
+        self.iowait = None
+        self.lock = threading.Lock()
+        self.last_sample = 0.0
+        self.last_cpu = None
+        self.throttled_time = 0.0  # Segundos que os workers passaram esperando
+
+    @property
+    def enabled(self):
+        return bool(self.bytes or self.files or self.max_load or self.max_iowait)
+
+    def apply_priority(self):
+        # Chamado no início de cada thread worker: no Linux nice e política de escalonamento são por thread
+        if self.nice:
+            try:
+                os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), self.nice)
+            except (AttributeError, OSError) as e:
+                logging.warning(f"Não foi possível ajustar o nice do worker: {str(e)}")
+        if self.idle_priority:
+            if hasattr(os, "SCHED_IDLE"):
+                try:
+                    os.sched_setscheduler(0, os.SCHED_IDLE, os.sched_param(0))
+                except OSError as e:
+                    logging.warning(f"SCHED_IDLE indisponível: {str(e)}")
+            set_idle_io_priority()
+
+    def _sample(self):
+        now = time.monotonic()
+        with self.lock:
+            if now - self.last_sample < SAMPLE_INTERVAL:
+                return
+            self.last_sample = now
+            try:
+                if self.max_load:
+                    self.load = read_load()
+                if self.max_iowait:
+                    cpu = read_cpu_times()
+                    if self.last_cpu is not None and cpu[1] > self.last_cpu[1]:
+                        self.iowait = (cpu[0] - self.last_cpu[0]) / (cpu[1] - self.last_cpu[1])
+                    self.last_cpu = cpu
+            except (OSError, ValueError, IndexError):
+                return  # Sem /proc: só os limites fixos valem
+            overloaded = bool((self.max_load and self.load is not None and self.load > self.max_load) or
+                              (self.max_iowait and self.iowait is not None and self.iowait > self.max_iowait))
+            if overloaded:
+                self.scale = max(MIN_SCALE, self.scale / 2)
+            else:
+                self.scale = min(1.0, self.scale * RECOVER_FACTOR)
+            if overloaded != self.overloaded:
+                self.overloaded = overloaded
+                logging.info(f"Escaneamento {'recuando' if overloaded else 'retomando'}: {self.describe()}")
+
+    def _wait(self, bucket, n, should_stop):
+        start = time.monotonic()
+        if self.max_load or self.max_iowait:
+            self._sample()
+            # Sem limite fixo, o recuo é uma pausa até a carga voltar ao normal
+            while bucket is None and self.overloaded and not (should_stop and should_stop()):
+                if time.monotonic() - start >= MAX_PAUSE:
+                    break
+                time.sleep(PAUSE_STEP)
+                self._sample()
+        if bucket is not None:
+            bucket.acquire(n, self.scale, should_stop)
+        waited = time.monotonic() - start
+        if waited > 0.001:
+            with self.lock:
+                self.throttled_time += waited
+
+    def wait_bytes(self, n, should_stop=None):
+        if self.bytes or self.max_load or self.max_iowait:
+            self._wait(self.bytes, n, should_stop)
+
+    def wait_file(self, should_stop=None):
+        if self.files:
+            self._wait(self.files, 1, should_stop)
+
+    def state(self):
+        return {"scale": self.scale, "overloaded": self.overloaded, "load": self.load, "iowait": self.iowait,
+                "throttled_time": self.throttled_time,
+                "bytes_per_sec": self.bytes.rate * self.scale if self.bytes else None,
+                "files_per_sec": self.files.rate * self.scale if self.files else None}
+
+    def describe(self):
+        parts = []
+        if self.overloaded:
+            parts.append("pausado" if not (self.bytes or self.files) else f"reduzido a {self.scale:.0%}")
+        elif self.bytes or self.files:
+            parts.append("limitado" if self.scale >= 1 else f"recuperando ({self.scale:.0%})")
+        if self.bytes:
+            parts.append(f"{self.bytes.rate * self.scale / (1024 * 1024):.1f} MB/s")
+        if self.files:
+            parts.append(f"{self.files.rate * self.scale:.0f} arquivos/s")
+        if self.load is not None:
+            parts.append(f"carga {self.load:.2f}")
+        if self.iowait is not None:
+            parts.append(f"iowait {self.iowait:.0%}")
+        return ", ".join(parts)
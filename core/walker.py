@@ -0,0 +1,201 @@
+import os
+import re
+import stat
+import fnmatch
+import logging
+
+DEFAULT_EXCLUDED_PATHS = ("/proc", "/sys", "/dev") if os.name == "posix" else ()
+
+
+class DirectoryWalker:
+    # Percorre a árvore em uma única passada com os.scandir, reaproveitando o stat do DirEntry
+    def __init__(self, root, exclude_globs=(), exclude_paths=DEFAULT_EXCLUDED_PATHS, max_depth=None,
+                 same_filesystem=False):
+        self.root = os.path.abspath(root)
+        self.exclude_paths = {os.path.abspath(p) for p in exclude_paths}
+        self.exclude_re = None
+        if exclude_globs:
+            self.exclude_re = re.compile("|".join(fnmatch.translate(g) for g in exclude_globs))
+        self.max_depth = max_depth
+        self.same_filesystem = same_filesystem
+        self.root_dev = None
+        self.dirs_scanned = 0
+        self.errors = 0
+
+    def _excluded(self, path, name):
+        if path in self.exclude_paths:
+            return True
+        if self.exclude_re is not None:
+            return bool(self.exclude_re.match(name) or self.exclude_re.match(path))
+        return False
+
+    def _under_excluded_path(self, path):
+        while path not in self.exclude_paths:
+            parent = os.path.dirname(path)
+            if parent == path:
+                return False
+            path = parent
+        return True
+
+    def root_excluded(self):
+        # Raiz sob exclude_paths (ex.: /proc/self ou /sys/class com as exclusões padrão): nada a percorrer
+        if self._under_excluded_path(self.root):
+            logging.warning(f"{self.root} está sob um caminho excluído (--exclude-path); nada a escanear")
+            return True
+        return False
+
+    def excludes(self, path, st=None):
+        # Caminho avulso sob root (evento do monitor, lista de caminhos): True se a travessia de root não o
+        # geraria. Cada componente abaixo de root passa por _excluded, como na descida, e valem max_depth e
+        # same_filesystem
+        path = os.path.abspath(path)
+        if path == self.root:
+            return False
+        prefix = self.root.rstrip(os.sep) + os.sep
+        if not path.startswith(prefix):
+            return True
+        names = path[len(prefix):].split(os.sep)
+        current = self.root
+        for name in names:
+            current = os.path.join(current, name)
+            if self._excluded(current, name):
+                return True
+        if self.max_depth is None and not self.same_filesystem:
+            return False
+        try:
+            st = st or os.lstat(path)
+            if self.root_dev is None:
+                self.root_dev = os.stat(self.root).st_dev
+        except OSError:
+            return False  # Removido: quem for ler trata
+        # Arquivos de um diretório na profundidade max_depth ainda são gerados, os subdiretórios dele não
+        depth = len(names) if stat.S_ISDIR(st.st_mode) else len(names) - 1
+        if self.max_depth is not None and depth > self.max_depth:
+            return True
+        return self.same_filesystem and st.st_dev != self.root_dev
+
+    def _descend(self, entry, depth):
+        if self.max_depth is not None and depth >= self.max_depth:
+            return False
+        if self._excluded(entry.path, entry.name):
+            return False
+        if self.same_filesystem and entry.stat(follow_symlinks=False).st_dev != self.root_dev:
+            return False
+        return True
+
+    def walk(self, should_stop=None):
+        try:
+            root_st = os.stat(self.root)
+        except OSError as e:
+            logging.error(f"Diretório inválido: {self.root}: {str(e)}")
+            self.errors += 1
+            return
+        self.root_dev = root_st.st_dev
+        if self.root_excluded():
+            return
+        if stat.S_ISREG(root_st.st_mode):
+            # Arquivo avulso: os mesmos filtros que teria na listagem do diretório
+            if not self._excluded(self.root, os.path.basename(self.root)):
+                yield self.root, root_st
+            return
+        stack = [(self.root, 0)]
+        while stack:
+            if should_stop is not None and should_stop():
+                return
+            directory, depth = stack.pop()
+            subdirs = []
+            yield from self._list_dir(directory, depth, subdirs)
+            stack.extend(reversed(subdirs))
+
+    def _list_dir(self, directory, depth, subdirs, files_only=False):
+        # Gera os arquivos de um diretório e acumula em subdirs os subdiretórios a descer
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if not files_only and self._descend(entry, depth):
+                                subdirs.append((entry.path, depth + 1))
+                        elif entry.is_file(follow_symlinks=False):
+                            # Links simbólicos, FIFOs e dispositivos não são lidos
+                            if self.exclude_re is not None and self._excluded(entry.path, entry.name):
+                                continue
+                            yield entry.path, entry.stat(follow_symlinks=False)
+                    except OSError as e:
+                        logging.warning(f"Erro ao ler {entry.path}: {str(e)}")
+                        self.errors += 1
+        except OSError as e:
+            logging.warning(f"Sem acesso a {directory}: {str(e)}")
+            self.errors += 1
+            return
+        self.dirs_scanned += 1
+
+    def visit_directories(self, visit, should_stop=None):
+        # Chama visit(diretório) em pré-ordem; se visit retornar False a subárvore é podada
+        try:
+            self.root_dev = os.stat(self.root).st_dev
+        except OSError as e:
+            logging.warning(f"Sem acesso a {self.root}: {str(e)}")
+            return
+        if self.root_excluded():
+            return
+        stack = [(self.root, 0)]
+        while stack:
+            if should_stop is not None and should_stop():
+                return
+            directory, depth = stack.pop()
+            if visit(directory) is False:
+                continue
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        try:
+                            if entry.is_dir(follow_symlinks=False) and self._descend(entry, depth):
+                                stack.append((entry.path, depth + 1))
+                        except OSError:
+                            self.errors += 1
+            except OSError as e:
+                logging.warning(f"Sem acesso a {directory}: {str(e)}")
+                self.errors += 1
+
+
+class PathListWalker:
+    # Percorre só uma lista de caminhos (arquivos ou subárvores), ex.: os alterados no modo monitor.
+    # Com roots, cada caminho passa pelos mesmos filtros da travessia da raiz que o contém
+    def __init__(self, paths, roots=None, **walk_options):
+        self.paths = list(paths)
+        self.walk_options = walk_options
+        # A raiz mais específica primeiro
+        self.scopes = sorted((DirectoryWalker(r, **walk_options) for r in roots or ()), key=lambda w: len(w.root),
+                             reverse=True)
+        try:
+            self.root = os.path.commonpath(self.paths) if self.paths else ""
+        except ValueError:
+            self.root = ""
+        self.errors = 0
+
+    def _scope(self, path):
+        for scope in self.scopes:
+            if path == scope.root or path.startswith(scope.root.rstrip(os.sep) + os.sep):
+                return scope
+        return None
+
+    def walk(self, should_stop=None):
+        for path in self.paths:
+            if should_stop is not None and should_stop():
+                return
+            if not os.path.lexists(path):
+                continue  # Removido antes do escaneamento
+            path = os.path.abspath(path)
+            walk_options = self.walk_options
+            if self.scopes:
+                scope = self._scope(path)
+                if scope is None or scope.excludes(path):
+                    continue
+                if scope.max_depth is not None and path != scope.root:
+                    # Subárvore: a profundidade continua contando a partir da raiz
+                    depth = path[len(scope.root.rstrip(os.sep)) + 1:].count(os.sep) + 1
+                    walk_options = dict(walk_options, max_depth=scope.max_depth - depth)
+            walker = DirectoryWalker(path, **walk_options)
+            yield from walker.walk(should_stop)
+            self.errors += walker.errors
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+# CLI sem interface gráfica (não importa PyQt5):
+#   ./foxter.py scan /srv/dados --workers 8 --exclude '*.iso' > resultados.jsonl
+#   ./foxter.py watch /srv/uploads
+#   ./foxter.py history --diff 42
+#   ./foxter.py quarantine add /tmp/suspeito.bin && ./foxter.py quarantine restore 7
+# Códigos de saída: 0 = limpo, 1 = ameaças encontradas, 2 = erros / uso inválido
+import os
+import sys
+import json
+import time
+import signal
+import logging
+import argparse
+
+EXIT_CLEAN = 0
+EXIT_THREATS = 1
+EXIT_ERROR = 2
+PROGRESS_INTERVAL = 10.0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="foxter", description="Foxter Security - scanner de arquivos")
+    parser.add_argument("-v", "--verbose", action="count", default=0, help="Mais logs em stderr (-vv para debug)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def add_scan_options(p):
+        p.add_argument("paths", nargs="+", metavar="PATH", help="Arquivos ou diretórios")
+        p.add_argument("--workers", type=int, default=None, help="Threads de hash (padrão: automático)")
+        p.add_argument("--exclude", action="append", default=[], metavar="GLOB",
+                       help="Ignora arquivos/diretórios que casam com o padrão (repetível)")
+        p.add_argument("--exclude-path", action="append", default=None, metavar="PATH",
+                       help="Ignora a subárvore (repetível; padrão: /proc, /sys, /dev)")
+        p.add_argument("--max-depth", type=int, default=None, help="Profundidade máxima de diretórios")
+        p.add_argument("--one-file-system", action="store_true", help="Não atravessa pontos de montagem")
+        p.add_argument("--cache", default=None, metavar="PATH", help="Caminho do cache incremental")
+        p.add_argument("--no-cache", action="store_true", help="Desativa o cache incremental")
+        p.add_argument("--history", default=None, metavar="PATH", help="Banco do histórico de escaneamentos")
+        p.add_argument("--no-history", action="store_true", help="Não grava o escaneamento no histórico")
+        p.add_argument("--signatures", default=None, metavar="PATH", help="Base de assinaturas SHA-256 (.fsig)")
+        p.add_argument("--digests", default=None, metavar="ALGS", help="Ex.: sha256 ou md5,sha1,sha256")
+        p.add_argument("--policy", action="append", default=[], metavar="TIPO=AÇÃO",
+                       help="Ação por tipo de arquivo, ex.: media=skip, archive=full "
+                            "(ações: high, full, low, header, skip; repetível)")
+        p.add_argument("--no-sniff", action="store_true",
+                       help="Não classifica pelo cabeçalho: escaneia tudo por completo, na ordem da travessia")
+        p.add_argument("--no-archives", action="store_true",
+                       help="Não escaneia o conteúdo de zip/tar/gz/bz2/xz (só o arquivo compactado em si)")
+        p.add_argument("--archive-depth", type=int, default=None, metavar="N",
+                       help="Níveis de compactados aninhados (padrão: 3)")
+        p.add_argument("--archive-max-mb", type=int, default=None, metavar="MB",
+                       help="Máximo descompactado por arquivo compactado (padrão: 512)")
+        p.add_argument("--archive-max-members", type=int, default=None, metavar="N",
+                       help="Máximo de membros por arquivo compactado (padrão: 10000)")
+        p.add_argument("--archive-max-ratio", type=int, default=None, metavar="N",
+                       help="Taxa de compressão máxima antes de abortar, contra zip bombs (padrão: 200)")
+        p.add_argument("--max-mbps", type=float, default=None, metavar="MB",
+                       help="Limite de leitura em MB/s (por processo)")
+        p.add_argument("--max-files-per-sec", type=float, default=None, metavar="N", help="Limite de arquivos/s")
+        p.add_argument("--max-load", type=float, default=None, metavar="CARGA",
+                       help="Recua quando a carga de 1 minuto por CPU passar disso (ex.: 0.8)")
+        p.add_argument("--max-iowait", type=float, default=None, metavar="PCT",
+                       help="Recua quando o iowait do sistema passar desse percentual (ex.: 20)")
+        p.add_argument("--idle-priority", action="store_true",
+                       help="Workers com SCHED_IDLE e ionice idle (Linux)")
+        p.add_argument("--nice", type=int, default=None, metavar="N", help="Nice dos workers (ex.: 19)")
+        p.add_argument("--only-suspicious", action="store_true", help="Só imprime arquivos suspeitos e erros")
+
+    scan = sub.add_parser("scan", help="Escaneia os caminhos e imprime um JSON por arquivo")
+    add_scan_options(scan)
+    journal = scan.add_mutually_exclusive_group()  # Sem diário não há o que retomar
+    journal.add_argument("--resume", action="store_true",
+                         help="Retoma um escaneamento interrompido do diretório (requer um único diretório)")
+    journal.add_argument("--no-checkpoint", action="store_true", help="Não grava o diário de retomada")
+    scan.add_argument("--processes", type=int, default=None, metavar="N",
+                      help="Divide um único diretório entre N processos, com roubo de trabalho (sem --resume)")
+    watch = sub.add_parser("watch", help="Monitora os diretórios e escaneia arquivos novos/alterados (Linux)")
+    add_scan_options(watch)
+    watch.add_argument("--debounce", type=float, default=1.0, help="Segundos de silêncio antes de escanear")
+
+    history = sub.add_parser("history", help="Consulta o histórico (sem opções: lista os últimos escaneamentos)")
+    history.add_argument("--history", default=None, metavar="PATH", help="Banco do histórico de escaneamentos")
+    history.add_argument("--limit", type=int, default=20, help="Quantidade de escaneamentos listados")
+    query = history.add_mutually_exclusive_group()
+    query.add_argument("--digest", metavar="HEX", help="Escaneamentos e caminhos em que o digest apareceu")
+    query.add_argument("--diff", type=int, metavar="SCAN", help="Diferenças em relação ao escaneamento anterior")
+    query.add_argument("--export", type=int, metavar="SCAN", help="Exporta os resultados do escaneamento")
+    history.add_argument("--against", type=int, default=None, metavar="SCAN", help="Base do --diff")
+    history.add_argument("-o", "--output", metavar="PATH", help="Arquivo do --export")
+    history.add_argument("--format", choices=("txt", "csv", "jsonl"), default="jsonl", help="Formato do --export")
+    history.add_argument("--only-suspicious", action="store_true", help="Só exporta arquivos suspeitos")
+    quarantine = sub.add_parser("quarantine", help="Quarentena: list, add CAMINHO..., restore ID..., delete ID...")
+    quarantine.add_argument("action", choices=("list", "add", "restore", "delete"))
+    quarantine.add_argument("targets", nargs="*", help="Caminhos (add) ou ids (restore/delete)")
+    quarantine.add_argument("--dir", default=None, metavar="PATH", help="Diretório da quarentena")
+    quarantine.add_argument("--all", action="store_true", help="restore/delete de todos os itens")
+    quarantine.add_argument("--to", default=None, metavar="DIR", help="Restaura em DIR em vez do caminho original")
+    quarantine.add_argument("--overwrite", action="store_true", help="Restaura mesmo se o destino existir")
+    return parser
+
+
+def scanner_options(args):
+    from infra.scan_cache import DEFAULT_CACHE_PATH
+    from infra.signature_db import DEFAULT_SIGNATURE_DB_PATH
+    from infra.scan_history import DEFAULT_HISTORY_PATH
+    from core.walker import DEFAULT_EXCLUDED_PATHS
+    from core.file_types import parse_policies
+    from core.archive_scanner import ArchiveLimits
+    options = {
+        "workers": args.workers,
+        "cache_path": None if args.no_cache else (args.cache or DEFAULT_CACHE_PATH),
+        "signature_db_path": args.signatures or DEFAULT_SIGNATURE_DB_PATH,
+        "history_path": None if args.no_history else (args.history or DEFAULT_HISTORY_PATH),
+        "walk_options": {
+            "exclude_globs": args.exclude,
+            "exclude_paths": DEFAULT_EXCLUDED_PATHS if args.exclude_path is None else args.exclude_path,
+            "max_depth": args.max_depth,
+            "same_filesystem": args.one_file_system,
+        },
+    }
+    if args.no_sniff:
+        options["file_policies"] = None
+    elif args.policy:
+        options["file_policies"] = parse_policies(args.policy)
+    if args.no_archives:
+        options["scan_archives"] = False
+    else:
+        limits = ArchiveLimits()
+        if args.archive_depth is not None:
+            limits.max_depth = args.archive_depth
+        if args.archive_max_mb is not None:
+            limits.max_expanded = args.archive_max_mb * 1024 * 1024
+        if args.archive_max_members is not None:
+            limits.max_members = args.archive_max_members
+        if args.archive_max_ratio is not None:
+            limits.max_ratio = args.archive_max_ratio
+        options["archive_limits"] = limits
+    throttle = {
+        "bytes_per_sec": args.max_mbps * 1024 * 1024 if args.max_mbps else None,
+        "files_per_sec": args.max_files_per_sec,
+        "max_load": args.max_load,
+        "max_iowait": args.max_iowait / 100 if args.max_iowait else None,
+        "idle_priority": args.idle_priority,
+        "nice": args.nice,
+    }
+    if any(throttle.values()):
+        options["throttle_options"] = throttle
+    if getattr(args, "no_checkpoint", False):
+        options["checkpoint_dir"] = None
+    if args.digests:
+        options["digest_algorithms"] = tuple(a.strip() for a in args.digests.split(",") if a.strip())
+    return options
+
+
+class JsonlSink:
+    def __init__(self, stream, only_suspicious=False, on_closed=None):
+        self.stream = stream
+        self.only_suspicious = only_suspicious
+        self.on_closed = on_closed  # Chamado se o leitor fechar a saída (ex.: | head)
+        self.closed = False
+        self.total = 0
+        self.suspicious = 0
+        self.errors = 0
+
+    def __call__(self, batch):
+        lines = []
+        for result in batch:
+            self.total += 1
+            status = result["status"]
+            if status == "Suspicious":
+                self.suspicious += 1
+            elif status.startswith("Error"):
+                self.errors += 1
+            elif self.only_suspicious:
+                continue
+            lines.append(json.dumps(result, ensure_ascii=False))
+        if lines and not self.closed:
+            try:
+                self.stream.write("\n".join(lines) + "\n")
+                self.stream.flush()
+            except BrokenPipeError:
+                self.closed = True
+                # Evita um segundo BrokenPipeError no flush da saída ao encerrar
+                os.dup2(os.open(os.devnull, os.O_WRONLY), self.stream.fileno())
+                if self.on_closed:
+                    self.on_closed()
+
+    def exit_code(self):
+        if self.suspicious:
+            return EXIT_THREATS
+        return EXIT_ERROR if self.errors else EXIT_CLEAN
+
+
+class ProgressLog:
+    # Progresso em stderr (com -v) a cada PROGRESS_INTERVAL segundos, com o estado do limitador
+    def __init__(self, scanner):
+        self.scanner = scanner
+        self.last = time.monotonic()
+
+    def __call__(self, pipeline):
+        if time.monotonic() - self.last < PROGRESS_INTERVAL:
+            return
+        self.last = time.monotonic()
+        message = (f"Progresso: {pipeline.files_done}/{pipeline.files_found} arquivos, "
+                   f"{pipeline.bytes_done / (1024 * 1024):.1f} MB")
+        throttle = self.scanner.throttle
+        if throttle is not None and throttle.enabled:
+            message += f" ({throttle.describe()})"
+        logging.info(message)
+
+
+def print_jsonl(rows):
+    for row in rows:
+        sys.stdout.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+
+def run_history(args):
+    from infra.scan_history import ScanHistory, DEFAULT_HISTORY_PATH, VERDICTS
+    path = args.history or DEFAULT_HISTORY_PATH
+    if not os.path.exists(path):
+        logging.error(f"Histórico inexistente: {path}")
+        return EXIT_ERROR
+    history = ScanHistory(path)
+    try:
+        if args.digest:
+            print_jsonl({"scan": s, "host": h, "started": t, "path": p, "status": VERDICTS[v]}
+                        for s, h, t, p, v in history.find_digest(args.digest.lower()))
+        elif args.diff is not None:
+            print_jsonl({"change": c, "path": p, "old": VERDICTS[o] if o is not None else None,
+                         "new": VERDICTS[n] if n is not None else None}
+                        for c, p, o, n in history.diff(args.diff, args.against))
+        elif args.export is not None:
+            if not args.output:
+                logging.error("--export exige -o/--output")
+                return EXIT_ERROR
+            count = history.export(args.export, args.output, args.format, 1 if args.only_suspicious else None)
+            logging.info(f"{count} arquivos exportados para {args.output}")
+        else:
+            columns = ("scan", "host", "root", "kind", "started", "finished", "status", "files", "suspicious",
+                       "errors")
+            print_jsonl(dict(zip(columns, row)) for row in history.scans(args.limit))
+    except ValueError as e:
+        logging.error(str(e))
+        return EXIT_ERROR
+    finally:
+        history.close()
+    return EXIT_CLEAN
+
+
+def run_quarantine(args):
+    from infra.quarantine import QuarantineStore, QuarantineError, DEFAULT_QUARANTINE_DIR
+    try:
+        store = QuarantineStore(args.dir or DEFAULT_QUARANTINE_DIR)
+    except (OSError, QuarantineError) as e:
+        logging.error(str(e))
+        return EXIT_ERROR
+    try:
+        if args.action == "list":
+            print_jsonl(store.items())
+            return EXIT_CLEAN
+        if args.action == "add":
+            results = store.quarantine_many(args.targets)
+            print_jsonl({"path": p, "id": i, "error": e or None} for p, i, e in results)
+            return EXIT_ERROR if any(e for _, _, e in results) or not results else EXIT_CLEAN
+        if args.all:
+            ids = [item["id"] for item in store.items()]
+        else:
+            try:
+                ids = [int(t) for t in args.targets]
+            except ValueError:
+                logging.error("restore/delete esperam ids numéricos (veja 'quarantine list')")
+                return EXIT_ERROR
+        if args.action == "delete":
+            logging.info(f"{store.delete_many(ids)} itens descartados")
+            return EXIT_CLEAN
+        results = store.restore_many(ids, args.to, args.overwrite)
+        print_jsonl({"id": i, "path": p, "error": e or None} for i, p, e in results)
+        return EXIT_ERROR if any(e for _, _, e in results) else EXIT_CLEAN
+    finally:
+        store.close()
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    level = logging.WARNING if args.verbose == 0 else logging.INFO if args.verbose == 1 else logging.DEBUG
+    logging.basicConfig(stream=sys.stderr, level=level, format="%(asctime)s - %(levelname)s - %(message)s")
+    if args.command == "history":
+        return run_history(args)
+    if args.command == "quarantine":
+        return run_quarantine(args)
+
+    missing = [p for p in args.paths if not os.path.exists(p)]
+    if missing:
+        logging.error(f"Caminho inexistente: {', '.join(missing)}")
+        return EXIT_ERROR
+    from core.scanner import Scanner
+    try:
+        scanner = Scanner(**scanner_options(args))
+    except ValueError as e:
+        logging.error(str(e))
+        return EXIT_ERROR
+    sink = JsonlSink(sys.stdout, args.only_suspicious, on_closed=scanner.stop)
+    # SIGINT/SIGTERM: cancelamento limpo (o cache é gravado)
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: scanner.stop())
+    progress = ProgressLog(scanner)
+    scanner.open()
+    try:
+        if args.command == "watch":
+            scanner.watch([os.path.abspath(p) for p in args.paths], sink, debounce=args.debounce)
+        elif args.processes and len(args.paths) == 1 and os.path.isdir(args.paths[0]):
+            if args.resume:
+                logging.warning("--resume não vale com --processes; escaneando do início")
+            pipeline = scanner.scan_sharded(os.path.abspath(args.paths[0]), sink, progress,
+                                            processes=args.processes)
+            if pipeline.incomplete:
+                return EXIT_ERROR
+        elif len(args.paths) == 1 and os.path.isdir(args.paths[0]):
+            # Diretório único: escaneamento com diário de retomada
+            scanner.scan(os.path.abspath(args.paths[0]), sink, progress, resume=args.resume)
+        else:
+            if args.resume:
+                logging.warning("--resume só vale para um único diretório; escaneando do início")
+            scanner.scan_paths([os.path.abspath(p) for p in args.paths], sink, progress)
+    except OSError as e:
+        logging.error(str(e))
+        return EXIT_ERROR
+    finally:
+        scanner.close()
+    if scanner.resumed_files and scanner.last_scan_id is not None:
+        # Retomada: o código de saída considera também o que foi escaneado antes da interrupção
+        from infra.scan_history import ScanHistory
+        history = ScanHistory(scanner.history_path)
+        try:
+            row = history.get_scan(scanner.last_scan_id)
+        finally:
+            history.close()
+        if row:
+            sink.total, sink.suspicious, sink.errors = row[7:10]
+    logging.info(f"{sink.total} arquivos, {sink.suspicious} suspeitos, {sink.errors} erros")
+    if sink.closed:
+        return sink.exit_code()
+    if not scanner.is_running and args.command == "scan":
+        return EXIT_ERROR  # Interrompido: resultado incompleto
+    return sink.exit_code()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
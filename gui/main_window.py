@@ -5,7 +5,8 @@ import platform
 import shutil
 from PyQt5.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QStackedWidget,
-    QFileDialog, QLabel, QSlider, QTreeWidget, QTreeWidgetItem, QFrame, QAction, QMessageBox, QApplication
+    QFileDialog, QLabel, QSlider, QTreeWidget, QTreeWidgetItem, QFrame, QAction, QMessageBox, QApplication,
+    QTableView, QHeaderView, QAbstractItemView, QCheckBox
 )
 from PyQt5.QtGui import QIcon, QFont
 from PyQt5.QtCore import Qt, QTimer
@@ -13,16 +14,25 @@ from core.firewall_checker import FirewallChecker
 from core.port_checker import PortChecker
 from core.user_checker import UserChecker
 from core.process_checker import ProcessAnalyzer
-from core.file_scanner import FileScannerThread
+from core.file_scanner import FileScannerThread, FileWatcherThread, ReportExportThread, QuarantineThread
+from core.file_watcher import is_supported as watch_supported
+from infra.notifier import notify
 from infra.signature_db import MALICIOUS_SIGNATURES
+from infra.scan_history import ScanHistory
+from infra.quarantine import DEFAULT_QUARANTINE_DIR
+from core.result_store import STATUS_SUSPICIOUS
+from core.archive_scanner import container_path
+from core.throttle import Throttle
+from gui.scan_results_model import ScanResultsModel, ScanResultsProxy
+from gui.process_monitor import ProcessWatcherThread
 
 # Configuração de logging
 logging.basicConfig(filename="antivirus.log", level=logging.WARNING,
                     format="%(asctime)s - %(levelname)s - %(message)s")
 
-QUARANTINE_DIR = os.path.join(os.path.dirname(__file__), "quarantine")
-if not os.path.exists(QUARANTINE_DIR):
-    os.makedirs(QUARANTINE_DIR, exist_ok=True)
+# "Baixo impacto": CPU/disco ociosos e pausa com carga acima de 1 por CPU ou iowait acima de 20%
+LOW_IMPACT_THROTTLE = {"idle_priority": True, "max_load": 1.0, "max_iowait": 0.2}
+
 
 class NeonButton(QPushButton):
     def __init__(self, text, parent=None):
@@ -62,7 +72,7 @@ class StatusLabel(QLabel):
         self.setWordWrap(True)
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, scan_workers=None):
         super().__init__()
         self.setWindowTitle("Foxter Security - Antivírus")
         if os.path.exists("icon.png"):
@@ -77,7 +87,7 @@ class MainWindow(QMainWindow):
                 font-family: Arial;
                 font-size: 12pt;
             }
-            QTreeWidget {
+            QTreeWidget, QTableView {
                 background-color: #2C3E50;
                 color: #FFFFFF;
                 border: 1px solid #00CED1;
@@ -85,7 +95,7 @@ class MainWindow(QMainWindow):
                 font-family: Arial;
                 font-size: 10pt;
             }
-            QTreeWidget::item:hover {
+            QTreeWidget::item:hover, QTableView::item:hover {
                 background-color: #34495E;
             }
             QSlider::groove:horizontal {
@@ -106,6 +116,12 @@ class MainWindow(QMainWindow):
 
         # Inicialização
         self.file_scanner = None
+        self.file_watcher = None
+        self.scan_workers = scan_workers
+        self.scan_history = None  # Conexão do thread da GUI, para registrar ações
+        self.report_exporter = None
+        self.quarantine_worker = None
+        self.quarantine_rows = {}  # Caminho -> linhas da tabela aguardando a quarentena
         self.firewall_checker = FirewallChecker()
         self.port_checker = PortChecker()
         self.user_checker = UserChecker()
@@ -170,7 +186,8 @@ class MainWindow(QMainWindow):
         self.monitor_interval = 60000
         self.real_time_check = QTimer()  # Correção: Definido como real_time_check
         self.real_time_check.timeout.connect(self.check_suspicious_processes)
-        self.real_time_check.start(self.monitor_interval)
+        self.process_watcher = None
+        self.start_process_monitor()
 
     def setup_scanner_panel(self):
         controls_widget = QWidget()
@@ -184,10 +201,16 @@ class MainWindow(QMainWindow):
         select_dir_btn.clicked.connect(self.select_directory)
         controls_layout.addWidget(select_dir_btn)
 
-        scan_btn = NeonButton("Iniciar Escaneamento")
-        scan_btn.setToolTip("Escanear arquivos")
-        scan_btn.clicked.connect(self.run_file_scan)
-        controls_layout.addWidget(scan_btn)
+        self.scan_btn = NeonButton("Iniciar Escaneamento")
+        self.scan_btn.setToolTip("Escanear arquivos (clique de novo para parar; pode ser retomado depois)")
+        self.scan_btn.clicked.connect(self.run_file_scan)
+        controls_layout.addWidget(self.scan_btn)
+
+        self.watch_btn = NeonButton("Monitorar em Tempo Real")
+        self.watch_btn.setToolTip("Escanear arquivos novos ou alterados no diretório (Linux)")
+        self.watch_btn.setEnabled(watch_supported())
+        self.watch_btn.clicked.connect(self.toggle_watch)
+        controls_layout.addWidget(self.watch_btn)
 
         self.scanner_status = StatusLabel("Aguardando escaneamento...")
         controls_layout.addWidget(self.scanner_status)
@@ -197,19 +220,45 @@ class MainWindow(QMainWindow):
         save_report_btn.clicked.connect(self.save_report)
         controls_layout.addWidget(save_report_btn)
 
+        self.low_impact_check = QCheckBox("Baixo impacto")
+        self.low_impact_check.setToolTip("Prioridade ociosa de CPU/disco e pausa quando o sistema estiver carregado")
+        self.low_impact_check.setStyleSheet("color: #FFFFFF;")
+        controls_layout.addWidget(self.low_impact_check)
+
+        self.suspicious_only_check = QCheckBox("Somente suspeitos")
+        self.suspicious_only_check.setStyleSheet("color: #FFFFFF;")
+        self.suspicious_only_check.toggled.connect(self.filter_scan_results)
+        controls_layout.addWidget(self.suspicious_only_check)
+
         self.scanner_layout.addWidget(controls_widget)
 
-        self.scan_results_tree = QTreeWidget()
-        self.scan_results_tree.setHeaderLabels(["Arquivo", "Status", "Ação"])
-        self.scan_results_tree.setColumnWidth(0, 300)
-        self.scan_results_tree.setContextMenuPolicy(Qt.ActionsContextMenu)
+        # Model/view: memória proporcional aos dados, sem um QTreeWidgetItem por arquivo
+        self.scan_results_model = ScanResultsModel(self)
+        self.scan_results_proxy = ScanResultsProxy(self)
+        self.scan_results_proxy.setSourceModel(self.scan_results_model)
+        self.scan_results_proxy.rowsAboutToBeInserted.connect(self.check_scan_results_follow)
+        self.scan_results_proxy.rowsInserted.connect(self.follow_scan_results)
+        self.scan_results_follow = True
+        self.scan_results_view = QTableView()
+        self.scan_results_view.setModel(self.scan_results_proxy)
+        self.scan_results_view.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.scan_results_view.setShowGrid(False)
+        self.scan_results_view.setWordWrap(False)
+        self.scan_results_view.verticalHeader().hide()
+        self.scan_results_view.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.scan_results_view.verticalHeader().setDefaultSectionSize(22)
+        self.scan_results_view.horizontalHeader().setStretchLastSection(True)
+        self.scan_results_view.setColumnWidth(0, 300)
+        self.scan_results_view.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.scan_results_view.setSortingEnabled(True)
+        self.scan_results_view.setContextMenuPolicy(Qt.ActionsContextMenu)
         self.quarantine_action = QAction("Mover para Quarentena", self)
         self.quarantine_action.triggered.connect(self.quarantine_file)
         self.delete_action = QAction("Excluir", self)
         self.delete_action.triggered.connect(self.delete_file)
-        self.scan_results_tree.addAction(self.quarantine_action)
-        self.scan_results_tree.addAction(self.delete_action)
-        self.scanner_layout.addWidget(self.scan_results_tree)
+        self.scan_results_view.addAction(self.quarantine_action)
+        self.scan_results_view.addAction(self.delete_action)
+        self.scanner_layout.addWidget(self.scan_results_view)
 
     def setup_firewall_panel(self):
         controls_widget = QWidget()
@@ -287,6 +336,11 @@ class MainWindow(QMainWindow):
         self.interval_slider.valueChanged.connect(self.update_monitor_interval)
         controls_layout.addWidget(self.interval_slider)
 
+        self.monitor_btn = NeonButton("Parar Monitoramento")
+        self.monitor_btn.setToolTip("Verificação periódica e eventos de processos")
+        self.monitor_btn.clicked.connect(self.toggle_process_monitor)
+        controls_layout.addWidget(self.monitor_btn)
+
         self.processes_status = StatusLabel("Aguardando verificação...")
         controls_layout.addWidget(self.processes_status)
 
@@ -332,8 +386,10 @@ class MainWindow(QMainWindow):
         default_dir = "/home" if platform.system() != "Windows" else "C:\\"
         directory = QFileDialog.getExistingDirectory(self, "Selecionar Diretório", default_dir)
         if directory:
-            self.file_scanner = FileScannerThread(directory=directory)
-            self.scan_results_tree.clear()
+            # A tabela já guarda os resultados; a thread não precisa de uma segunda cópia
+            self.file_scanner = FileScannerThread(directory=directory, keep_results=False,
+                                                  workers=self.scan_workers)
+            self.scan_results_model.clear()
             self.scanner_status.setText(f"Diretório selecionado: {directory}")
             logging.info(f"Diretório selecionado: {directory}")
 
@@ -341,75 +397,227 @@ class MainWindow(QMainWindow):
         if not self.file_scanner:
             self.scanner_status.setText("Erro: Selecione um diretório!")
             return
-        self.scan_results_tree.clear()
-        self.scanner_status.setText("Escaneando...")
+        if self.file_scanner.isRunning():
+            self.file_scanner.stop()  # O diário é gravado: o escaneamento pode ser retomado
+            self.scanner_status.setText("Parando escaneamento...")
+            return
+        if self.file_scanner.isFinished():
+            # QThread não reinicia com o scanner parado: cria um novo para o mesmo diretório
+            self.file_scanner = FileScannerThread(directory=self.file_scanner.directory, keep_results=False,
+                                                  workers=self.scan_workers)
+        checkpoint = self.file_scanner.scanner.checkpoint(self.file_scanner.directory)
+        if checkpoint:
+            answer = QMessageBox.question(
+                self, "Retomar Escaneamento",
+                f"Há um escaneamento interrompido de {self.file_scanner.directory} "
+                f"({checkpoint.get('files_done', 0)} arquivos concluídos). Retomar de onde parou?",
+                QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes
+            )
+            self.file_scanner.resume = answer == QMessageBox.Yes
+        self.file_scanner.scanner.throttle = (Throttle(**LOW_IMPACT_THROTTLE) if self.low_impact_check.isChecked()
+                                              else None)
+        self.scan_results_model.clear()
+        self.scanner_status.setText("Retomando escaneamento..." if self.file_scanner.resume else "Escaneando...")
+        self.scan_btn.setText("Parar Escaneamento")
+        self.scan_bytes = 0
+        self.scan_files = (0, 0)
+        self.scan_throttle = ""
+        self.file_scanner.files_progress.connect(self.update_files_progress)
+        self.file_scanner.throttle_state.connect(self.update_throttle_state)
+        self.file_scanner.bytes_progress.connect(self.update_bytes_progress)
         self.file_scanner.progress.connect(self.update_progress)
         self.file_scanner.batch_scanned.connect(self.update_scan_result)
         self.file_scanner.finished.connect(self.display_scan_results)
         self.file_scanner.start()
 
+    def toggle_watch(self):
+        if self.file_watcher and self.file_watcher.isRunning():
+            self.file_watcher.stop()
+            self.watch_btn.setText("Monitorar em Tempo Real")
+            self.scanner_status.setText("Monitoramento encerrado.")
+            return
+        if not self.file_scanner:
+            self.scanner_status.setText("Erro: Selecione um diretório!")
+            return
+        directory = self.file_scanner.directory
+        self.file_watcher = FileWatcherThread(directory, keep_results=False, workers=self.scan_workers)
+        self.file_watcher.batch_scanned.connect(self.update_watch_result)
+        self.file_watcher.start()
+        self.watch_btn.setText("Parar Monitoramento")
+        self.scanner_status.setText(f"Monitorando: {directory}")
+        logging.info(f"Monitoramento iniciado: {directory}")
+
+    def update_watch_result(self, batch):
+        self.update_scan_result(batch)
+        suspicious = [r["path"] for r in batch if r["status"] == "Suspicious"]
+        if suspicious:
+            self.scanner_status.setText(f"Ameaça detectada: {suspicious[0]}")
+            notify("Foxter Security", f"{len(suspicious)} arquivo(s) suspeito(s): {suspicious[0]}")
+
     def update_progress(self, value):
-        self.scanner_status.setText(f"Progresso: {value}%")
+        done, found = self.scan_files
+        text = f"Progresso: {value}% ({done}/{found} arquivos, {self.scan_bytes / (1024 * 1024):.1f} MB)"
+        if self.scan_throttle:
+            text += f"\nBaixo impacto: {self.scan_throttle}"
+        self.scanner_status.setText(text)
+
+    def update_throttle_state(self, state):
+        self.scan_throttle = state
+
+    def update_files_progress(self, done, found):
+        self.scan_files = (done, found)
+
+    def update_bytes_progress(self, total_bytes):
+        self.scan_bytes = total_bytes
 
     def update_scan_result(self, batch):
-        for result in batch:
-            item = QTreeWidgetItem([result["path"], result["status"], ""])
-            self.scan_results_tree.addTopLevelItem(item)
-        self.scan_results_tree.scrollToBottom()
+        self.scan_results_model.append_batch(batch)  # Inserido em lote pelo timer do modelo
+
+    def check_scan_results_follow(self, *_):
+        # Só acompanha o fim da lista se o usuário não tiver rolado para cima
+        bar = self.scan_results_view.verticalScrollBar()
+        self.scan_results_follow = bar.value() >= bar.maximum()
+
+    def follow_scan_results(self, *_):
+        if self.scan_results_follow:
+            self.scan_results_view.scrollToBottom()
+
+    def filter_scan_results(self, suspicious_only):
+        self.scan_results_model.flush()
+        self.scan_results_proxy.set_suspicious_only(suspicious_only)
 
     def display_scan_results(self, results):
-        suspicious = [r for r in results if r["status"] == "Suspicious"]
-        self.scanner_status.setText(f"Concluído: {len(suspicious)} ameaças encontradas.")
-        item = QTreeWidgetItem([f"Total: {len(results)}", "", ""])
-        self.scan_results_tree.addTopLevelItem(item)
-        item = QTreeWidgetItem([f"Ameaças: {len(suspicious)}", "", ""])
-        self.scan_results_tree.addTopLevelItem(item)
-        logging.info(f"Escaneamento: {len(results)} total, {len(suspicious)} suspeitos")
+        self.scan_btn.setText("Iniciar Escaneamento")
+        self.scan_results_model.flush()
+        if self.scan_results_proxy.sort_column >= 0:
+            self.scan_results_proxy.invalidate()  # Reordena as linhas recebidas durante o escaneamento
+        store = self.scan_results_model.store
+        suspicious = store.count(STATUS_SUSPICIOUS)
+        if self.file_scanner and not self.file_scanner.is_running:
+            self.scanner_status.setText(f"Interrompido: {suspicious} ameaças em {len(store)} arquivos. "
+                                        f"Clique em Iniciar Escaneamento para retomar.")
+        else:
+            self.scanner_status.setText(f"Concluído: {suspicious} ameaças encontradas em {len(store)} arquivos.")
+        logging.info(f"Escaneamento: {len(store)} total, {suspicious} suspeitos")
+
+    def selected_suspicious_rows(self):
+        store = self.scan_results_model.store
+        rows = [self.scan_results_proxy.source_row(index)
+                for index in self.scan_results_view.selectionModel().selectedRows()]
+        return [row for row in rows if store.status_code(row) == STATUS_SUSPICIOUS and not store.action(row)]
 
     def quarantine_file(self):
-        item = self.scan_results_tree.currentItem()
-        if item and item.text(1) == "Suspicious":
-            path = item.text(0)
-            try:
-                dest = os.path.join(QUARANTINE_DIR, os.path.basename(path))
-                shutil.move(path, dest)
-                item.setText(2, "Em quarentena")
-                self.scanner_status.setText(f"{path} movido para quarentena.")
-                logging.info(f"Quarentena: {path}")
-            except Exception as e:
-                self.scanner_status.setText(f"Erro: {str(e)}")
-                logging.error(f"Erro quarentena: {str(e)}")
+        if self.quarantine_worker and self.quarantine_worker.isRunning():
+            self.scanner_status.setText("Quarentena em andamento...")
+            return
+        store = self.scan_results_model.store
+        self.quarantine_rows = {}
+        for row in self.selected_suspicious_rows():
+            path = container_path(store.path(row))  # Membro de compactado: age sobre o arquivo que o contém
+            self.quarantine_rows.setdefault(path, []).append(row)
+        if not self.quarantine_rows:
+            return
+        self.scanner_status.setText(f"Movendo {len(self.quarantine_rows)} arquivos para quarentena...")
+        self.quarantine_worker = QuarantineThread(DEFAULT_QUARANTINE_DIR, paths=list(self.quarantine_rows))
+        self.quarantine_worker.item_done.connect(self.quarantine_item_done)
+        self.quarantine_worker.finished.connect(self.quarantine_finished)
+        self.quarantine_worker.start()
+
+    def quarantine_item_done(self, path, item_id, error):
+        if error:
+            self.scanner_status.setText(f"Erro: {error}")
+            return
+        action = f"Em quarentena (#{item_id})"
+        for row in self.quarantine_rows.pop(path, []):
+            self.scan_results_model.set_action(row, action)
+        self.record_action(path, action)
+
+    def quarantine_finished(self, done, errors):
+        message = f"{done} arquivos movidos para quarentena."
+        if errors:
+            message += f" {errors} erros (veja o log)."
+        self.scanner_status.setText(message)
+        self.quarantine_rows = {}
 
     def delete_file(self):
-        item = self.scan_results_tree.currentItem()
-        if item and item.text(1) == "Suspicious":
-            path = item.text(0)
+        store = self.scan_results_model.store
+        for row in self.selected_suspicious_rows():
+            path = container_path(store.path(row))
             try:
                 os.remove(path)
-                item.setText(2, "Excluído")
+                self.scan_results_model.set_action(row, "Excluído")
+                self.record_action(path, "Excluído")
                 self.scanner_status.setText(f"{path} excluído.")
                 logging.info(f"Excluído: {path}")
             except Exception as e:
                 self.scanner_status.setText(f"Erro: {str(e)}")
                 logging.error(f"Erro exclusão: {str(e)}")
 
+    def last_scan(self):
+        # (caminho do histórico, id) do último escaneamento gravado, ou (None, None)
+        scanner = self.file_scanner.scanner if self.file_scanner else None
+        if scanner is None or not scanner.history_path or scanner.last_scan_id is None:
+            return None, None
+        return scanner.history_path, scanner.last_scan_id
+
+    def record_action(self, path, action):
+        history_path, scan_id = self.last_scan()
+        if scan_id is None:
+            return
+        try:
+            if self.scan_history is None:
+                self.scan_history = ScanHistory(history_path)
+            self.scan_history.set_action(scan_id, path, action)
+        except Exception as e:
+            logging.error(f"Erro ao registrar ação no histórico: {str(e)}")
+
     def save_report(self):
-        if self.scan_results_tree.topLevelItemCount() == 0:
+        self.scan_results_model.flush()
+        store = self.scan_results_model.store
+        if len(store) == 0:
             self.scanner_status.setText("Erro: Nenhum resultado!")
             return
+        if self.report_exporter and self.report_exporter.isRunning():
+            self.scanner_status.setText("Exportação em andamento...")
+            return
+        history_path, scan_id = self.last_scan()
+        if scan_id is not None:
+            file_name, _ = QFileDialog.getSaveFileName(
+                self, "Salvar Relatório", "", "Text Files (*.txt);;CSV (*.csv);;JSON Lines (*.jsonl)"
+            )
+            if file_name:
+                # Exportação em streaming a partir do histórico, fora do thread da GUI
+                fmt = os.path.splitext(file_name)[1].lstrip(".").lower()
+                self.report_exporter = ReportExportThread(history_path, scan_id, file_name,
+                                                          fmt if fmt in ("csv", "jsonl") else "txt")
+                self.report_exporter.exported.connect(self.report_exported)
+                self.report_exporter.start()
+                self.scanner_status.setText(f"Exportando relatório para {file_name}...")
+            return
         file_name, _ = QFileDialog.getSaveFileName(self, "Salvar Relatório", "", "Text Files (*.txt)")
         if file_name:
             try:
                 with open(file_name, "w") as f:
-                    for i in range(self.scan_results_tree.topLevelItemCount()):
-                        item = self.scan_results_tree.topLevelItem(i)
-                        f.write(f"{item.text(0)} - {item.text(1)} - {item.text(2)}\n")
+                    for path, status, action, digest_text in store:
+                        line = f"{path} - {status} - {action}"
+                        if digest_text:
+                            line += " - " + digest_text
+                        f.write(line + "\n")
+                    f.write(f"Total: {len(store)}\n")
+                    f.write(f"Ameaças: {store.count(STATUS_SUSPICIOUS)}\n")
                 self.scanner_status.setText("Relatório salvo!")
                 logging.info(f"Relatório: {file_name}")
             except Exception as e:
                 self.scanner_status.setText(f"Erro: {str(e)}")
                 logging.error(f"Erro relatório: {str(e)}")
 
+    def report_exported(self, count, error):
+        if error:
+            self.scanner_status.setText(f"Erro: {error}")
+        elif count is not None:
+            self.scanner_status.setText(f"Relatório salvo! ({count} arquivos)")
+            logging.info(f"Relatório: {self.report_exporter.out_path}")
+
     def check_firewall_status(self):
         status, threats = self.firewall_checker.check_status()
         texto = "Active" if status else "Inactive"
@@ -474,12 +682,51 @@ class MainWindow(QMainWindow):
         self.processes_tree.clear()
         processes = self.process_analyzer.detect_suspicious()
         for p in processes:
-            solution = "Encerrar via menu"
+            solution = f"{p['motivo'].capitalize()}: encerrar via menu"
             item = QTreeWidgetItem([str(p["pid"]), p["name"], p["username"], solution])
             self.processes_tree.addTopLevelItem(item)
         self.processes_status.setText(f"{len(processes)} ameaças suspeitas")
         logging.info(f"Processos: {len(processes)} suspeitos")
 
+    def start_process_monitor(self):
+        self.real_time_check.start(self.monitor_interval)
+        # Entre as verificações: processos novos (inclusive os de vida curta) conferidos assim que aparecem
+        self.process_watcher = ProcessWatcherThread()
+        self.process_watcher.events.connect(self.process_events)
+        self.process_watcher.start()
+        self.monitor_btn.setText("Parar Monitoramento")
+
+    def stop_process_monitor(self):
+        self.real_time_check.stop()
+        if self.process_watcher is not None:
+            self.process_watcher.stop()
+            self.process_watcher.wait(2000)
+            self.process_watcher = None
+        self.monitor_btn.setText("Iniciar Monitoramento")
+
+    def toggle_process_monitor(self):
+        if self.real_time_check.isActive():
+            self.stop_process_monitor()
+            self.processes_status.setText("Monitoramento parado")
+            logging.info("Monitoramento de processos parado")
+        else:
+            self.start_process_monitor()
+            self.processes_status.setText("Monitoramento ativo")
+            logging.info("Monitoramento de processos iniciado")
+
+    def process_events(self, events):
+        processes = self.process_analyzer.apply_events(events)
+        for p in processes:
+            if p.get("encerrado"):
+                solution = f"{p['motivo'].capitalize()}: já encerrado ({p['arquivo']})"
+            else:
+                solution = f"{p['motivo'].capitalize()}: encerrar via menu"
+            item = QTreeWidgetItem([str(p["pid"]), p["name"], p["username"], solution])
+            self.processes_tree.addTopLevelItem(item)
+        if processes:
+            self.processes_status.setText(f"Processo suspeito: {processes[0]['name']} (PID {processes[0]['pid']})")
+            notify("Foxter Security", f"{len(processes)} processo(s) suspeito(s): {processes[0]['name']}")
+
     def terminate_process(self):
         item = self.processes_tree.currentItem()
         if item:
@@ -516,6 +763,19 @@ class MainWindow(QMainWindow):
                 self.users_status.setText(f"Erro: {str(e)}")
                 logging.error(f"Erro remover {username}: {str(e)}")
 
+    def closeEvent(self, event):
+        self.stop_process_monitor()
+        # Threads ainda rodando não podem ser destruídas com a janela: pede a parada e espera terminarem
+        # (o escaneamento grava o diário de retomada ao parar)
+        threads = [self.file_watcher, self.file_scanner, self.quarantine_worker, self.report_exporter]
+        for thread in threads:
+            if thread is not None and thread.isRunning():
+                thread.stop()
+        for thread in threads:
+            if thread is not None:
+                thread.wait()
+        super().closeEvent(event)
+
     def update_monitor_interval(self, value):
         self.monitor_interval = value * 1000
         self.real_time_check.setInterval(self.monitor_interval)
@@ -0,0 +1,21 @@
+import logging
+from PyQt5.QtCore import QThread, pyqtSignal
+from core.process_watcher import ProcessWatcher
+
+
+class ProcessWatcherThread(QThread):
+    # Eventos de processos (core/process_watcher.py) entregues em lotes; o ProcessAnalyzer roda na thread da GUI
+    events = pyqtSignal(list)
+
+    def __init__(self, **watch_options):
+        super().__init__()
+        self.watcher = ProcessWatcher(self.events.emit, **watch_options)
+
+    def run(self):
+        try:
+            self.watcher.run()
+        except Exception as e:
+            logging.error(f"Erro nos eventos de processos: {str(e)}")
+
+    def stop(self):
+        self.watcher.stop()
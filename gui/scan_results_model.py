@@ -0,0 +1,188 @@
+from array import array
+from PyQt5.QtCore import Qt, QTimer, QModelIndex, QAbstractTableModel, QAbstractProxyModel
+from core.result_store import ScanResults, STATUS_SUSPICIOUS
+
+FLUSH_INTERVAL_MS = 16  # Inserções agrupadas no máximo uma vez por frame (~60 fps)
+
+
+class ScanResultsModel(QAbstractTableModel):
+    # Modelo virtual: a view só consulta as linhas visíveis; os dados ficam no ScanResults colunar
+    COLUMNS = ["Arquivo", "Status", "Ação"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.store = ScanResults()
+        self.pending = []
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setInterval(FLUSH_INTERVAL_MS)
+        self.flush_timer.timeout.connect(self.flush)
+
+    def append_batch(self, batch):
+        self.pending.extend(batch)
+        if not self.flush_timer.isActive():
+            self.flush_timer.start()
+
+    def flush(self):
+        self.flush_timer.stop()
+        if not self.pending:
+            return
+        first = len(self.store)
+        self.beginInsertRows(QModelIndex(), first, first + len(self.pending) - 1)
+        self.store.extend(self.pending)
+        self.pending = []
+        self.endInsertRows()
+
+    def clear(self):
+        self.flush_timer.stop()
+        self.beginResetModel()
+        self.store = ScanResults()
+        self.pending = []
+        self.endResetModel()
+
+    def set_action(self, row, action):
+        self.store.set_action(row, action)
+        index = self.index(row, 2)
+        self.dataChanged.emit(index, index, [Qt.DisplayRole])
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.store)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row, column = index.row(), index.column()
+        if role == Qt.DisplayRole:
+            if column == 0:
+                return self.store.path(row)
+            if column == 1:
+                return self.store.status(row)
+            return self.store.action(row)
+        if role == Qt.ToolTipRole and column == 0:
+            return self.store.digest_text(row).replace(" ", "\n") or None
+        if role == Qt.UserRole:
+            return self.store.digests(row)
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.COLUMNS[section]
+        return None
+
+
+class ScanResultsProxy(QAbstractProxyModel):
+    # Filtro ("só suspeitos") e ordenação por um array de índices da origem.
+    # A ordenação usa sorted() com as chaves colunares do ScanResults, sem lessThan() por comparação.
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows = array("l")  # linha do proxy -> linha da origem
+        self.inverse = None  # linha da origem -> linha do proxy (-1 se filtrada), construído sob demanda
+        self.suspicious_only = False
+        self.sort_column = -1
+        self.sort_order = Qt.AscendingOrder
+
+    def setSourceModel(self, model):
+        self.beginResetModel()
+        super().setSourceModel(model)
+        model.rowsInserted.connect(self._on_rows_inserted)
+        model.modelReset.connect(self.invalidate)
+        model.dataChanged.connect(self._on_data_changed)
+        self._rebuild()
+        self.endResetModel()
+
+    def set_suspicious_only(self, enabled):
+        self.suspicious_only = bool(enabled)
+        self.invalidate()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.sort_column = column
+        self.sort_order = order
+        self.invalidate()
+
+    def invalidate(self):
+        self.beginResetModel()
+        self._rebuild()
+        self.endResetModel()
+
+    def _accepted(self, first, last):
+        statuses = self.sourceModel().store.statuses
+        if self.suspicious_only:
+            return [row for row in range(first, last + 1) if statuses[row] == STATUS_SUSPICIOUS]
+        return range(first, last + 1)
+
+    def _rebuild(self):
+        source = self.sourceModel()
+        rows = self._accepted(0, len(source.store) - 1) if source is not None else []
+        key = source.store.sort_key(self.sort_column) if source is not None else None
+        if key is not None:
+            rows = sorted(rows, key=key, reverse=self.sort_order == Qt.DescendingOrder)
+        self.rows = array("l", rows)
+        self.inverse = None
+
+    def _on_rows_inserted(self, parent, first, last):
+        # Durante o escaneamento as linhas novas entram no fim; a ordenação é refeita com invalidate()
+        new = self._accepted(first, last)
+        if not new:
+            return
+        start = len(self.rows)
+        self.beginInsertRows(QModelIndex(), start, start + len(new) - 1)
+        self.rows.extend(new)
+        if self.inverse is not None:
+            self.inverse.extend([-1] * (last + 1 - len(self.inverse)))
+            for i, row in enumerate(new, start):
+                self.inverse[row] = i
+        self.endInsertRows()
+
+    def _on_data_changed(self, top_left, bottom_right, roles=()):
+        for row in range(top_left.row(), bottom_right.row() + 1):
+            index = self.mapFromSource(self.sourceModel().index(row, top_left.column()))
+            if index.isValid():
+                last = index.sibling(index.row(), bottom_right.column())
+                self.dataChanged.emit(index, last, roles)
+
+    def mapToSource(self, index):
+        if not index.isValid() or index.row() >= len(self.rows):
+            return QModelIndex()
+        return self.sourceModel().index(self.rows[index.row()], index.column())
+
+    def mapFromSource(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        if self.inverse is None:
+            self.inverse = array("l", [-1]) * len(self.sourceModel().store)
+            for i, row in enumerate(self.rows):
+                self.inverse[row] = i
+        row = self.inverse[index.row()] if index.row() < len(self.inverse) else -1
+        return self.index(row, index.column()) if row >= 0 else QModelIndex()
+
+    def source_row(self, index):
+        return self.rows[index.row()]
+
+    def index(self, row, column, parent=QModelIndex()):
+        if parent.isValid() or row < 0 or row >= len(self.rows) or column < 0:
+            return QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index=None):
+        if index is None:
+            return super().parent()  # QObject.parent()
+        return QModelIndex()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid() or self.sourceModel() is None:
+            return 0
+        return self.sourceModel().columnCount()
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        # Sem isto o QAbstractProxyModel mapeia o cabeçalho por uma linha do proxy: vazio sem linhas visíveis
+        if orientation == Qt.Horizontal:
+            source = self.sourceModel()
+            return source.headerData(section, orientation, role) if source is not None else None
+        if role == Qt.DisplayRole:
+            return section + 1  # Posição no proxy, não a linha da origem
+        return None
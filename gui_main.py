@@ -1,12 +1,20 @@
 from gui.main_window import MainWindow
 from PyQt5.QtWidgets import QApplication
+import argparse
 import sys
 
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Foxter Security")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Número de threads de hash do scanner (padrão: automático)")
+    return parser.parse_known_args(argv)
+
 def main():
-    app = QApplication(sys.argv)
-    window = MainWindow()
+    args, qt_args = parse_args(sys.argv[1:])
+    app = QApplication(sys.argv[:1] + qt_args)
+    window = MainWindow(scan_workers=args.workers)
     window.show()
     sys.exit(app.exec_())
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,429 @@
+import os
+import stat
+import errno
+import time
+import uuid
+import zlib
+import struct
+import sqlite3
+import hashlib
+import logging
+import threading
+
+# Quarentena endereçada por conteúdo: cada arquivo vira objects/<sha[:2]>/<sha256>, comprimido em streaming
+# e desarmado (cabeçalho próprio + XOR: não executa, não é reconhecido pelo tipo nem volta a disparar
+# padrões de conteúdo). Cópias idênticas compartilham o objeto. O índice SQLite guarda caminho original,
+# modo, dono e datas para a restauração.
+#
+# Mesmo sistema de arquivos: rename para incoming/ (o arquivo some do lugar na hora) e a compressão vem
+# depois. Outro dispositivo: o original perde a permissão de execução e é copiado em streaming; só é
+# apagado depois que o objeto está no disco.
+
+DEFAULT_QUARANTINE_DIR = os.path.join(os.path.expanduser("~"), ".foxter", "quarantine")
+SCHEMA_VERSION = "1"
+READ_SIZE = 1024 * 1024
+COMPRESS_LEVEL = 6
+SYNC_EVERY = 64  # Objetos gravados entre o fsync dos diretórios e a remoção das origens correspondentes
+
+MAGIC = b"FOXQ"
+FORMAT_VERSION = 1
+XOR_KEY = 0xA5
+_HEADER = struct.Struct("<4sBBxxQ")  # magic, versão, chave XOR, tamanho original
+
+STATE_STAGED = "staged"  # Em incoming/, aguardando compressão
+STATE_COPYING = "copying"  # Original ainda no lugar (outro dispositivo)
+STATE_STORED = "stored"
+STATE_RESTORED = "restored"
+STATE_DELETED = "deleted"
+
+_COLUMNS = ("id", "sha256", "path", "size", "mode", "uid", "gid", "mtime_ns", "quarantined", "state", "updated")
+
+_XOR_TABLE = bytes(b ^ XOR_KEY for b in range(256))
+
+
+def _xor(data):
+    # XOR byte a byte com a chave: uma tabela de tradução fixa, sem memória por tamanho de chunk
+    return data.translate(_XOR_TABLE)
+
+
+def _fsync_dir(directory):
+    # Garante que as renomeações no diretório chegaram ao disco (como em core/checkpoint.py)
+    if hasattr(os, "O_DIRECTORY"):
+        fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+class QuarantineError(Exception):
+    pass
+
+
+class QuarantineStore:
+    def __init__(self, directory=DEFAULT_QUARANTINE_DIR):
+        self.directory = directory
+        self.objects_dir = os.path.join(directory, "objects")
+        self.incoming_dir = os.path.join(directory, "incoming")
+        self.tmp_dir = os.path.join(directory, "tmp")
+        for d in (self.objects_dir, self.incoming_dir, self.tmp_dir):
+            os.makedirs(d, mode=0o700, exist_ok=True)
+        os.chmod(directory, 0o700)
+        self.dev = os.stat(self.incoming_dir).st_dev
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(directory, "index.db"), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        meta = dict(self.conn.execute("SELECT key, value FROM meta").fetchall())
+        if meta.get("schema") not in (None, SCHEMA_VERSION):
+            # Nada é descartado: sem o índice os objetos não teriam como voltar ao lugar
+            self.conn.close()
+            raise QuarantineError(f"Índice da quarentena com esquema {meta.get('schema')} desconhecido")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS items ("
+            "id INTEGER PRIMARY KEY, sha256 TEXT, path TEXT NOT NULL, size INTEGER, mode INTEGER, "
+            "uid INTEGER, gid INTEGER, mtime_ns INTEGER, quarantined REAL, state TEXT NOT NULL, "
+            "updated REAL, staged TEXT)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS items_sha256 ON items (sha256)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS items_state ON items (state)")
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('schema', ?)", (SCHEMA_VERSION,))
+        self.conn.commit()
+        self.recover()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def object_path(self, sha256):
+        return os.path.join(self.objects_dir, sha256[:2], sha256)
+
+    # --- índice ---
+
+    def _execute(self, sql, params=()):
+        with self.lock:
+            with self.conn:
+                return self.conn.execute(sql, params)
+
+    def _set_state(self, rows):
+        # rows: [(estado, sha256, id)]
+        now = time.time()
+        with self.lock:
+            with self.conn:
+                self.conn.executemany("UPDATE items SET state = ?, sha256 = COALESCE(?, sha256), updated = ?, "
+                                      "staged = NULL WHERE id = ?",
+                                      [(state, sha256, now, item_id) for state, sha256, item_id in rows])
+
+    def items(self, state=STATE_STORED, limit=None):
+        sql = f"SELECT {', '.join(_COLUMNS)} FROM items"
+        params = []
+        if state is not None:
+            sql += " WHERE state = ?"
+            params.append(state)
+        sql += " ORDER BY id"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self.lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [dict(zip(_COLUMNS, row)) for row in rows]
+
+    def get(self, item_id):
+        with self.lock:
+            row = self.conn.execute(f"SELECT {', '.join(_COLUMNS)} FROM items WHERE id = ?",
+                                    (item_id,)).fetchone()
+        return dict(zip(_COLUMNS, row)) if row else None
+
+    def _referenced_locked(self, sha256):
+        # Itens em andamento contam: o sha256 é gravado na linha antes de o objeto ser ligado (_write_object)
+        return self.conn.execute("SELECT 1 FROM items WHERE sha256 = ? AND state IN (?, ?, ?) LIMIT 1",
+                                 (sha256, STATE_STORED, STATE_STAGED, STATE_COPYING)).fetchone() is not None
+
+    def _drop_unreferenced(self, digests):
+        # Consulta e unlink sob o lock: uma quarentena do mesmo conteúdo não pode se apoiar no objeto no meio
+        with self.lock:
+            for sha256 in set(digests):
+                if not self._referenced_locked(sha256):
+                    try:
+                        os.unlink(self.object_path(sha256))
+                    except FileNotFoundError:
+                        pass
+
+    # --- objetos ---
+
+    def _write_object(self, src, item_id):
+        # Comprime, desarma e grava o objeto do item; devolve o sha256 do conteúdo original
+        sha = hashlib.sha256()
+        compressor = zlib.compressobj(COMPRESS_LEVEL)
+        tmp_path = os.path.join(self.tmp_dir, uuid.uuid4().hex)
+        size = 0
+        try:
+            with open(src, "rb") as f, open(tmp_path, "wb") as out:
+                os.fchmod(out.fileno(), 0o600)
+                out.write(_HEADER.pack(MAGIC, FORMAT_VERSION, XOR_KEY, 0))
+                while True:
+                    chunk = f.read(READ_SIZE)
+                    if not chunk:
+                        break
+                    sha.update(chunk)
+                    size += len(chunk)
+                    out.write(_xor(compressor.compress(chunk)))
+                out.write(_xor(compressor.flush()))
+                out.seek(0)
+                out.write(_HEADER.pack(MAGIC, FORMAT_VERSION, XOR_KEY, size))
+                out.flush()
+                os.fsync(out.fileno())
+            digest = sha.hexdigest()
+            dest = self.object_path(digest)
+            with self.lock:
+                # A linha passa a referenciar o objeto antes de ele ser reaproveitado ou ligado
+                with self.conn:
+                    self.conn.execute("UPDATE items SET sha256 = ? WHERE id = ?", (digest, item_id))
+                if os.path.exists(dest):
+                    os.unlink(tmp_path)  # Conteúdo já na quarentena
+                else:
+                    os.makedirs(os.path.dirname(dest), mode=0o700, exist_ok=True)
+                    os.replace(tmp_path, dest)
+            return digest
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+    def _read_object(self, sha256, dest):
+        # Descompacta o objeto em dest conferindo o sha256
+        sha = hashlib.sha256()
+        decompressor = zlib.decompressobj()
+        with open(self.object_path(sha256), "rb") as f, open(dest, "wb") as out:
+            header = f.read(_HEADER.size)
+            if len(header) != _HEADER.size:
+                raise QuarantineError(f"Objeto {sha256} corrompido")
+            magic, version, key, size = _HEADER.unpack(header)
+            if magic != MAGIC or version != FORMAT_VERSION or key != XOR_KEY:
+                raise QuarantineError(f"Objeto {sha256} com formato desconhecido")
+            try:
+                while True:
+                    chunk = f.read(READ_SIZE)
+                    data = decompressor.decompress(_xor(chunk), READ_SIZE)
+                    while True:
+                        sha.update(data)
+                        out.write(data)
+                        if not decompressor.unconsumed_tail:
+                            break
+                        data = decompressor.decompress(decompressor.unconsumed_tail, READ_SIZE)
+                    if not chunk:
+                        break
+                data = decompressor.flush()
+            except zlib.error as e:
+                raise QuarantineError(f"Objeto {sha256} corrompido ({str(e)})")
+            sha.update(data)
+            out.write(data)
+            if out.tell() != size or sha.hexdigest() != sha256:
+                raise QuarantineError(f"Objeto {sha256} corrompido")
+
+    # --- quarentena ---
+
+    def quarantine(self, path):
+        results = self.quarantine_many([path])
+        _, item_id, error = results[0]
+        if error:
+            raise QuarantineError(error)
+        return item_id
+
+    def quarantine_many(self, paths, on_item=None, should_stop=None):
+        # Lote: primeiro tira todos do lugar (rename) ou da execução (chmod), depois comprime um a um.
+        # on_item(caminho, id ou None, erro) a cada arquivo concluído; devolve a lista dessas tuplas.
+        results = []
+        staged = []  # (id, origem a ler, caminho original, é rename)
+
+        def done(path, item_id, error=""):
+            results.append((path, item_id, error))
+            if on_item:
+                on_item(path, item_id, error)
+
+        rows = []
+        for path in paths:
+            path = os.path.abspath(path)
+            try:
+                st = os.lstat(path)
+                if not stat.S_ISREG(st.st_mode):
+                    raise QuarantineError(f"{path} não é um arquivo regular")
+                source = None
+                if st.st_dev == self.dev:
+                    source = os.path.join(self.incoming_dir, uuid.uuid4().hex)
+                    try:
+                        os.rename(path, source)
+                        state = STATE_STAGED
+                    except OSError as e:
+                        if e.errno != errno.EXDEV:
+                            raise
+                        source = None  # Mesmo dispositivo em outro ponto de montagem (bind mount): copia
+                if source is None:
+                    source = path
+                    os.chmod(path, stat.S_IMODE(st.st_mode) & ~0o7111 | stat.S_IRUSR)
+                    state = STATE_COPYING
+                rows.append((path, st, state, source))
+            except (OSError, QuarantineError) as e:
+                logging.error(f"Erro ao colocar {path} em quarentena: {str(e)}")
+                done(path, None, str(e))
+        now = time.time()
+        with self.lock:
+            with self.conn:
+                for path, st, state, source in rows:
+                    cursor = self.conn.execute(
+                        "INSERT INTO items (path, size, mode, uid, gid, mtime_ns, quarantined, state, updated, "
+                        "staged) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (path, st.st_size, st.st_mode, st.st_uid, st.st_gid, st.st_mtime_ns, now, state, now,
+                         os.path.basename(source) if state == STATE_STAGED else None))
+                    staged.append((cursor.lastrowid, source, path, state == STATE_STAGED, st.st_mode))
+        self._store_staged(staged, done, should_stop)
+        return results
+
+    def _store_staged(self, staged, done, should_stop=None):
+        written = []  # (id, sha256, origem, caminho original) aguardando o fsync dos diretórios
+
+        def commit():
+            if not written:
+                return
+            # Cada objeto já teve fsync antes do os.replace; falta a entrada no diretório (uma vez por lote)
+            # antes de apagar as origens. objects/ também, por causa dos subdiretórios criados no lote
+            for directory in {os.path.dirname(self.object_path(sha256)) for _, sha256, _, _ in written}:
+                _fsync_dir(directory)
+            _fsync_dir(self.objects_dir)
+            self._set_state([(STATE_STORED, sha256, item_id) for item_id, sha256, _, _ in written])
+            for item_id, sha256, source, path in written:
+                try:
+                    os.unlink(source)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logging.warning(f"Quarentena de {path}: original não removido ({str(e)})")
+                logging.info(f"Quarentena: {path} -> {sha256} (#{item_id})")
+                done(path, item_id)
+            written.clear()
+
+        for item_id, source, path, renamed, mode in staged:
+            if should_stop is not None and should_stop():
+                # Interrompido: o que ainda não foi comprimido volta ao lugar
+                self._revert(item_id, source, path, renamed, mode)
+                done(path, None, "cancelado")
+                continue
+            try:
+                written.append((item_id, self._write_object(source, item_id), source, path))
+            except OSError as e:
+                logging.error(f"Erro ao colocar {path} em quarentena: {str(e)}")
+                self._revert(item_id, source, path, renamed, mode)
+                done(path, None, str(e))
+            if len(written) >= SYNC_EVERY:
+                commit()
+        commit()
+
+    def _revert(self, item_id, source, path, renamed, mode):
+        try:
+            if renamed:
+                if os.path.lexists(path):
+                    raise QuarantineError(f"{path} foi recriado; o original ficou em {source}")
+                os.rename(source, path)
+            else:
+                os.chmod(path, stat.S_IMODE(mode))
+            self._execute("DELETE FROM items WHERE id = ?", (item_id,))
+        except (OSError, QuarantineError) as e:
+            logging.error(f"Não foi possível devolver {path}: {str(e)}")
+
+    def recover(self):
+        # Depois de uma queda: comprime o que ficou em incoming/ e devolve a permissão dos originais em cópia
+        with self.lock:
+            rows = self.conn.execute("SELECT id, path, mode, state, staged FROM items WHERE state IN (?, ?)",
+                                     (STATE_STAGED, STATE_COPYING)).fetchall()
+        if not rows:
+            return
+        logging.warning(f"Quarentena: {len(rows)} itens interrompidos sendo recuperados")
+        staged = []
+        for item_id, path, mode, state, name in rows:
+            if state == STATE_COPYING:
+                self._revert(item_id, path, path, False, mode)
+            elif os.path.exists(os.path.join(self.incoming_dir, name)):
+                staged.append((item_id, os.path.join(self.incoming_dir, name), path, True, mode))
+            else:
+                logging.error(f"Quarentena: {path} (#{item_id}) perdido em incoming/")
+                self._set_state([(STATE_DELETED, None, item_id)])
+        self._store_staged(staged, lambda *_: None)
+
+    # --- restauração ---
+
+    def restore(self, item_id, dest=None, overwrite=False):
+        _, _, error = self.restore_many([item_id], dest, overwrite)[0]
+        if error:
+            raise QuarantineError(error)
+
+    def restore_many(self, item_ids, dest_dir=None, overwrite=False, on_item=None, should_stop=None):
+        # Devolve ao caminho original (ou a dest_dir) com modo, dono e mtime; on_item(id, caminho, erro)
+        results = []
+        freed = []
+        for item_id in item_ids:
+            if should_stop is not None and should_stop():
+                break
+            item = self.get(item_id)
+            path = None
+            try:
+                if item is None or item["state"] != STATE_STORED:
+                    raise QuarantineError(f"Item {item_id} não está na quarentena")
+                path = item["path"] if dest_dir is None else os.path.join(dest_dir, os.path.basename(item["path"]))
+                if os.path.lexists(path) and not overwrite:
+                    raise QuarantineError(f"{path} já existe")
+                directory = os.path.dirname(path)
+                os.makedirs(directory, exist_ok=True)
+                tmp_path = os.path.join(directory, f".{os.path.basename(path)}.foxter-restore")
+                try:
+                    self._read_object(item["sha256"], tmp_path)
+                    self._apply_metadata(tmp_path, item)
+                    os.replace(tmp_path, path)
+                except BaseException:
+                    if os.path.exists(tmp_path):
+                        os.unlink(tmp_path)
+                    raise
+                self._set_state([(STATE_RESTORED, None, item_id)])
+                freed.append(item["sha256"])
+                logging.info(f"Restaurado da quarentena: {path} (#{item_id})")
+                error = ""
+            except (OSError, QuarantineError) as e:
+                logging.error(f"Erro ao restaurar #{item_id}: {str(e)}")
+                error = str(e)
+            results.append((item_id, path, error))
+            if on_item:
+                on_item(item_id, path, error)
+        self._drop_unreferenced(freed)
+        return results
+
+    @staticmethod
+    def _apply_metadata(path, item):
+        if item["uid"] is not None and (os.geteuid() == 0 or item["uid"] == os.geteuid()):
+            try:
+                os.chown(path, item["uid"], item["gid"])
+            except OSError as e:
+                logging.warning(f"Dono de {item['path']} não restaurado: {str(e)}")
+        os.chmod(path, stat.S_IMODE(item["mode"]))
+        os.utime(path, ns=(item["mtime_ns"], item["mtime_ns"]))
+
+    def delete_many(self, item_ids):
+        # Descarta definitivamente; o objeto só sai do disco quando nenhum item o usa
+        items = [self.get(item_id) for item_id in item_ids]
+        items = [item for item in items if item and item["state"] == STATE_STORED]
+        self._set_state([(STATE_DELETED, None, item["id"]) for item in items])
+        self._drop_unreferenced(item["sha256"] for item in items)
+        return len(items)
+
+    def stats(self):
+        with self.lock:
+            count, size = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM items WHERE state = ?",
+                                            (STATE_STORED,)).fetchone()
+            objects = self.conn.execute("SELECT COUNT(DISTINCT sha256) FROM items WHERE state = ?",
+                                        (STATE_STORED,)).fetchone()[0]
+        stored = 0
+        for entry in os.scandir(self.objects_dir):
+            if entry.is_dir():
+                stored += sum(e.stat().st_size for e in os.scandir(entry.path))
+        return {"items": count, "objects": objects, "size": size, "stored": stored}
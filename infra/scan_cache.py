@@ -0,0 +1,142 @@
+import os
+import json
+import sqlite3
+import logging
+import threading
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".foxter", "scan_cache.db")
+FLUSH_EVERY = 1000
+SCHEMA_VERSION = "3"
+
+
+def encode_digests(digests):
+    return ";".join(f"{a}:{h}" for a, h in sorted(digests.items()))
+
+
+def decode_digests(text):
+    return dict(item.split(":", 1) for item in text.split(";") if item)
+
+
+class ScanCache:
+    # Cache persistente (dev, inode) -> (size, mtime_ns, ctime_ns, digests, content_match, members).
+    # O veredito de hash é recalculado a partir dos digests: atualizar o feed não exige reler os arquivos.
+    # members (só compactados): {"status": status do próprio arquivo se a expansão parou num limite,
+    # "members": [[nome interno, digests, content_match, erro]]}; pattern_version inclui os limites de expansão
+    def __init__(self, path, pattern_version, flush_every=FLUSH_EVERY):
+        self.path = path
+        self.flush_every = flush_every
+        self.lock = threading.Lock()
+        self.pending = {}  # Escritas ainda não gravadas no disco
+        self.inflight = {}  # Hard links sendo calculados por outro worker
+        self.hits = 0
+        self.misses = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        meta = dict(self.conn.execute("SELECT key, value FROM meta").fetchall())
+        if meta.get("schema") != SCHEMA_VERSION:
+            self.conn.execute("DROP TABLE IF EXISTS files")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "dev INTEGER, ino INTEGER, size INTEGER, mtime_ns INTEGER, ctime_ns INTEGER, "
+            "digests TEXT, content_match INTEGER, members TEXT, PRIMARY KEY (dev, ino)) WITHOUT ROWID"
+        )
+        if meta.get("schema") == SCHEMA_VERSION and meta.get("pattern_version") != pattern_version:
+            # Padrões de conteúdo mudaram: só relendo os arquivos
+            logging.info(f"Padrões de conteúdo mudaram ({meta.get('pattern_version')} -> {pattern_version}); "
+                         f"cache invalidado")
+            self.conn.execute("DELETE FROM files")
+        self.conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                              [("schema", SCHEMA_VERSION), ("pattern_version", pattern_version)])
+        self.conn.commit()
+
+    @staticmethod
+    def _key(st):
+        return st.st_dev, st.st_ino
+
+    @staticmethod
+    def _ident(st):
+        return st.st_size, st.st_mtime_ns, st.st_ctime_ns
+
+    def _entry_locked(self, st, algorithms):
+        key = self._key(st)
+        entry = self.pending.get(key)
+        if entry is None:
+            row = self.conn.execute(
+                "SELECT size, mtime_ns, ctime_ns, digests, content_match, members FROM files "
+                "WHERE dev = ? AND ino = ?", key
+            ).fetchone()
+            if row is not None:
+                entry = (tuple(row[:3]), decode_digests(row[3]), bool(row[4]), row[5])
+        # Só vale se o arquivo não mudou e todos os digests pedidos estão gravados
+        if entry is not None and entry[0] == self._ident(st) and all(a in entry[1] for a in algorithms):
+            return entry
+        return None
+
+    def lookup(self, st, algorithms=()):
+        with self.lock:
+            entry = self._entry_locked(st, algorithms)
+            if entry is not None:
+                self.hits += 1
+                return entry[1], entry[2], json.loads(entry[3]) if entry[3] else None
+            self.misses += 1
+            return None
+
+    def contains(self, st, algorithms=()):
+        # Como lookup, sem contar nas estatísticas
+        with self.lock:
+            return self._entry_locked(st, algorithms) is not None
+
+    def acquire(self, st, algorithms=()):
+        # Para hard links, só um worker calcula o hash; os demais esperam o resultado
+        while True:
+            hit = self.lookup(st, algorithms)
+            if hit is not None or st.st_nlink <= 1:
+                return hit
+            key = self._key(st)
+            with self.lock:
+                event = self.inflight.get(key)
+                if event is None:
+                    self.inflight[key] = threading.Event()
+                    return None
+            event.wait()
+
+    def release(self, st):
+        with self.lock:
+            event = self.inflight.pop(self._key(st), None)
+        if event is not None:
+            event.set()
+
+    def store(self, st, digests, content_match, members=None):
+        text = json.dumps(members, separators=(",", ":")) if members is not None else None
+        with self.lock:
+            self.pending[self._key(st)] = (self._ident(st), dict(digests), bool(content_match), text)
+            if len(self.pending) >= self.flush_every:
+                self._flush_locked()
+        self.release(st)
+
+    def _flush_locked(self):
+        if not self.pending:
+            return
+        rows = [(dev, ino, ident[0], ident[1], ident[2], encode_digests(digests), int(content_match), members)
+                for (dev, ino), (ident, digests, content_match, members) in self.pending.items()]
+        try:
+            with self.conn:
+                self.conn.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        except sqlite3.Error as e:
+            logging.error(f"Erro ao gravar cache de escaneamento: {str(e)}")
+        finally:
+            self.pending.clear()
+
+    def flush(self):
+        with self.lock:
+            self._flush_locked()
+
+    def close(self):
+        self.flush()
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,317 @@
+import os
+import csv
+import json
+import time
+import queue
+import socket
+import sqlite3
+import logging
+import threading
+
+DEFAULT_HISTORY_PATH = os.path.join(os.path.expanduser("~"), ".foxter", "scan_history.db")
+FLUSH_EVERY = 5000
+WRITE_QUEUE_DEPTH = 16  # Lotes aguardando o thread de gravação antes de segurar o escaneamento
+_STOP = object()
+SCHEMA_VERSION = "1"
+VERDICTS = ("Clean", "Suspicious", "Error", "Skipped")  # Mesmos códigos de core.result_store
+DIGEST_COLUMNS = ("md5", "sha1", "sha256")
+DIGEST_LENGTHS = {32: "md5", 40: "sha1", 64: "sha256"}  # Tamanho em hex -> coluna
+EXPORT_FORMATS = ("txt", "csv", "jsonl")
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS scans ("
+    "id INTEGER PRIMARY KEY, host TEXT, root TEXT, kind TEXT, started REAL, finished REAL, "
+    "status TEXT, files INTEGER DEFAULT 0, suspicious INTEGER DEFAULT 0, errors INTEGER DEFAULT 0)",
+    "CREATE TABLE IF NOT EXISTS paths (id INTEGER PRIMARY KEY, path TEXT UNIQUE)",
+    "CREATE TABLE IF NOT EXISTS results ("
+    "scan_id INTEGER, path_id INTEGER, verdict INTEGER, error TEXT, action TEXT, "
+    "md5 BLOB, sha1 BLOB, sha256 BLOB, PRIMARY KEY (scan_id, path_id)) WITHOUT ROWID",
+    "CREATE INDEX IF NOT EXISTS results_verdict ON results (verdict, scan_id)",
+    "CREATE INDEX IF NOT EXISTS results_path ON results (path_id)",
+    "CREATE INDEX IF NOT EXISTS results_md5 ON results (md5) WHERE md5 IS NOT NULL",
+    "CREATE INDEX IF NOT EXISTS results_sha1 ON results (sha1) WHERE sha1 IS NOT NULL",
+    "CREATE INDEX IF NOT EXISTS results_sha256 ON results (sha256) WHERE sha256 IS NOT NULL",
+    "CREATE INDEX IF NOT EXISTS scans_root ON scans (host, root, id)",
+)
+
+
+def verdict_code(status):
+    if status == "Suspicious":
+        return 1
+    if status == "Skipped":
+        return 3
+    return 0 if status == "Clean" else 2
+
+
+def _db_path(path):
+    # Nomes não decodificáveis (surrogateescape) não são UTF-8 válido: vão como BLOB com os bytes originais
+    try:
+        path.encode("utf-8")
+        return path
+    except UnicodeEncodeError:
+        return path.encode("utf-8", "surrogateescape")
+
+
+def _path(value):
+    return value.decode("utf-8", "surrogateescape") if isinstance(value, bytes) else value
+
+
+def _blob(hexdigest):
+    try:
+        return bytes.fromhex(hexdigest) if hexdigest else None
+    except ValueError:
+        return None
+
+
+class ScanHistory:
+    # Histórico persistente: uma linha por escaneamento e uma por arquivo, gravadas em lotes (WAL)
+    # por um thread próprio, para o escaneamento não esperar os índices do SQLite.
+    # Leitores (exportação, consultas) usam outra instância/conexão sem bloquear a gravação.
+    def __init__(self, path=DEFAULT_HISTORY_PATH, flush_every=FLUSH_EVERY):
+        self.path = path
+        self.flush_every = flush_every
+        self.lock = threading.Lock()  # pending
+        self.db_lock = threading.Lock()  # conexão
+        self.pending = []
+        self.write_queue = queue.Queue(maxsize=WRITE_QUEUE_DEPTH)
+        self.writer = None
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA cache_size=-65536")  # 64 MiB: os índices de digest são inserções aleatórias
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        meta = dict(self.conn.execute("SELECT key, value FROM meta").fetchall())
+        if meta.get("schema") not in (None, SCHEMA_VERSION):
+            logging.warning(f"Histórico com esquema {meta.get('schema')} desconhecido; recriando {path}")
+            for table in ("results", "paths", "scans"):
+                self.conn.execute(f"DROP TABLE IF EXISTS {table}")
+        for statement in _SCHEMA:
+            self.conn.execute(statement)
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('schema', ?)", (SCHEMA_VERSION,))
+        self.conn.commit()
+
+    # --- gravação ---
+
+    def begin_scan(self, root, kind="scan"):
+        with self.db_lock:
+            with self.conn:
+                cursor = self.conn.execute(
+                    "INSERT INTO scans (host, root, kind, started, status) VALUES (?, ?, ?, ?, 'running')",
+                    (socket.gethostname(), root, kind, time.time())
+                )
+        return cursor.lastrowid
+
+    def resume_scan(self, scan_id):
+        with self.db_lock, self.conn:
+            cursor = self.conn.execute("UPDATE scans SET status = 'running', finished = NULL WHERE id = ?", (scan_id,))
+        return cursor.rowcount > 0
+
+    def add_results(self, scan_id, batch):
+        with self.lock:
+            for result in batch:
+                status = result["status"]
+                verdict = verdict_code(status)
+                digests = result.get("digests") or {}
+                path = _db_path(result["path"])
+                # Mensagens de erro citam o caminho: só para exibição, sem os bytes originais
+                error = status.encode("utf-8", "surrogateescape").decode("utf-8", "replace") if verdict == 2 else None
+                self.pending.append((path, scan_id, path, verdict, error,
+                                     *(_blob(digests.get(c)) for c in DIGEST_COLUMNS)))
+            if len(self.pending) >= self.flush_every:
+                self._submit_locked()
+
+    def _submit_locked(self):
+        if not self.pending:
+            return
+        if self.writer is None:
+            self.writer = threading.Thread(target=self._write_loop, name="scan-history-writer", daemon=True)
+            self.writer.start()
+        rows, self.pending = self.pending, []
+        self.write_queue.put(rows)  # Bloqueia só se o gravador estiver WRITE_QUEUE_DEPTH lotes atrasado
+
+    def _write_loop(self):
+        while True:
+            rows = self.write_queue.get()
+            try:
+                if rows is _STOP:
+                    return
+                self._write(rows)
+            finally:
+                self.write_queue.task_done()
+
+    def _write(self, rows):
+        try:
+            with self.db_lock, self.conn:
+                # Uma transação por lote: caminhos internados na tabela paths, resultados por path_id
+                self.conn.executemany("INSERT OR IGNORE INTO paths (path) VALUES (?)", ((row[0],) for row in rows))
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO results (scan_id, path_id, verdict, error, md5, sha1, sha256) "
+                    "VALUES (?, (SELECT id FROM paths WHERE path = ?), ?, ?, ?, ?, ?)",
+                    (row[1:] for row in rows)
+                )
+        except Exception as e:
+            # O gravador não pode morrer: flush e close esperam a fila esvaziar
+            logging.error(f"Erro ao gravar histórico de escaneamento: {str(e)}")
+
+    def flush(self):
+        # Envia o lote parcial e espera o gravador terminar tudo que estava na fila
+        with self.lock:
+            self._submit_locked()
+        self.write_queue.join()
+
+    def finish_scan(self, scan_id, status="done"):
+        self.flush()
+        try:
+            with self.db_lock, self.conn:
+                # Totais recontados pelos índices: corretos também para escaneamentos retomados
+                self.conn.execute(
+                    "UPDATE scans SET finished = :now, status = :status, "
+                    "files = (SELECT count(*) FROM results WHERE scan_id = :id), "
+                    "suspicious = (SELECT count(*) FROM results WHERE verdict = 1 AND scan_id = :id), "
+                    "errors = (SELECT count(*) FROM results WHERE verdict = 2 AND scan_id = :id) WHERE id = :id",
+                    {"now": time.time(), "status": status, "id": scan_id}
+                )
+        except sqlite3.Error as e:
+            logging.error(f"Erro ao gravar histórico de escaneamento: {str(e)}")
+
+    def set_action(self, scan_id, path, action):
+        self.flush()
+        with self.db_lock, self.conn:
+            self.conn.execute(
+                "UPDATE results SET action = ? WHERE scan_id = ? AND path_id = (SELECT id FROM paths WHERE path = ?)",
+                (action, scan_id, _db_path(path))
+            )
+
+    def close(self):
+        self.flush()
+        if self.writer is not None:
+            self.write_queue.put(_STOP)
+            self.writer.join()
+            self.writer = None
+        with self.db_lock:
+            self.conn.close()
+
+    # --- consultas ---
+
+    def scans(self, limit=20):
+        with self.db_lock:
+            return self.conn.execute(
+                "SELECT id, host, root, kind, started, finished, status, files, suspicious, errors "
+                "FROM scans ORDER BY id DESC LIMIT ?", (limit,)
+            ).fetchall()
+
+    def get_scan(self, scan_id):
+        with self.db_lock:
+            return self.conn.execute(
+                "SELECT id, host, root, kind, started, finished, status, files, suspicious, errors "
+                "FROM scans WHERE id = ?", (scan_id,)
+            ).fetchone()
+
+    def previous_scan(self, scan_id):
+        # Último escaneamento completo da mesma raiz, no mesmo host
+        with self.db_lock:
+            row = self.conn.execute(
+                "SELECT p.id FROM scans s JOIN scans p ON p.host = s.host AND p.root = s.root "
+                "WHERE s.id = ? AND p.id < s.id AND p.kind = 'scan' AND p.status = 'done' "
+                "ORDER BY p.id DESC LIMIT 1", (scan_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def find_digest(self, hexdigest):
+        column = DIGEST_LENGTHS.get(len(hexdigest))
+        blob = _blob(hexdigest)
+        if column is None or blob is None:
+            raise ValueError(f"Digest inválido: {hexdigest}")
+        with self.db_lock:
+            rows = self.conn.execute(
+                f"SELECT s.id, s.host, s.started, p.path, r.verdict FROM results r "
+                f"JOIN scans s ON s.id = r.scan_id JOIN paths p ON p.id = r.path_id "
+                f"WHERE r.{column} = ? ORDER BY s.id", (blob,)
+            ).fetchall()
+        return [(scan, host, started, _path(path), verdict) for scan, host, started, path, verdict in rows]
+
+    def diff(self, scan_id, other_id=None):
+        # (mudança, caminho, veredito antigo, veredito novo); mudança: added, removed, changed, modified
+        if other_id is None:
+            other_id = self.previous_scan(scan_id)
+            if other_id is None:
+                return []
+        with self.db_lock:
+            rows = self.conn.execute(
+                "SELECT CASE WHEN o.path_id IS NULL THEN 'added' "
+                "WHEN o.verdict != n.verdict THEN 'changed' ELSE 'modified' END, p.path, o.verdict, n.verdict "
+                "FROM results n LEFT JOIN results o ON o.scan_id = :old AND o.path_id = n.path_id "
+                "JOIN paths p ON p.id = n.path_id WHERE n.scan_id = :new AND (o.path_id IS NULL "
+                "OR o.verdict != n.verdict OR o.sha256 IS NOT n.sha256 OR o.sha1 IS NOT n.sha1 "
+                "OR o.md5 IS NOT n.md5) "
+                "UNION ALL "
+                "SELECT 'removed', p.path, o.verdict, NULL FROM results o JOIN paths p ON p.id = o.path_id "
+                "WHERE o.scan_id = :old AND NOT EXISTS "
+                "(SELECT 1 FROM results n WHERE n.scan_id = :new AND n.path_id = o.path_id)",
+                {"old": other_id, "new": scan_id}
+            ).fetchall()
+        return [(change, _path(path), old, new) for change, path, old, new in rows]
+
+    def iter_results(self, scan_id, verdict=None):
+        # Cursor em streaming: não carrega o escaneamento inteiro na memória
+        query = ("SELECT p.path, r.verdict, r.error, r.action, r.md5, r.sha1, r.sha256 FROM results r "
+                 "JOIN paths p ON p.id = r.path_id WHERE r.scan_id = ?")
+        params = [scan_id]
+        if verdict is not None:
+            query += " AND r.verdict = ?"
+            params.append(verdict)
+        with self.db_lock:  # Conexão compartilhada com o thread que grava os resultados
+            cursor = self.conn.cursor()
+            cursor.arraysize = 1000
+            cursor.execute(query, params)
+        while True:
+            with self.db_lock:
+                rows = cursor.fetchmany()
+            if not rows:
+                return
+            for path, code, error, action, *digests in rows:
+                yield (_path(path), error or VERDICTS[code], action or "",
+                       {c: d.hex() for c, d in zip(DIGEST_COLUMNS, digests) if d})
+
+    def export(self, scan_id, out_path, fmt="txt", verdict=None, should_stop=None):
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Formato de exportação inválido: {fmt}")
+        tmp_path = out_path + ".tmp"
+        count = suspicious = 0
+        try:
+            with open(tmp_path, "w", newline="", encoding="utf-8", errors="surrogateescape") as f:
+                writer = csv.writer(f) if fmt == "csv" else None
+                if writer:
+                    writer.writerow(["path", "status", "action", *DIGEST_COLUMNS])
+                for path, status, action, digests in self.iter_results(scan_id, verdict):
+                    if should_stop is not None and count % 10000 == 0 and should_stop():
+                        break
+                    if fmt == "csv":
+                        writer.writerow([path, status, action, *(digests.get(c, "") for c in DIGEST_COLUMNS)])
+                    elif fmt == "jsonl":
+                        f.write(json.dumps({"path": path, "status": status, "action": action, "digests": digests},
+                                           ensure_ascii=False) + "\n")
+                    else:
+                        line = f"{path} - {status} - {action}"
+                        if digests:
+                            line += " - " + " ".join(f"{a}={h}" for a, h in sorted(digests.items()))
+                        f.write(line + "\n")
+                    count += 1
+                    suspicious += status == "Suspicious"
+                if fmt == "txt":
+                    f.write(f"Total: {count}\nAmeaças: {suspicious}\n")
+        except BaseException:
+            # Disco cheio, erro de codificação ou do SQLite: nada de relatório pela metade no disco
+            try:
+                os.remove(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        if should_stop is not None and should_stop():
+            os.remove(tmp_path)
+            return None
+        os.replace(tmp_path, out_path)
+        return count
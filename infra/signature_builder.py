@@ -0,0 +1,127 @@
+# infra/signature_builder.py
+# Compila feeds texto/CSV de MD5/SHA-1/SHA-256 no formato binário de infra/signature_db.py
+#   python -m infra.signature_builder feed1.txt feed2.csv -o infra/signatures.fsig
+#   python -m infra.signature_builder iocs.csv --algorithm md5 -o infra/signatures-md5.fsig
+import os
+import re
+import csv
+import sys
+import struct
+import hashlib
+import logging
+import argparse
+import tempfile
+from infra.signature_db import (
+    DIGEST_SIZES, FANOUT_ENTRIES, FANOUT_OFFSET, DATA_OFFSET, DEFAULT_FP_RATE, FLAG_BLOOM,
+    pack_header, build_bloom_section, SignatureDatabase
+)
+
+BUCKETS = 256  # Particiona pelo primeiro byte; cada partição é ordenada em memória
+
+
+def hex_digest_re(algorithm):
+    return re.compile(r"\b[0-9a-fA-F]{%d}\b" % (DIGEST_SIZES[algorithm] * 2))
+
+
+def iter_feed(path, column=None, algorithm="sha256"):
+    digest_re = hex_digest_re(algorithm)
+    with open(path, "r", encoding="utf-8", errors="replace", newline="") as f:
+        if path.lower().endswith(".csv"):
+            for row in csv.reader(f):
+                if column is not None:
+                    if column < len(row) and digest_re.fullmatch(row[column].strip()):
+                        yield bytes.fromhex(row[column].strip())
+                    continue
+                for cell in row:
+                    if digest_re.fullmatch(cell.strip()):
+                        yield bytes.fromhex(cell.strip())
+                        break
+        else:
+            for line in f:
+                line = line.split("#", 1)[0]
+                match = digest_re.search(line)
+                if match:
+                    yield bytes.fromhex(match.group(0))
+
+
+def iter_written_digests(f, count, size, chunk_items=65536):
+    f.seek(DATA_OFFSET)
+    remaining = count
+    while remaining:
+        raw = f.read(min(remaining, chunk_items) * size)
+        for o in range(0, len(raw), size):
+            yield raw[o:o + size]
+        remaining -= len(raw) // size
+
+
+def build_signature_db(inputs, output, column=None, fp_rate=DEFAULT_FP_RATE, algorithm="sha256"):
+    size = DIGEST_SIZES[algorithm]
+    out_dir = os.path.dirname(os.path.abspath(output))
+    with tempfile.TemporaryDirectory(dir=out_dir) as tmp:
+        # 1) Espalha os digests em partições no disco (memória constante)
+        parts = [open(os.path.join(tmp, f"{i:02x}"), "wb") for i in range(BUCKETS)]
+        try:
+            for path in inputs:
+                for digest in iter_feed(path, column, algorithm):
+                    parts[digest[0]].write(digest)
+        finally:
+            for p in parts:
+                p.close()
+        # 2) Ordena cada partição, remove duplicatas e grava em sequência
+        fanout = [0] * FANOUT_ENTRIES
+        checksum = hashlib.sha256()
+        count = 0
+        tmp_output = output + ".tmp"
+        with open(tmp_output, "w+b") as out:
+            out.seek(DATA_OFFSET)
+            for i in range(BUCKETS):
+                part_path = os.path.join(tmp, f"{i:02x}")
+                with open(part_path, "rb") as p:
+                    raw = p.read()
+                os.remove(part_path)
+                digests = sorted({raw[o:o + size] for o in range(0, len(raw), size)})
+                for d in digests:
+                    fanout[((d[0] << 8) | d[1]) + 1] += 1
+                data = b"".join(digests)
+                out.write(data)
+                checksum.update(data)
+                count += len(digests)
+            for i in range(1, FANOUT_ENTRIES):
+                fanout[i] += fanout[i - 1]
+            # 3) Pré-filtro de Bloom serializado logo após os digests
+            flags = 0
+            if fp_rate:
+                section = build_bloom_section(iter_written_digests(out, count, size), count, fp_rate)
+                out.seek(DATA_OFFSET + count * size)
+                out.write(section)
+                flags |= FLAG_BLOOM
+            out.seek(0)
+            out.write(pack_header(count, checksum.digest()[:16], flags, algorithm))
+            out.seek(FANOUT_OFFSET)
+            out.write(struct.pack(f"<{FANOUT_ENTRIES}I", *fanout))
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp_output, output)
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compila feeds de hashes na base binária de assinaturas")
+    parser.add_argument("inputs", nargs="+", help="Arquivos .txt (um digest por linha) ou .csv")
+    parser.add_argument("-o", "--output", required=True, help="Arquivo .fsig de saída")
+    parser.add_argument("--column", type=int, default=None, help="Coluna do digest em arquivos CSV")
+    parser.add_argument("--algorithm", choices=sorted(DIGEST_SIZES), default="sha256",
+                        help="Algoritmo dos digests do feed (linhas de outro tamanho são ignoradas)")
+    parser.add_argument("--fp-rate", type=float, default=DEFAULT_FP_RATE,
+                        help="Taxa de falso positivo do filtro de Bloom (0 desativa)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(message)s")
+    count = build_signature_db(args.inputs, args.output, args.column, args.fp_rate, args.algorithm)
+    db = SignatureDatabase.open(args.output)
+    logging.info(f"{count} assinaturas {db.algorithm} gravadas em {args.output} (versão {db.version})")
+    db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
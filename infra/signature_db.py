@@ -1,9 +1,303 @@
 # infra/signature_db.py
-#import hashlib
+import os
+import math
+import mmap
+import struct
+import hashlib
+import logging
+import threading
 
 MALICIOUS_SIGNATURES = ["malware", "virus", "trojan", ]
 
+# Formato binário: cabeçalho + tabela fan-out (2 primeiros bytes) + digests ordenados
+SIGNATURE_MAGIC = b"FOXSIG\x00\x01"
+FORMAT_VERSION = 1
+DIGEST_SIZES = {"md5": 16, "sha1": 20, "sha256": 32}
+DIGEST_SIZE = DIGEST_SIZES["sha256"]
+FANOUT_BITS = 16
+FANOUT_ENTRIES = (1 << FANOUT_BITS) + 1
+HEADER = struct.Struct("<8sHHHHQ16s8s16x")
+FANOUT_OFFSET = HEADER.size
+DATA_OFFSET = FANOUT_OFFSET + FANOUT_ENTRIES * 4
+FLAG_BLOOM = 1  # Seção de filtro de Bloom após os digests
 
-# MALICIOUS_SIGNATURES = {
- #   hashlib.sha256(b"malware").hexdigest(): "teste1.txt"
-#} 
\ No newline at end of file
+# Filtro de Bloom em blocos de 64 bytes (uma linha de cache por consulta)
+BLOOM_MAGIC = b"FOXBLM\x00\x02"  # \x02: posições por hash triplo (seções \x01 são ignoradas ao abrir)
+BLOOM_HEADER = struct.Struct("<8sQIf40x")
+BLOOM_BLOCK_BYTES = 64
+BLOOM_BLOCK_BITS = BLOOM_BLOCK_BYTES * 8
+DEFAULT_FP_RATE = 0.01
+DEFAULT_SIGNATURE_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "signatures.fsig")
+
+
+def signature_db_path(algorithm, base=DEFAULT_SIGNATURE_DB_PATH):
+    # signatures.fsig (SHA-256), signatures-sha1.fsig, signatures-md5.fsig
+    if algorithm == "sha256":
+        return base
+    root, ext = os.path.splitext(base)
+    return f"{root}-{algorithm}{ext}"
+
+
+def bloom_params(count, fp_rate):
+    # Folga sobre o ótimo teórico para compensar a carga desigual dos blocos, maior com taxas menores
+    # (15% em 0.01, 30% em 0.0001)
+    bits_per_item = -math.log(fp_rate) / (math.log(2) ** 2) * (1 - 0.075 * math.log10(fp_rate))
+    nblocks = max(1, math.ceil(max(count, 1) * bits_per_item / BLOOM_BLOCK_BITS))
+    hashes = max(1, min(16, round(math.log(2) * bits_per_item)))
+    return nblocks, hashes
+
+
+def bloom_positions(digest, nblocks, hashes):
+    # Os digests já são uniformes: bloco e posições saem do próprio digest
+    h = int.from_bytes(digest[:16], "little")
+    block = (h & 0xFFFFFFFFFFFFFFFF) % nblocks
+    a = (h >> 64) & (BLOOM_BLOCK_BITS - 1)
+    b = ((h >> 73) & (BLOOM_BLOCK_BITS - 1)) | 1
+    c = (h >> 82) & (BLOOM_BLOCK_BITS - 1)
+    return block, [(a + i * b + i * i * c) & (BLOOM_BLOCK_BITS - 1) for i in range(hashes)]
+
+
+class BloomFilter:
+    def __init__(self, buf, offset):
+        magic, nblocks, hashes, fp_rate = BLOOM_HEADER.unpack_from(buf, offset)
+        if magic != BLOOM_MAGIC or nblocks == 0:
+            raise ValueError("Seção de filtro de Bloom inválida")
+        self.buf = buf
+        self.bits_offset = offset + BLOOM_HEADER.size
+        self.nblocks = nblocks
+        self.hashes = hashes
+        self.fp_rate = round(fp_rate, 6)
+        if len(buf) < self.bits_offset + nblocks * BLOOM_BLOCK_BYTES:
+            raise ValueError("Seção de filtro de Bloom truncada")
+
+    @property
+    def size(self):
+        return BLOOM_HEADER.size + self.nblocks * BLOOM_BLOCK_BYTES
+
+    def might_contain(self, digest):
+        h = int.from_bytes(digest[:16], "little")
+        offset = self.bits_offset + (h & 0xFFFFFFFFFFFFFFFF) % self.nblocks * BLOOM_BLOCK_BYTES
+        a = (h >> 64) & (BLOOM_BLOCK_BITS - 1)
+        b = ((h >> 73) & (BLOOM_BLOCK_BITS - 1)) | 1
+        c = (h >> 82) & (BLOOM_BLOCK_BITS - 1)
+        buf = self.buf
+        for i in range(self.hashes):
+            pos = (a + i * b + i * i * c) & (BLOOM_BLOCK_BITS - 1)
+            if not buf[offset + (pos >> 3)] & (1 << (pos & 7)):
+                return False  # Primeiro bit zerado já decide (negativos saem cedo)
+        return True
+
+
+def build_bloom_section(digests, count, fp_rate=DEFAULT_FP_RATE):
+    nblocks, hashes = bloom_params(count, fp_rate)
+    bits = bytearray(nblocks * BLOOM_BLOCK_BYTES)
+    for d in digests:
+        block, positions = bloom_positions(d, nblocks, hashes)
+        offset = block * BLOOM_BLOCK_BYTES
+        for pos in positions:
+            bits[offset + (pos >> 3)] |= 1 << (pos & 7)
+    return BLOOM_HEADER.pack(BLOOM_MAGIC, nblocks, hashes, fp_rate) + bytes(bits)
+
+
+class SignatureDatabase:
+    def __init__(self, buf, source="<memória>"):
+        self.buf = buf
+        self.source = source
+        if len(buf) < DATA_OFFSET:
+            raise ValueError(f"Base de assinaturas truncada: {source}")
+        magic, fmt, digest_size, fanout_bits, flags, count, build_id, algorithm = HEADER.unpack_from(buf, 0)
+        if magic != SIGNATURE_MAGIC or fmt != FORMAT_VERSION:
+            raise ValueError(f"Formato de base de assinaturas desconhecido: {source}")
+        self.algorithm = algorithm.rstrip(b"\x00").decode("ascii") or "sha256"
+        if DIGEST_SIZES.get(self.algorithm) != digest_size or fanout_bits != FANOUT_BITS:
+            raise ValueError(f"Parâmetros de base de assinaturas não suportados: {source}")
+        if len(buf) < DATA_OFFSET + count * digest_size:
+            raise ValueError(f"Base de assinaturas truncada: {source}")
+        self.digest_size = digest_size
+        self.count = count
+        self.version = build_id.hex()
+        self.bloom = None
+        if flags & FLAG_BLOOM:
+            offset = DATA_OFFSET + count * digest_size
+            if buf[offset:offset + 6] == BLOOM_MAGIC[:6] and buf[offset:offset + 8] != BLOOM_MAGIC:
+                # Outra versão do filtro (posições diferentes daria falso negativo): consulta direto o índice
+                logging.warning(f"Filtro de Bloom de outra versão em {source}, ignorado; recompile a base com "
+                                f"infra.signature_builder")
+            else:
+                self.bloom = BloomFilter(buf, offset)
+        # Contadores do pré-filtro, um conjunto por thread (os workers consultam em paralelo, sem lock):
+        # [consultas, descartes do filtro, acertos, falsos positivos], somados em filter_stats
+        self._local = threading.local()
+        self._counters = []
+        self._counters_lock = threading.Lock()
+
+    @classmethod
+    def open(cls, path):
+        # Sem parsing: o mmap compartilha as páginas entre processos
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                raise ValueError(f"Base de assinaturas vazia: {path}")
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(buf, source=path)
+
+    @classmethod
+    def from_digests(cls, digests, fp_rate=DEFAULT_FP_RATE, algorithm="sha256"):
+        return cls(build_image(digests, fp_rate, algorithm))
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, digest):
+        if isinstance(digest, str):
+            try:
+                digest = bytes.fromhex(digest)
+            except ValueError:
+                return False
+        if len(digest) != self.digest_size:
+            return False
+        counters = getattr(self._local, "counters", None)
+        if counters is None:
+            counters = self._local.counters = [0, 0, 0, 0]
+            with self._counters_lock:
+                self._counters.append(counters)
+        counters[0] += 1
+        if self.bloom is not None and not self.bloom.might_contain(digest):
+            counters[1] += 1  # Negativo resolvido sem tocar no índice
+            return False
+        if self._lookup(digest):
+            counters[2] += 1
+            return True
+        if self.bloom is not None:
+            counters[3] += 1
+        return False
+
+    def _lookup(self, digest):
+        prefix = (digest[0] << 8) | digest[1]
+        lo, hi = struct.unpack_from("<II", self.buf, FANOUT_OFFSET + prefix * 4)
+        buf = self.buf
+        size = self.digest_size
+        while lo < hi:
+            mid = (lo + hi) >> 1
+            offset = DATA_OFFSET + mid * size
+            probe = buf[offset:offset + size]
+            if probe < digest:
+                lo = mid + 1
+            elif probe > digest:
+                hi = mid
+            else:
+                return True
+        return False
+
+    def filter_stats(self):
+        with self._counters_lock:
+            lookups, rejected, hits, false_positives = (sum(c[i] for c in self._counters) for i in range(4))
+        return {
+            "enabled": self.bloom is not None,
+            "configured_fp_rate": self.bloom.fp_rate if self.bloom else None,
+            "lookups": lookups,
+            "rejected": rejected,
+            "passed": lookups - rejected,
+            "hits": hits,
+            "false_positives": false_positives,
+            "observed_fp_rate": false_positives / max(lookups - hits, 1),
+        }
+
+    def __iter__(self):
+        size = self.digest_size
+        for i in range(self.count):
+            offset = DATA_OFFSET + i * size
+            yield self.buf[offset:offset + size]
+
+    def close(self):
+        if isinstance(self.buf, mmap.mmap):
+            self.buf.close()
+
+
+def pack_header(count, build_id, flags=0, algorithm="sha256"):
+    return HEADER.pack(SIGNATURE_MAGIC, FORMAT_VERSION, DIGEST_SIZES[algorithm], FANOUT_BITS, flags, count,
+                       build_id, algorithm.encode("ascii"))
+
+
+def parse_digest(value, size=DIGEST_SIZE):
+    if isinstance(value, str):
+        try:
+            value = bytes.fromhex(value.strip())
+        except ValueError:
+            return None
+    value = bytes(value)
+    return value if len(value) == size else None
+
+
+def build_image(digests, fp_rate=DEFAULT_FP_RATE, algorithm="sha256"):
+    # Versão em memória do builder, para listas pequenas
+    size = DIGEST_SIZES[algorithm]
+    unique = sorted({d for d in (parse_digest(v, size) for v in digests) if d is not None})
+    fanout = [0] * FANOUT_ENTRIES
+    for d in unique:
+        fanout[((d[0] << 8) | d[1]) + 1] += 1
+    for i in range(1, FANOUT_ENTRIES):
+        fanout[i] += fanout[i - 1]
+    data = b"".join(unique)
+    build_id = hashlib.sha256(data).digest()[:16]
+    flags = FLAG_BLOOM if fp_rate else 0
+    image = pack_header(len(unique), build_id, flags, algorithm) + struct.pack(f"<{FANOUT_ENTRIES}I", *fanout) + data
+    if fp_rate:
+        image += build_bloom_section(unique, len(unique), fp_rate)
+    return image
+
+
+_databases = {}
+_databases_lock = threading.Lock()
+
+
+def get_signature_db(path=DEFAULT_SIGNATURE_DB_PATH, algorithm="sha256"):
+    # Uma instância por caminho/algoritmo e por processo
+    with _databases_lock:
+        db = _databases.get((path, algorithm))
+        if db is None:
+            if path and os.path.exists(path):
+                try:
+                    db = SignatureDatabase.open(path)
+                except (OSError, ValueError) as e:
+                    logging.error(f"Erro ao abrir base de assinaturas {path}: {str(e)}")
+            if db is not None and db.algorithm != algorithm:
+                logging.error(f"{path} contém {db.algorithm}, esperado {algorithm}")
+                db = None
+            if db is None:
+                db = SignatureDatabase.from_digests([], algorithm=algorithm)
+            _databases[(path, algorithm)] = db
+        return db
+
+
+class SignatureSet:
+    # Um índice por algoritmo (MD5/SHA-1/SHA-256), consultados com os digests de uma única leitura
+    def __init__(self, base_path=DEFAULT_SIGNATURE_DB_PATH):
+        self.databases = {}
+        for algorithm in DIGEST_SIZES:
+            path = signature_db_path(algorithm, base_path) if base_path else None
+            self.databases[algorithm] = get_signature_db(path, algorithm)
+        self.version = hashlib.sha256(
+            "".join(f"{a}:{db.version};" for a, db in sorted(self.databases.items())).encode()
+        ).hexdigest()[:16]
+
+    @property
+    def algorithms(self):
+        # Algoritmos com assinaturas carregadas
+        return [a for a, db in self.databases.items() if len(db)]
+
+    def match(self, digests):
+        for algorithm, digest in digests.items():
+            db = self.databases.get(algorithm)
+            if db is not None and len(db) and digest in db:
+                return algorithm
+        return None
+
+    def filter_stats(self):
+        stats = {"enabled": False, "lookups": 0, "rejected": 0, "hits": 0, "false_positives": 0}
+        for db in self.databases.values():
+            db_stats = db.filter_stats()
+            stats["enabled"] = stats["enabled"] or db_stats["enabled"]
+            for key in ("lookups", "rejected", "hits", "false_positives"):
+                stats[key] += db_stats[key]
+        return stats
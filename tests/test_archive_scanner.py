@@ -0,0 +1,142 @@
+import io
+import bz2
+import gzip
+import hashlib
+import tarfile
+import zipfile
+import pytest
+from core.archive_scanner import ArchiveLimits, ARCHIVE_SEPARATOR, archive_kind, container_path, _member_name
+from core.scanner import Scanner
+from infra.signature_db import build_image
+
+EVIL = b"evil payload " * 100
+
+
+@pytest.fixture
+def make_scanner(tmp_path):
+    signatures = tmp_path / "signatures.fsig"
+    signatures.write_bytes(build_image([hashlib.sha256(EVIL).hexdigest()]))
+
+    def make(limits=None):
+        return Scanner(workers=1, cache_path=None, history_path=None, checkpoint_dir=None,
+                       signature_db_path=str(signatures), archive_limits=limits)
+    return make
+
+
+def _tar_gz(path, members):
+    with tarfile.open(path, "w:gz") as archive:
+        for name, data in members:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+
+
+def test_member_with_known_signature(tmp_path, make_scanner):
+    path = tmp_path / "a.tar.gz"
+    _tar_gz(path, [("x/evil.bin", EVIL), ("ok.txt", b"hello" * 100)])
+    status, digests, members = make_scanner().scan_file(str(path))
+    assert status == "Suspicious"
+    assert digests["sha256"] == hashlib.sha256(path.read_bytes()).hexdigest()
+    by_name = {m["path"].split(ARCHIVE_SEPARATOR, 1)[1]: m["status"] for m in members}
+    assert by_name == {"x/evil.bin": "Suspicious", "ok.txt": "Clean"}
+
+
+def test_member_of_nested_zip(tmp_path, make_scanner):
+    inner = io.BytesIO()
+    with zipfile.ZipFile(inner, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("deep/evil", EVIL)
+    path = tmp_path / "outer.zip"
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("inner.zip", inner.getvalue())
+    status, _, members = make_scanner().scan_file(str(path))
+    assert status == "Suspicious"
+    assert any(m["path"].endswith("inner.zip!deep/evil") and m["status"] == "Suspicious" for m in members)
+
+
+def test_compression_ratio_bomb(tmp_path, make_scanner):
+    path = tmp_path / "bomb.gz"
+    with gzip.open(path, "wb") as f:
+        for _ in range(24):
+            f.write(bytes(1024 * 1024))
+    status, _, members = make_scanner().scan_file(str(path))
+    assert status == "Suspicious"
+    assert any("limite excedido" in m["status"] for m in members)
+
+
+def test_member_count_limit(tmp_path, make_scanner):
+    path = tmp_path / "many.tar.gz"
+    _tar_gz(path, [(f"f{i}", b"x") for i in range(20)])
+    status, _, members = make_scanner(ArchiveLimits(max_members=5)).scan_file(str(path))
+    assert status == "Suspicious"
+    assert len([m for m in members if m["status"] == "Clean"]) <= 5
+
+
+def test_expanded_size_limit_is_not_clean(tmp_path, make_scanner):
+    path = tmp_path / "big.tar.gz"
+    _tar_gz(path, [("big.bin", bytes(256 * 1024))])
+    status, _, _ = make_scanner(ArchiveLimits(max_expanded=64 * 1024)).scan_file(str(path))
+    assert status.startswith("Error: limite excedido")
+
+
+def test_nesting_depth_limit(tmp_path, make_scanner):
+    inner = tmp_path / "inner.tar.gz"
+    _tar_gz(inner, [("evil.bin", EVIL)])
+    path = tmp_path / "outer.tar"
+    with tarfile.open(path, "w") as archive:
+        archive.add(inner, arcname="inner.tar.gz")
+    status, _, members = make_scanner(ArchiveLimits(max_depth=1)).scan_file(str(path))
+    assert status == "Clean"
+    assert [m["path"].split(ARCHIVE_SEPARATOR, 1)[1] for m in members] == ["inner.tar.gz"]
+    status, _, members = make_scanner(ArchiveLimits(max_depth=2)).scan_file(str(path))
+    assert status == "Suspicious"
+
+
+def test_archive_kind_and_names(tmp_path):
+    _tar_gz(tmp_path / "a.tar.gz", [("a", b"a")])
+    data = (tmp_path / "a.tar.gz").read_bytes()
+    assert archive_kind(gzip.decompress(data)[:512]) == "tar"
+    assert archive_kind(data) == "gz"
+    assert archive_kind(bz2.compress(b"x")) == "bz2"
+    assert archive_kind(b"PK\x05\x06" + bytes(18)) == "zip"  # Zip vazio
+    assert archive_kind(b"MZ") is None
+    assert [_member_name("gz", n) for n in ("log.gz", "x.tgz", "/a/B.GZ", "sem-sufixo", "")] == [
+        "log", "x.tar", "B", "sem-sufixo", "data"]
+    outer = tmp_path / "a.zip"
+    outer.write_bytes(b"PK")
+    assert container_path(str(outer) + "!b.tar.gz!c!d") == str(outer)
+    (tmp_path / "com!exclamação").write_bytes(b"x")
+    assert container_path(str(tmp_path / "com!exclamação")) == str(tmp_path / "com!exclamação")
+    assert container_path("/nao/existe!x") == "/nao/existe!x"
+
+
+def test_single_compressed_file_digests(tmp_path, make_scanner):
+    path = tmp_path / "relatorio.bz2"
+    path.write_bytes(bz2.compress(EVIL))
+    status, digests, members = make_scanner().scan_file(str(path))
+    assert status == "Suspicious"
+    assert digests["sha256"] == hashlib.sha256(path.read_bytes()).hexdigest()  # Leitura compartilhada pelo TeeReader
+    assert [(m["path"], m["digests"]["sha256"]) for m in members] == [
+        (str(path) + "!relatorio", hashlib.sha256(EVIL).hexdigest())]
+    assert all(m["archive"] == str(path) for m in members)
+
+
+def test_encrypted_and_corrupt_members_are_errors(tmp_path, make_scanner):
+    path = tmp_path / "cifrado.zip"
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("segredo", b"x" * 100)
+        archive.writestr("aberto", b"y" * 100)
+    data = bytearray(path.read_bytes())
+    central = data.find(b"PK\x01\x02")  # Bit de criptografia no diretório central do primeiro membro
+    data[central + 8] |= 1
+    path.write_bytes(bytes(data))
+    status, _, members = make_scanner().scan_file(str(path))
+    by_name = {m["path"].split(ARCHIVE_SEPARATOR, 1)[1]: m["status"] for m in members}
+    assert by_name == {"segredo": "Error: membro criptografado", "aberto": "Clean"}
+    assert status == "Clean"
+
+    truncated = tmp_path / "cortado.tar.gz"
+    _tar_gz(truncated, [("a.bin", EVIL), ("b.bin", EVIL)])
+    data = truncated.read_bytes()
+    truncated.write_bytes(data[:len(data) // 2])
+    status, _, members = make_scanner().scan_file(str(truncated))
+    assert any(m["status"].startswith("Error") for m in members)
@@ -0,0 +1,127 @@
+import os
+import hashlib
+import pytest
+from core import binary_checker
+from core.binary_checker import BinaryChecker
+from core.process_table import ProcessTable, ProcFsSampler
+from infra.signature_db import build_image
+
+EVIL = b"\x7fELF evil library" * 200
+
+
+@pytest.fixture
+def fake(tmp_path):
+    # /proc falso: <pid>/exe é um link para o binário, <pid>/maps lista as bibliotecas
+    signatures = tmp_path / "signatures.fsig"
+    signatures.write_bytes(build_image([hashlib.sha256(EVIL).hexdigest()]))
+    (tmp_path / "bin").mkdir()
+    (tmp_path / "proc").mkdir()
+    table = ProcessTable()
+
+    def binary(name, data):
+        path = tmp_path / "bin" / name
+        path.write_bytes(data)
+        return str(path)
+
+    def process(pid, exe, libraries=(), start=1.0):
+        proc = tmp_path / "proc" / str(pid)
+        proc.mkdir(exist_ok=True)
+        if os.path.lexists(proc / "exe"):
+            os.unlink(proc / "exe")
+        os.symlink(exe, proc / "exe")
+        lines = ["7f0000000000-7f0000001000 rw-p 00000000 00:00 0 ", "7ffd00000000-7ffd00021000 rw-p 00000000 00:00 0"
+                 "                          [stack]"]
+        for i, library in enumerate(libraries):
+            perms = "r--p" if library.endswith(".dat") else "r-xp"
+            lines.append(f"7f{i:02x}00000000-7f{i:02x}00010000 {perms} 00000000 08:01 {os.stat(library).st_ino}"
+                         f"                   {library}")
+        (proc / "maps").write_text("\n".join(lines) + "\n")
+        if pid in table.slots:
+            table.remove(pid)
+        slot = table.add(pid, start)
+        table.name[slot] = os.path.basename(exe)
+        return slot
+
+    checker = BinaryChecker(str(signatures), root=str(tmp_path / "proc"))
+    return checker, table, binary, process
+
+
+def test_library_with_known_signature_flags_the_process(fake):
+    checker, table, binary, process = fake
+    sh, libc, evil, data = (binary("sh", b"sh" * 100), binary("libc.so", b"libc" * 100),
+                            binary("libevil.so", EVIL), binary("fonte.dat", EVIL))
+    process(10, sh, [libc])
+    process(11, sh, [libc, evil])
+    process(12, sh, [data])  # Mapeado sem execução: não é conferido
+    assert checker.check(table) == {11: evil}
+    assert checker.hashed_files == 3  # sh e libc uma vez só para os três processos
+    assert checker.check(table) == {11: evil} and checker.hashed_files == 3
+    checker.invalidate(11)
+    assert checker.check(table) == {11: evil} and checker.hashed_files == 3  # Conferido de novo pelo cache
+
+
+def test_exe_changed_on_disk_and_reused_pid(fake):
+    checker, table, binary, process = fake
+    tool = binary("tool", b"tool v1" * 100)
+    process(20, tool)
+    assert checker.check(table) == {}
+    with open(tool, "wb") as f:
+        f.write(EVIL)  # Mesmo inode, conteúdo novo
+    checker.invalidate(20)
+    assert checker.check(table) == {20: tool}  # O alvo do link do /proc
+    assert checker.hashed_files == 2
+    process(20, binary("outro", b"outro" * 100), start=2.0)  # Pid reutilizado por um programa limpo
+    assert checker.check(table) == {}
+    table.remove(20)
+    assert checker.check(table) == {} and checker.checked == {}
+
+
+def test_replaced_library_is_read_through_map_files(fake):
+    checker, table, binary, process = fake
+    library = binary("libupd.so", EVIL)
+    process(30, binary("app", b"app" * 100), [library])
+    mapped = os.path.join(checker.root, "30", "map_files")
+    os.mkdir(mapped)
+    os.rename(library, library + ".old")  # Atualização: outro arquivo no caminho, o mapeado continua em uso
+    os.symlink(library + ".old", os.path.join(mapped, "7f0000000000-7f0000010000"))  # O link do kernel segue o inode
+    binary("libupd.so", b"nova versao" * 100)
+    assert checker.check(table) == {30: library + ".old"}
+
+
+def test_hash_budget_defers_work_to_later_passes(fake, monkeypatch):
+    checker, table, binary, process = fake
+    monkeypatch.setattr(binary_checker, "HASH_BUDGET", 1)
+    exes = {pid: binary(f"b{pid}", EVIL if pid == 42 else b"%d" % pid * 100) for pid in range(40, 43)}
+    for pid, exe in exes.items():
+        process(pid, exe)
+    found = [dict(checker.check(table)) for _ in range(3)]
+    assert found == [{}, {}, {42: exes[42]}]  # Um arquivo por passada
+    assert len(checker.checked) == 3
+
+
+def test_check_file_of_an_exited_process(fake):
+    checker, _, binary, _ = fake
+    evil = binary("curto", EVIL)
+    assert checker.check_file(evil) == evil
+    assert checker.check_file(binary("limpo", b"x")) == ""
+    assert checker.check_file("/nao/existe") == ""
+
+
+def test_without_signatures_nothing_is_read(tmp_path):
+    checker = BinaryChecker(None, root=str(tmp_path))
+    assert not checker.enabled
+    table = ProcessTable()
+    table.add(1, 1.0)
+    assert checker.check(table) == {} and checker.hashed_files == 0
+
+
+@pytest.mark.skipif(not BinaryChecker.available(), reason="/proc só no Linux")
+def test_running_interpreter_is_found_in_the_real_proc(tmp_path):
+    with open("/proc/self/exe", "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    signatures = tmp_path / "signatures.fsig"
+    signatures.write_bytes(build_image([digest]))
+    table = ProcessTable()
+    table.sample(ProcFsSampler(), os.getpid())
+    checker = BinaryChecker(str(signatures), libraries=False)
+    assert checker.check(table) == {os.getpid(): os.path.realpath("/proc/self/exe")}
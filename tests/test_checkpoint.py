@@ -0,0 +1,134 @@
+import os
+import json
+import collections
+from core.checkpoint import ScanCheckpoint, ResumableWalker
+from core.scanner import Scanner
+
+
+def _tree(root):
+    total = 0
+    for d in range(4):
+        for sub in ("", "/x", "/x/y"):
+            directory = f"{root}/d{d}{sub}"
+            os.makedirs(directory)
+            for i in range(60):
+                with open(f"{directory}/f{i}", "wb") as f:
+                    f.write(b"a" * (i + 1))
+                total += 1
+    return total
+
+
+def _scan(tmp_path, tree, seen, stop_after=None, resume=False):
+    scanner = Scanner(workers=2, cache_path=None, history_path=None, signature_db_path=None,
+                      checkpoint_dir=str(tmp_path / "checkpoints"), checkpoint_interval=0.0)
+    scanner.open()
+    delivered = [0]
+
+    def on_batch(batch):
+        for result in batch:
+            seen[result["path"]] += 1
+        delivered[0] += len(batch)
+        if stop_after and delivered[0] >= stop_after:
+            scanner.stop()
+    try:
+        pipeline = scanner.scan(str(tree), on_batch, resume=resume)
+    finally:
+        scanner.close()
+    return scanner, pipeline
+
+
+def test_resume_does_not_rescan_or_recount(tmp_path):
+    tree = tmp_path / "tree"
+    total = _tree(str(tree))
+    seen = collections.Counter()
+    _scan(tmp_path, tree, seen, stop_after=250)
+    checkpoint = ScanCheckpoint(str(tmp_path / "checkpoints"), str(tree))
+    state = checkpoint.load({})
+    assert state is not None
+    assert state["files_done"] == len(seen)
+    assert state["partial"] or state["pending"]
+
+    _scan(tmp_path, tree, seen, stop_after=250, resume=True)
+    with open(checkpoint.path) as f:
+        assert json.load(f)["files_done"] == len(seen)
+
+    scanner, pipeline = _scan(tmp_path, tree, seen, resume=True)
+    assert len(seen) == total
+    assert max(seen.values()) == 1
+    assert scanner.resumed_files + pipeline.files_done == total
+    assert not os.path.exists(checkpoint.path)  # Concluído: nada a retomar
+
+
+def test_journal_ignored_with_other_walk_options(tmp_path):
+    tree = tmp_path / "tree"
+    _tree(str(tree))
+    _scan(tmp_path, tree, collections.Counter(), stop_after=50)
+    checkpoint = ScanCheckpoint(str(tmp_path / "checkpoints"), str(tree))
+    assert checkpoint.load({}) is not None
+    assert checkpoint.load({"exclude_globs": ["*.iso"]}) is None
+
+
+def _walk_until(walker, count, done_every=1):
+    # Consome count arquivos e marca como concluídos um a cada done_every (os outros estavam "na fila")
+    walked, done = [], []
+    for i, (path, _) in enumerate(walker.walk()):
+        walked.append(path)
+        if i % done_every == 0:
+            done.append(path)
+        if len(walked) == count:
+            break
+    walker.files_done(done)
+    return walked, done
+
+
+def test_walker_resumes_from_any_point(tmp_path):
+    tree = tmp_path / "tree"
+    total = _tree(str(tree))
+    everything = sorted(p for p, _ in ResumableWalker(str(tree)).walk())
+    assert len(everything) == total
+    for stop in (1, 59, 60, 61, 200, total - 1):
+        first = ResumableWalker(str(tree))
+        walked, done = _walk_until(first, stop, done_every=2)
+        checkpoint = ScanCheckpoint(str(tmp_path / "checkpoints"), str(tree))
+        checkpoint.save(dict(first.snapshot(), walk_options={}))
+        state = checkpoint.load({})
+        assert state["files_done"] == len(done)
+        second = ResumableWalker(str(tree), state)
+        rest = [p for p, _ in second.walk()]
+        # Nada concluído é refeito; o que foi gerado e não concluído volta
+        assert not set(rest) & set(done), stop
+        assert sorted(rest + done) == everything, stop
+        second.files_done(rest)
+        assert second.snapshot()["files_done"] == total
+
+
+def test_journal_round_trip_is_atomic_and_keeps_raw_names(tmp_path):
+    tree = tmp_path / "tree"
+    tree.mkdir()
+    raw = os.fsdecode(b"nome-\xff.bin")
+    (tree / raw).write_bytes(b"x")
+    (tree / "outro.bin").write_bytes(b"y")
+    walker = ResumableWalker(str(tree))
+    _walk_until(walker, 2)
+    checkpoint = ScanCheckpoint(str(tmp_path / "checkpoints"), str(tree))
+    checkpoint.save(dict(walker.snapshot(), walk_options={"exclude_globs": ("*.iso",)}))
+    assert os.listdir(tmp_path / "checkpoints") == [os.path.basename(checkpoint.path)]
+    state = checkpoint.load({"exclude_globs": ["*.iso"]})
+    assert state["files_done"] == 2
+    # Listagem não terminou (o gerador parou no último arquivo): o diretório volta pendente, com os nomes
+    assert [names for _, _, _, names in state["pending"]] == [sorted([raw, "outro.bin"])]
+    assert [p for p, _ in ResumableWalker(str(tree), state).walk()] == []
+
+
+def test_unreadable_or_foreign_journal_is_ignored(tmp_path):
+    checkpoint = ScanCheckpoint(str(tmp_path), str(tmp_path / "tree"))
+    with open(checkpoint.path, "w") as f:
+        f.write("{truncado")
+    assert checkpoint.load() is None
+    other = ScanCheckpoint(str(tmp_path), str(tmp_path / "outra"))
+    other.save({"pending": [], "walk_options": {}})
+    os.replace(other.path, checkpoint.path)  # Diário de outra raiz no mesmo arquivo
+    assert checkpoint.load() is None
+    checkpoint.remove()
+    checkpoint.remove()
+    assert checkpoint.load() is None
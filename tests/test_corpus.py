@@ -0,0 +1,56 @@
+import os
+import hashlib
+from bench import corpus
+from core.scanner import Scanner
+
+PARAMS = {"files": 120, "size_median": 2048, "size_sigma": 1.0, "files_per_dir": 10, "fanout": 3,
+          "hardlinks": 0.1, "hash_hits": 4, "content_hits": 3, "seed": 7}
+
+
+def _tree(directory):
+    files = {}
+    for parent, _, names in os.walk(os.path.join(directory, corpus.TREE)):
+        for name in names:
+            path = os.path.join(parent, name)
+            with open(path, "rb") as f:
+                files[os.path.relpath(path, directory)] = hashlib.sha256(f.read()).hexdigest()
+    return files
+
+
+def test_same_seed_same_corpus(tmp_path):
+    first = corpus.generate(str(tmp_path / "a"), **PARAMS)
+    second = corpus.generate(str(tmp_path / "b"), **PARAMS)
+    assert first == second
+    assert _tree(str(tmp_path / "a")) == _tree(str(tmp_path / "b"))
+    assert (tmp_path / "a" / corpus.SIGNATURES).read_bytes() == (tmp_path / "b" / corpus.SIGNATURES).read_bytes()
+    other = corpus.generate(str(tmp_path / "c"), **dict(PARAMS, seed=8))
+    assert _tree(str(tmp_path / "c")) != _tree(str(tmp_path / "a")) and other["files"] == first["files"]
+
+
+def test_manifest_matches_the_tree(tmp_path):
+    manifest = corpus.generate(str(tmp_path), **PARAMS)
+    files = _tree(str(tmp_path))
+    assert len(files) == manifest["files"] == 120
+    assert sum(name.endswith(".lnk") for name in files) == manifest["files"] - manifest["unique_files"] == 12
+    assert manifest["directories"] == 12
+    unique = {os.stat(tmp_path / name).st_ino: os.path.getsize(tmp_path / name) for name in files}
+    assert sum(unique.values()) == manifest["bytes"]
+    assert corpus.ensure(str(tmp_path), **PARAMS) == manifest
+    mtime = os.stat(tmp_path / corpus.MANIFEST).st_mtime_ns
+    corpus.ensure(str(tmp_path), **PARAMS)
+    assert os.stat(tmp_path / corpus.MANIFEST).st_mtime_ns == mtime  # Mesmos parâmetros: reaproveitado
+
+
+def test_scan_finds_exactly_the_planted_hits(tmp_path):
+    manifest = corpus.generate(str(tmp_path), **PARAMS)
+    scanner = Scanner(workers=2, cache_path=None, history_path=None, checkpoint_dir=None,
+                      signature_db_path=str(tmp_path / corpus.SIGNATURES))
+    results = {}
+    scanner.open()
+    try:
+        scanner.scan(str(tmp_path / corpus.TREE), lambda batch: results.update((r["path"], r["status"]) for r in batch))
+    finally:
+        scanner.close()
+    assert len(results) == manifest["files"]
+    assert sum(status == "Suspicious" for status in results.values()) == manifest["expected_suspicious"]
+    assert manifest["expected_suspicious"] >= PARAMS["hash_hits"] + PARAMS["content_hits"]
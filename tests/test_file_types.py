@@ -0,0 +1,97 @@
+import io
+import tarfile
+import zipfile
+import pytest
+from core.file_types import (sniff, parse_policies, FileTypePolicy, PRIORITIES, ACTION_HIGH, ACTION_HEADER,
+                             ACTION_SKIP, ACTION_LOW)
+from core.scanner import Scanner
+
+
+def _tar():
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w") as tar:
+        info = tarfile.TarInfo("a.txt")
+        info.size = 1
+        tar.addfile(info, io.BytesIO(b"a"))
+    return buf.getvalue()
+
+
+def _zip(name):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as z:
+        z.writestr(name, "x")
+    return buf.getvalue()
+
+
+@pytest.mark.parametrize("header, path, expected", [
+    (b"", "", "empty"),
+    (b"\x7fELF\x02\x01\x01", "", "elf"),
+    (b"MZ\x90\x00", "x.exe", "pe"),
+    (b"\xcf\xfa\xed\xfe\x07", "", "macho"),
+    (b"\xca\xfe\xba\xbe\x00\x00\x00\x02", "", "macho"),  # Binário universal com 2 arquiteturas
+    (b"\xca\xfe\xba\xbe\x00\x00\x00\x34", "", "java"),  # Classe Java 8
+    (b"#!/bin/sh\necho", "", "script"),
+    (b"echo oi\n", "instalar.sh", "script"),
+    (b"echo oi\n", "leia.txt", "text"),
+    (b"%PDF-1.7", "", "pdf"),
+    (_zip("a.txt"), "", "zip"),
+    (_zip("[Content_Types].xml"), "", "office"),
+    (_tar()[:512], "", "archive"),
+    (b"\x1f\x8b\x08", "", "archive"),
+    (b"\x89PNG\r\n\x1a\n", "", "image"),
+    (b"RIFF\x00\x00\x00\x00WEBPVP8", "", "image"),
+    (b"RIFF\x00\x00\x00\x00WAVEfmt ", "", "media"),
+    (b"\x00\x00\x00\x18ftypmp42", "", "media"),
+    (b"\x00\x01\x02\x03", "", "data"),
+])
+def test_sniff(header, path, expected):
+    assert sniff(header, path) == expected
+
+
+def test_text_heuristics():
+    assert sniff("ação".encode("utf-8") * 100) == "text"
+    assert sniff(("ação" * 100).encode("utf-8")[:-1]) == "text"  # Caractere cortado no fim do cabeçalho
+    assert sniff("port = 8080  # porta padrão do servidor web\n".encode("latin-1") * 10) == "text"  # >= 95% ASCII
+    assert sniff(bytes(range(0x80, 0x100)) * 2) == "data"
+    assert sniff(b"texto\x00com nulo") == "data"
+
+
+def test_parse_policies():
+    assert parse_policies(["media=skip", " Archive = FULL "]) == {"media": "skip", "archive": "full"}
+    for item in ("video=skip", "media=ignorar", "media"):
+        with pytest.raises(ValueError):
+            parse_policies([item])
+    with pytest.raises(ValueError):
+        FileTypePolicy({"media": "ignorar"})
+
+
+def test_classify_priorities(tmp_path):
+    policy = FileTypePolicy({"image": ACTION_SKIP})
+    cases = {"a.elf": b"\x7fELF" + b"\x00" * 100, "b.mp3": b"ID3" + b"\x00" * 100, "c.png": b"\x89PNG\r\n\x1a\n",
+             "d.gz": b"\x1f\x8b\x08" + b"\x00" * 10}
+    for name, data in cases.items():
+        (tmp_path / name).write_bytes(data)
+    assert policy.classify(str(tmp_path / "a.elf")) == (PRIORITIES[ACTION_HIGH], ("elf", ACTION_HIGH, None))
+    priority, (file_type, action, header) = policy.classify(str(tmp_path / "b.mp3"))
+    assert (file_type, action, header) == ("media", ACTION_HEADER, cases["b.mp3"])  # Só o cabeçalho é retido
+    assert policy.classify(str(tmp_path / "c.png"))[0] is None
+    assert policy.classify(str(tmp_path / "d.gz"))[0] == PRIORITIES[ACTION_LOW]
+    assert PRIORITIES[ACTION_HIGH] < PRIORITIES[ACTION_LOW]
+
+
+def test_scanner_applies_the_policy(tmp_path):
+    (tmp_path / "musica.mp3").write_bytes(b"ID3" + b"\x00" * 100 + b"trojan" + b"\x00" * 10000)
+    (tmp_path / "tarde.mp3").write_bytes(b"ID3" + b"\x00" * 10000 + b"trojan")
+    (tmp_path / "foto.png").write_bytes(b"\x89PNG\r\n\x1a\n" + b"trojan")
+    scanner = Scanner(workers=1, cache_path=None, history_path=None, checkpoint_dir=None, signature_db_path=None,
+                      file_policies={"image": ACTION_SKIP})
+    scanner.open()
+    try:
+        results = {}
+        scanner.scan(str(tmp_path), lambda batch: results.update((r["path"], r) for r in batch))
+    finally:
+        scanner.close()
+    assert results[str(tmp_path / "musica.mp3")]["status"] == "Suspicious"  # Padrão dentro do cabeçalho
+    assert results[str(tmp_path / "tarde.mp3")]["status"] == "Clean"  # Depois do cabeçalho: não lido
+    assert results[str(tmp_path / "tarde.mp3")]["digests"] == {}
+    assert results[str(tmp_path / "foto.png")]["status"] == "Skipped"
@@ -0,0 +1,104 @@
+import os
+import time
+import threading
+import pytest
+from core.file_watcher import FileWatcher, is_supported
+
+pytestmark = pytest.mark.skipif(not is_supported(), reason="inotify só no Linux")
+
+
+class Collector:
+    def __init__(self):
+        self.paths = []
+        self.lock = threading.Lock()
+
+    def __call__(self, paths):
+        with self.lock:
+            self.paths.extend(paths)
+
+    def wait_for(self, *paths, timeout=10):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self.lock:
+                if all(p in self.paths for p in paths):
+                    return True
+            time.sleep(0.02)
+        return False
+
+
+@pytest.fixture
+def watch(tmp_path):
+    watchers = []
+
+    def start(root, **options):
+        collector = Collector()
+        watcher = FileWatcher([str(root)], collector, debounce=0.05, max_delay=1.0, use_fanotify=False, **options)
+        thread = threading.Thread(target=watcher.run, daemon=True)
+        thread.start()
+        watchers.append((watcher, thread))
+        deadline = time.monotonic() + 10
+        while watcher.mode is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return watcher, collector
+
+    yield start
+    for watcher, thread in watchers:
+        watcher.stop()
+        thread.join(10)
+
+
+def test_reports_writes_new_directories_and_moves(tmp_path, watch):
+    (tmp_path / "ignored").mkdir()
+    watcher, seen = watch(tmp_path, walk_options={"exclude_globs": ("*.tmp", "ignored"), "exclude_paths": ()})
+    (tmp_path / "a.bin").write_bytes(b"a")
+    (tmp_path / "b.tmp").write_bytes(b"b")
+    (tmp_path / "ignored" / "c.bin").write_bytes(b"c")
+    (tmp_path / "new").mkdir()
+    (tmp_path / "new" / "d.bin").write_bytes(b"d")
+    outside = tmp_path.parent / (tmp_path.name + "-fora.bin")
+    outside.write_bytes(b"e")
+    os.rename(outside, tmp_path / "e.bin")
+    assert seen.wait_for(str(tmp_path / "a.bin"), str(tmp_path / "e.bin"))
+    # O diretório novo chega inteiro ou arquivo a arquivo, dependendo de quando o watch foi criado
+    assert seen.wait_for(str(tmp_path / "new")) or seen.wait_for(str(tmp_path / "new" / "d.bin"))
+    time.sleep(0.2)
+    assert not [p for p in seen.paths if p.endswith(".tmp") or "ignored" in p]
+
+
+def test_renamed_directory_is_watched_under_the_new_name(tmp_path, watch):
+    (tmp_path / "old" / "sub").mkdir(parents=True)
+    watcher, seen = watch(tmp_path)
+    os.rename(tmp_path / "old", tmp_path / "renamed")
+    assert seen.wait_for(str(tmp_path / "renamed"))
+    (tmp_path / "renamed" / "sub" / "f.bin").write_bytes(b"f")
+    assert seen.wait_for(str(tmp_path / "renamed" / "sub" / "f.bin"))
+    assert not [p for p in seen.paths if "/old" in p]
+    assert str(tmp_path / "old") not in watcher.watches.values()
+
+
+def test_directory_moved_out_of_the_root_is_unwatched(tmp_path, watch):
+    root = tmp_path / "root"
+    (root / "leaving" / "sub").mkdir(parents=True)
+    watcher, seen = watch(root)
+    assert len(watcher.watches) == 3
+    os.rename(root / "leaving", tmp_path / "gone")
+    deadline = time.monotonic() + 10
+    while len(watcher.watches) > 1 and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert list(watcher.watches.values()) == [str(root)]
+    (tmp_path / "gone" / "sub" / "f.bin").write_bytes(b"f")
+    (root / "still.bin").write_bytes(b"s")
+    assert seen.wait_for(str(root / "still.bin"))
+    assert not [p for p in seen.paths if "leaving" in p or "gone" in p]
+
+
+def test_flush_collapses_nested_directories(tmp_path):
+    batches = []
+    watcher = FileWatcher([str(tmp_path)], batches.append, use_fanotify=False)
+    watcher._queue_dir("/r/a", "/r/a/b", "/r/c")
+    for path in ("/r/a/b/f", "/r/c/g", "/r/d/h", "/r/ab"):
+        watcher._queue_file(path)
+    watcher._flush()
+    assert batches == [["/r/a", "/r/c", "/r/ab", "/r/d/h"]]
+    watcher._flush()
+    assert len(batches) == 1 and watcher.first_event is None
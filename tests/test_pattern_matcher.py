@@ -0,0 +1,89 @@
+import random
+import pytest
+from core import pattern_matcher
+from core.pattern_matcher import PatternMatcher
+
+
+@pytest.fixture(autouse=True, params=["numpy", "re"])
+def backend(request, monkeypatch):
+    # Os mesmos casos com o filtro vetorizado e com a alternância (caminho sem NumPy)
+    if request.param == "numpy" and pattern_matcher.np is None:
+        pytest.skip("NumPy não instalado")
+    if request.param == "re":
+        monkeypatch.setattr(pattern_matcher, "np", None)
+    return request.param
+
+
+def _feed(matcher, data, chunk_size, first_only=False):
+    stream = matcher.stream(first_only=first_only)
+    for i in range(0, len(data), chunk_size):
+        stream.update(data[i:i + chunk_size])
+    return stream.matched_patterns()
+
+
+def test_match_across_chunk_boundary():
+    matcher = PatternMatcher(["malware", "trojan"])
+    data = b"x" * 1000 + b"malware" + b"y" * 1000
+    # Todas as posições de corte dentro do padrão
+    for cut in range(1001, 1007):
+        stream = matcher.stream(first_only=False)
+        stream.update(data[:cut])
+        stream.update(data[cut:])
+        assert stream.matched_patterns() == [b"malware"], cut
+
+
+def test_one_byte_chunks_find_all_patterns():
+    matcher = PatternMatcher(["he", "she", "hers", "his"])
+    assert _feed(matcher, b"ushers", 1) == [b"he", b"she", b"hers"]
+    assert matcher.search(b"ushers") == [b"he", b"she", b"hers"]
+
+
+def test_overlapping_prefix_after_failed_match():
+    matcher = PatternMatcher(["virus"])
+    assert _feed(matcher, b"virvirus", 3) == [b"virus"]
+    assert _feed(matcher, b"viru", 2) == []
+
+
+def test_first_only_stops_at_first_match():
+    matcher = PatternMatcher(["trojan", "virus"])
+    stream = matcher.stream()
+    stream.update(b"...troj")
+    stream.update(b"an... virus")
+    assert stream.done
+    assert stream.matched_patterns() == [b"trojan"]
+
+
+def test_no_patterns():
+    matcher = PatternMatcher([])
+    assert len(matcher) == 0
+    assert matcher.search(b"malware") == []
+
+
+def test_long_patterns_across_every_boundary():
+    patterns = [b"EICAR-STANDARD-ANTIVIRUS", b"X5O!P%@AP", b"abc", b"mal\x00ware"]
+    matcher = PatternMatcher(patterns)
+    data = b"." * 50 + b"X5O!P%@AP" + b"--EICAR-STANDARD-ANTIVIRUS" + b"abc" + b"mal\x00ware" + b"." * 50
+    for chunk_size in range(1, 40):
+        assert _feed(matcher, data, chunk_size) == patterns, chunk_size
+
+
+def test_reused_buffer_keeps_the_tail():
+    # hash_file reaproveita o mesmo buffer: a cauda guardada não pode apontar para ele
+    matcher = PatternMatcher(["trojan-horse"])
+    buffer = bytearray(8)
+    stream = matcher.stream()
+    for chunk in (b"xxxxtroj", b"an-horse"):
+        buffer[:] = chunk
+        stream.update(memoryview(buffer))
+    assert stream.matched_patterns() == [b"trojan-horse"]
+
+
+def test_matches_brute_force():
+    rnd = random.Random(7)
+    for _ in range(300):
+        patterns = [bytes(rnd.choice(b"ab\x00") for _ in range(rnd.randint(1, 10))) for _ in range(rnd.randint(1, 8))]
+        data = bytes(rnd.choice(b"ab\x00c") for _ in range(rnd.randint(0, 80)))
+        matcher = PatternMatcher(patterns)
+        expected = [p for p in matcher.patterns if p in data]
+        assert _feed(matcher, data, rnd.randint(1, 16)) == expected, (patterns, data)
+        assert bool(_feed(matcher, data, 5, first_only=True)) == bool(expected)
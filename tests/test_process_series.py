@@ -0,0 +1,121 @@
+import pytest
+from core.process_table import ProcessTable
+from core import process_series
+from core.process_series import (ProcessSeries, describe, REASON_ANOMALY, REASON_HIGH_MEMORY, REASON_SUSTAINED_CPU,
+                                 MIN_SAMPLES)
+
+pytestmark = pytest.mark.skipif(not process_series.available(), reason="NumPy não instalado")
+
+
+class Sampler:
+    # pid -> {"start", "cpu_time", "rss", "io", "fds", "threads"}
+    def __init__(self):
+        self.processes = {}
+
+    def spawn(self, pid, start, **values):
+        self.processes[pid] = dict({"start": start, "cpu_time": 0.0, "rss": 10 * 1024 * 1024, "io": 0,
+                                    "fds": 10, "threads": 2}, **values)
+        return self.processes[pid]
+
+    def pids(self):
+        return list(self.processes)
+
+    def total_memory(self):
+        return 1024 * 1024 * 1024
+
+    def read(self, table, pid, slot):
+        p = self.processes.get(pid)
+        if p is None:
+            return None
+        return (None, p["start"], f"p{pid}", p["cpu_time"], p["rss"], p["threads"], "root", "", p["io"],
+                p["fds"])
+
+
+def _tick(table, sampler, series, now):
+    # ProcessTable.refresh com relógio controlado
+    table.last_refresh = now
+    for pid in [pid for pid in table.slots if pid not in sampler.processes]:
+        table.remove(pid)
+    for pid in sampler.pids():
+        table.sample(sampler, pid, now)
+    return series.update(table)
+
+
+def test_steady_process_and_isolated_spikes_are_not_flagged():
+    table, sampler, series = ProcessTable(), Sampler(), ProcessSeries(window=60)
+    p = sampler.spawn(1, 1.0)
+    for t in range(40):
+        p["cpu_time"] += 0.2 if t % 7 else 4.0  # Picos de CPU curtos
+        p["fds"] = 10 + t % 3
+        if t == 20:
+            p["fds"] = 400  # Um pico só de descritores
+        reasons = _tick(table, sampler, series, 100.0 + t * 5)
+        assert reasons[table.slots[1]] == 0, t
+
+
+def test_sustained_deviation_is_an_anomaly():
+    table, sampler, series = ProcessTable(), Sampler(), ProcessSeries(window=60)
+    p = sampler.spawn(1, 1.0)
+    for t in range(MIN_SAMPLES + 5):
+        _tick(table, sampler, series, 100.0 + t)
+    flagged = []
+    p["fds"] = 500
+    for t in range(3):
+        flagged.append(int(_tick(table, sampler, series, 200.0 + t)[table.slots[1]]))
+    assert flagged == [0, 0, REASON_ANOMALY]
+    assert describe(flagged[-1]) == "comportamento anômalo"
+
+
+def test_cpu_must_stay_high_for_the_whole_period():
+    table, sampler, series = ProcessTable(), Sampler(), ProcessSeries(window=60, sustained_seconds=30)
+    busy, dips = sampler.spawn(1, 1.0), sampler.spawn(2, 2.0)
+    reasons = []
+    for t in range(12):
+        busy["cpu_time"] += 4.5  # 90% a cada 5 s
+        dips["cpu_time"] += 4.5 if t != 8 else 0.5
+        r = _tick(table, sampler, series, 100.0 + t * 5)
+        reasons.append((int(r[table.slots[1]]), int(r[table.slots[2]])))
+    assert reasons[6] == (0, 0)  # Primeira amostra (CPU 0) ainda dentro do período
+    assert reasons[7] == (REASON_SUSTAINED_CPU, REASON_SUSTAINED_CPU)
+    assert reasons[-1] == (REASON_SUSTAINED_CPU, 0)
+    young = sampler.spawn(3, 3.0)
+    young["cpu_time"] = 1000.0
+    for t in range(3):
+        young["cpu_time"] += 5.0
+        r = _tick(table, sampler, series, 200.0 + t * 5)
+    assert r[table.slots[3]] == 0  # Existe há menos tempo que o período
+
+
+def test_high_memory_after_warm_up():
+    table, sampler, series = ProcessTable(), Sampler(), ProcessSeries(window=60)
+    sampler.spawn(1, 1.0, rss=700 * 1024 * 1024)
+    reasons = [int(_tick(table, sampler, series, 100.0 + t)[table.slots[1]]) for t in range(MIN_SAMPLES + 1)]
+    assert reasons[:MIN_SAMPLES] == [0] * MIN_SAMPLES
+    assert reasons[-1] & REASON_HIGH_MEMORY
+
+
+def test_reused_pid_starts_a_new_history_and_the_ring_wraps():
+    table, sampler, series = ProcessTable(), Sampler(), ProcessSeries(window=5)
+    p = sampler.spawn(1, 1.0)
+    for t in range(8):
+        p["threads"] = t
+        _tick(table, sampler, series, 100.0 + t)
+    slot = table.slots[1]
+    assert list(series.history(slot, "threads")) == [3, 4, 5, 6, 7]
+    size = series.nbytes
+    sampler.spawn(1, 50.0, threads=42)  # Mesmo pid, outro processo
+    _tick(table, sampler, series, 200.0)
+    assert list(series.history(table.slots[1], "threads")) == [42]
+    del sampler.processes[1]
+    reasons = _tick(table, sampler, series, 201.0)
+    assert not reasons.any() and len(series.history(slot)) == 0
+    assert series.nbytes == size
+
+
+def test_series_grow_with_the_table():
+    table, sampler, series = ProcessTable(capacity=2), Sampler(), ProcessSeries(window=4)
+    for pid in range(1, 6):
+        sampler.spawn(pid, float(pid), fds=pid)
+    _tick(table, sampler, series, 100.0)
+    assert series.capacity == table.capacity == 8
+    assert [int(series.history(table.slots[pid], "fds")[0]) for pid in range(1, 6)] == [1, 2, 3, 4, 5]
@@ -0,0 +1,156 @@
+import os
+import sys
+import subprocess
+import psutil
+import pytest
+from core import process_series
+from core.process_table import ProcessTable, ProcFsSampler, PsutilSampler
+from core.binary_checker import BinaryChecker
+from core.process_checker import ProcessAnalyzer
+
+
+class FakeSampler:
+    # pid -> [início, nome, tempo de CPU, rss]; dono e cmdline só são devolvidos para processos novos
+    def __init__(self, processes):
+        self.processes = processes
+
+    def pids(self):
+        return list(self.processes)
+
+    def total_memory(self):
+        return 1000
+
+    def read(self, table, pid, slot):
+        if pid not in self.processes:
+            return None
+        start, name, cpu_time, rss = self.processes[pid]
+        fresh = slot is None or start != table.start[slot]
+        owner, cmdline = ("root", f"/bin/{name}") if fresh else (None, None)
+        return None, start, name, cpu_time, rss, 1, owner, cmdline, 0, 0
+
+
+def test_refresh_tracks_new_exited_and_reused_pids():
+    sampler = FakeSampler({1: [10.0, "init", 0.0, 100], 2: [20.0, "a", 0.0, 100], 3: [30.0, "b", 0.0, 100]})
+    table = ProcessTable(capacity=2)
+    assert table.refresh(sampler) == {"new": 3, "exited": 0, "reused": 0}
+    assert table.capacity == 4 and len(table) == 3
+    slot_b = table.slots[3]
+    del sampler.processes[2]
+    sampler.processes[3] = [31.0, "c", 0.0, 100]  # Mesmo pid, outro processo
+    sampler.processes[4] = [40.0, "d", 0.0, 100]
+    assert table.refresh(sampler) == {"new": 1, "exited": 1, "reused": 1}
+    assert sorted(table.slots) == [1, 3, 4]
+    assert (table.name[table.slots[3]], table.start[table.slots[3]], table.cmdline[table.slots[3]]) == (
+        "c", 31.0, "/bin/c")
+    assert table.samples[table.slots[3]] == 1
+    assert sorted(table.slots.values()) == [0, 1, 2] and slot_b in table.slots.values()  # Slots reaproveitados
+    assert table.pid[3] == 0 and table.refresh(sampler) == {"new": 0, "exited": 0, "reused": 0}
+
+
+def test_cpu_rate_and_cached_owner():
+    sampler = FakeSampler({7: [1.0, "worker", 5.0, 250]})
+    table = ProcessTable()
+    table.sample(sampler, 7, now=100.0)
+    slot = table.slots[7]
+    assert table.cpu[slot] == 0.0  # Primeira amostra só estabelece a base
+    sampler.processes[7][2] = 6.5
+    table.sample(sampler, 7, now=102.0)
+    assert table.cpu[slot] == 75.0
+    assert table.owner[slot] == "root" and table.cmdline[slot] == "/bin/worker"
+    assert table.memory_percent(slot) == 25.0
+    info = table.info(slot)
+    assert (info["pid"], info["username"], info["create_time"], info["suspeito"]) == (7, "root", 1.0, False)
+    del sampler.processes[7]
+    assert table.sample(sampler, 7) is None and 7 not in table.slots
+
+
+def test_analyzer_flags_by_name_and_sustained_resources(monkeypatch):
+    monkeypatch.setattr(process_series, "available", lambda: False)
+    monkeypatch.setattr(BinaryChecker, "available", staticmethod(lambda root=None: False))
+    sampler = FakeSampler({10: [1.0, "keylogger", 0.0, 10], 11: [2.0, "busy", 0.0, 10], 12: [3.0, "ok", 0.0, 10]})
+    analyzer = ProcessAnalyzer(sampler=sampler)
+    assert [p["pid"] for p in analyzer.detect_suspicious()] == [10]
+    sampler.processes[11][2] = 1000.0  # Muito tempo de CPU desde a passada anterior
+    flagged = {p["pid"]: p["motivo"] for p in analyzer.detect_suspicious()}
+    assert flagged == {10: "nome", 11: "recursos"}
+    assert analyzer.last_delta == {"new": 0, "exited": 0, "reused": 0}
+
+
+def test_terminate_refuses_a_reused_pid(monkeypatch):
+    monkeypatch.setattr(BinaryChecker, "available", staticmethod(lambda root=None: False))
+    child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+    try:
+        sampler = FakeSampler({child.pid: [psutil.Process(child.pid).create_time() - 100, "python", 0.0, 1]})
+        analyzer = ProcessAnalyzer(sampler=sampler)
+        analyzer.refresh()
+        try:
+            analyzer.terminate_process(child.pid)
+        except Exception as e:
+            assert str(e) == "Process not found"
+        else:
+            raise AssertionError("processo de outro dono do pid encerrado")
+        assert child.poll() is None
+        analyzer.table.start[analyzer.table.slots[child.pid]] = psutil.Process(child.pid).create_time()
+        analyzer.terminate_process(child.pid)
+        assert child.wait(5) is not None
+    finally:
+        child.kill()
+        child.wait()
+
+
+def _fake_proc(root, pid, comm, utime, starttime, rss_pages, uid=1000, cmdline=b"prog\0--flag\0"):
+    (root / "stat").write_bytes(b"cpu  1 2 3 4\nbtime 1700000000\n")
+    (root / "meminfo").write_bytes(b"MemTotal:       2048 kB\nMemFree:         1024 kB\n")
+    proc = root / str(pid)
+    (proc / "fd").mkdir(parents=True, exist_ok=True)
+    fields = ["S", "1", "1", "1", "0", "-1", "0", "0", "0", "0", "0", str(utime), "50", "0", "0", "20", "0",
+              "3", "0", str(starttime), "1000", str(rss_pages)] + ["0"] * 30
+    (proc / "stat").write_bytes(b"%d (%s) " % (pid, comm) + " ".join(fields).encode())
+    (proc / "status").write_bytes(b"Name:\tx\nUid:\t%d\t%d\t%d\t%d\n" % (uid, uid, uid, uid))
+    (proc / "cmdline").write_bytes(cmdline)
+    (proc / "io").write_bytes(b"rchar: 100\nwchar: 20\nsyscr: 1\n")
+
+
+def test_proc_sampler_parses_stat_and_reads_owner_only_for_new_processes(tmp_path):
+    _fake_proc(tmp_path, 42, b"a (b) c", 250, 500, 3)
+    (tmp_path / "self").mkdir()
+    sampler = ProcFsSampler(root=str(tmp_path), extended=True)
+    ticks, page = os.sysconf("SC_CLK_TCK"), os.sysconf("SC_PAGE_SIZE")
+    assert sampler.pids() == [42] and sampler.total_memory() == 2048 * 1024
+    table = ProcessTable()
+    assert table.sample(sampler, 42) == "new"
+    slot = table.slots[42]
+    assert table.name[slot] == "a (b) c"  # Parênteses no nome: corta no último ")"
+    assert table.start[slot] == 1700000000 + 500 / ticks
+    assert table.cpu_time[slot] == 300 / ticks
+    assert (table.rss[slot], table.threads[slot], table.io[slot]) == (3 * page, 3, 120)
+    assert (table.owner[slot], table.cmdline[slot]) == (1000, "prog --flag")
+
+    (tmp_path / "42" / "status").write_bytes(b"Uid:\t0\t0\t0\t0\n")
+    (tmp_path / "42" / "cmdline").write_bytes(b"outro\0")
+    assert table.sample(sampler, 42) == ""
+    assert (table.owner[slot], table.cmdline[slot]) == (1000, "prog --flag")  # Mesmo processo: não relê
+    _fake_proc(tmp_path, 42, b"novo", 250, 500, 3, cmdline=b"novo\0")
+    table.sample(sampler, 42)
+    assert (table.owner[slot], table.cmdline[slot]) == (1000, "novo")  # exec: só a cmdline é relida
+    _fake_proc(tmp_path, 42, b"novo", 0, 900, 3, uid=0)
+    assert table.sample(sampler, 42) == "reused" and table.owner[table.slots[42]] == 0
+    (tmp_path / "42" / "stat").write_bytes(b"42 (truncado")
+    assert table.sample(sampler, 42) is None and len(table) == 0
+
+
+@pytest.mark.skipif(not ProcFsSampler.available(), reason="/proc só no Linux")
+def test_proc_sampler_agrees_with_psutil():
+    child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)", "marcador"])
+    try:
+        proc, fallback = ProcessTable(), ProcessTable()
+        proc.sample(ProcFsSampler(), child.pid)
+        fallback.sample(PsutilSampler(), child.pid)
+        a, b = proc.slots[child.pid], fallback.slots[child.pid]
+        assert proc.name[a] == fallback.name[b]
+        assert abs(proc.start[a] - fallback.start[b]) < 1
+        assert proc.cmdline[a] == fallback.cmdline[b] and proc.cmdline[a].endswith("marcador")
+        assert proc.username(a) == fallback.username(b)
+    finally:
+        child.kill()
+        child.wait()
@@ -0,0 +1,180 @@
+import os
+import sys
+import time
+import errno
+import threading
+import subprocess
+import pytest
+from core import process_series
+from core.binary_checker import BinaryChecker
+from core.process_checker import ProcessAnalyzer
+from core.process_watcher import (ProcessWatcher, connector_supported, NLMSG_HEADER, CN_MSG, PROC_EVENT, FORK_EVENT,
+                                  PID_EVENT, CN_IDX_PROC, CN_VAL_PROC, NLMSG_DONE, PROC_EVENT_FORK, PROC_EVENT_EXEC,
+                                  PROC_EVENT_EXIT, PROC_EVENT_NONE, EVENT_FORK, EVENT_EXEC, EVENT_EXIT, EVENT_RESYNC,
+                                  MIN_POLL_INTERVAL, MAX_POLL_INTERVAL)
+
+
+def _message(what, event, idx=CN_IDX_PROC):
+    # Mensagem netlink do conector como o kernel envia (cabeçalho, cn_msg, proc_event)
+    payload = PROC_EVENT.pack(what, 0, 0) + event
+    cn = CN_MSG.pack(idx, CN_VAL_PROC, 0, 0, len(payload), 0)
+    length = NLMSG_HEADER.size + len(cn) + len(payload)
+    return NLMSG_HEADER.pack(length, NLMSG_DONE, 0, 0, 0) + cn + payload + bytes(-length % 4)
+
+
+class Socket:
+    def __init__(self, *reads):
+        self.reads = list(reads)
+
+    def recv(self, size):
+        if not self.reads:
+            raise BlockingIOError()
+        data = self.reads.pop(0)
+        if isinstance(data, Exception):
+            raise data
+        return data
+
+
+def test_connector_messages_become_events(tmp_path):
+    (tmp_path / "200").mkdir()
+    (tmp_path / "200" / "comm").write_bytes(b"curl\n")
+    os.symlink("/usr/bin/curl", tmp_path / "200" / "exe")
+    watcher = ProcessWatcher(lambda batch: None, use_connector=False, root=str(tmp_path))
+    watcher.sock = Socket(
+        _message(PROC_EVENT_FORK, FORK_EVENT.pack(1, 1, 200, 200)) +
+        _message(PROC_EVENT_FORK, FORK_EVENT.pack(1, 1, 201, 200)) +  # Thread: ignorada
+        _message(PROC_EVENT_EXEC, PID_EVENT.pack(200, 200)),
+        OSError(errno.ENOBUFS, "sem espaço"),
+        _message(PROC_EVENT_EXEC, PID_EVENT.pack(300, 300)) +  # Terminou antes de ser descrito
+        _message(PROC_EVENT_EXIT, PID_EVENT.pack(300, 300)) +
+        _message(PROC_EVENT_EXIT, PID_EVENT.pack(9, 9), idx=7))  # Outro conector
+    watcher._read_connector()
+    assert watcher.pending == [(EVENT_FORK, 200, None), (EVENT_EXEC, 200, ("curl", "/usr/bin/curl")),
+                               (EVENT_RESYNC, 0, None), (EVENT_EXEC, 300, None), (EVENT_EXIT, 300, None)]
+
+
+def test_listen_acknowledgement():
+    ack = _message(PROC_EVENT_NONE, (1).to_bytes(4, sys.byteorder))
+    assert ProcessWatcher._ack_error(ack) == 1
+    assert ProcessWatcher._ack_error(_message(PROC_EVENT_NONE, bytes(4))) == 0
+    assert ProcessWatcher._ack_error(_message(PROC_EVENT_EXIT, PID_EVENT.pack(1, 1))) is None
+    assert ProcessWatcher._ack_error(b"curto") is None
+
+
+def test_polling_interval_adapts(monkeypatch):
+    watcher = ProcessWatcher(lambda batch: None, use_connector=False)
+    pids = [{1, 2}]
+    monkeypatch.setattr(watcher, "_pids", lambda: pids[0])
+    intervals = []
+    for current in ({1, 2}, {1, 2}, {1, 2, 3}, {1, 3}, {1, 3}, {1, 3}, {1, 3}):
+        pids[0] = current
+        watcher._poll()
+        intervals.append(watcher.interval)
+    assert intervals == [MIN_POLL_INTERVAL * 2, MIN_POLL_INTERVAL * 4, MIN_POLL_INTERVAL, MIN_POLL_INTERVAL,
+                         MIN_POLL_INTERVAL * 2, MIN_POLL_INTERVAL * 4, MAX_POLL_INTERVAL]
+    assert watcher.pending == [(EVENT_EXEC, 3, None), (EVENT_EXIT, 2, None)]
+
+
+def test_polling_reports_real_processes():
+    batches = []
+    lock = threading.Lock()
+
+    def on_events(batch):
+        with lock:
+            batches.extend(batch)
+
+    watcher = ProcessWatcher(on_events, batch_delay=0.05, use_connector=False)
+    thread = threading.Thread(target=watcher.run, daemon=True)
+    thread.start()
+    try:
+        deadline = time.monotonic() + 10
+        while watcher.known is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(2.5)"])  # Mais que MAX_POLL_INTERVAL
+        child.wait()
+        while time.monotonic() < deadline:
+            with lock:
+                kinds = [kind for kind, pid, _ in batches if pid == child.pid]
+            if EVENT_EXIT in kinds:
+                break
+            time.sleep(0.05)
+        assert kinds == [EVENT_EXEC, EVENT_EXIT]
+        assert watcher.mode == "polling"
+    finally:
+        watcher.stop()
+        thread.join(10)
+    assert not thread.is_alive()
+
+
+@pytest.mark.skipif(not connector_supported() or os.geteuid() != 0, reason="conector de processos exige root")
+def test_connector_when_the_kernel_allows_it():
+    watcher = ProcessWatcher(lambda batch: None)
+    try:
+        watcher._open_connector()
+    except OSError:
+        pytest.skip("conector de processos indisponível neste kernel ou namespace")
+    try:
+        child = subprocess.Popen(["/bin/true"])
+        child.wait()
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline and (EVENT_EXIT, child.pid, None) not in watcher.pending:
+            watcher._read_connector()
+            time.sleep(0.01)
+        assert (EVENT_FORK, child.pid, None) in watcher.pending
+        assert (EVENT_EXIT, child.pid, None) in watcher.pending
+    finally:
+        watcher.sock.close()
+
+
+class Sampler:
+    def __init__(self, processes):
+        self.processes = processes  # pid -> nome
+
+    def pids(self):
+        return list(self.processes)
+
+    def total_memory(self):
+        return 1000
+
+    def read(self, table, pid, slot):
+        if pid not in self.processes:
+            return None
+        return None, float(pid), self.processes[pid], 0.0, 1, 1, "root", "", 0, 0
+
+
+class Binaries:
+    def __init__(self, flagged):
+        self.flagged = flagged
+        self.invalidated = []
+
+    def check(self, table):
+        return {pid: "/tmp/mau" for pid in table.slots if pid in self.flagged}
+
+    def check_file(self, path):
+        return path if path == "/tmp/mau" else ""
+
+    def invalidate(self, pid):
+        self.invalidated.append(pid)
+
+
+def test_analyzer_applies_event_batches(monkeypatch):
+    monkeypatch.setattr(process_series, "available", lambda: False)
+    monkeypatch.setattr(BinaryChecker, "available", staticmethod(lambda root=None: False))
+    sampler = Sampler({1: "init", 2: "bash"})
+    binaries = Binaries({5})
+    analyzer = ProcessAnalyzer(sampler=sampler, binary_checker=binaries)
+    assert analyzer.detect_suspicious() == []
+    sampler.processes.update({5: "updater", 6: "stealer-bot"})
+    del sampler.processes[2]
+    found = analyzer.apply_events([
+        (EVENT_FORK, 5, None), (EVENT_EXEC, 5, ("updater", "/usr/bin/updater")), (EVENT_EXEC, 6, None),
+        (EVENT_EXIT, 2, None),
+        (EVENT_EXEC, 7, ("keylogger", "/tmp/k")), (EVENT_EXIT, 7, None),  # Viveu menos que o lote
+        (EVENT_EXEC, 8, ("ls", "/tmp/mau")),
+    ])
+    assert {p["pid"]: p["motivo"] for p in found} == {5: "assinatura", 6: "nome", 7: "nome", 8: "assinatura"}
+    assert [p.get("encerrado", False) for p in sorted(found, key=lambda p: p["pid"])] == [False, False, True, True]
+    assert binaries.invalidated == [5, 6] and sorted(analyzer.processes) == [1, 5, 6]
+    assert analyzer.apply_events([(EVENT_EXEC, 6, None)]) == []  # Já marcado: não repete
+    sampler.processes[9] = "botnet"
+    assert [p["pid"] for p in analyzer.apply_events([(EVENT_RESYNC, 0, None)])] == [9]
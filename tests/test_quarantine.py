@@ -0,0 +1,197 @@
+import os
+import stat
+import errno
+from infra import quarantine
+from infra.quarantine import QuarantineStore, STATE_RESTORED
+
+
+def test_round_trip_keeps_content_and_metadata(tmp_path):
+    path = tmp_path / "data" / "payload.bin"
+    path.parent.mkdir()
+    content = os.urandom(300 * 1024) + b"malware" * 1000
+    path.write_bytes(content)
+    os.chmod(path, 0o640)
+    os.utime(path, ns=(1_500_000_000_123_456_789, 1_500_000_000_123_456_789))
+    before = os.stat(path)
+
+    store = QuarantineStore(str(tmp_path / "quarantine"))
+    try:
+        item_id = store.quarantine(str(path))
+        assert not path.exists()
+        item = store.get(item_id)
+        # O objeto guardado não é o arquivo original em claro
+        with open(store.object_path(item["sha256"]), "rb") as f:
+            assert b"malware" * 10 not in f.read()
+
+        store.restore(item_id)
+        after = os.stat(path)
+        assert path.read_bytes() == content
+        assert stat.S_IMODE(after.st_mode) == 0o640
+        assert (after.st_uid, after.st_gid) == (before.st_uid, before.st_gid)
+        assert after.st_mtime_ns == before.st_mtime_ns
+        assert store.get(item_id)["state"] == STATE_RESTORED
+    finally:
+        store.close()
+
+
+def test_restore_does_not_overwrite_existing_file(tmp_path):
+    path = tmp_path / "file.txt"
+    path.write_bytes(b"original")
+    store = QuarantineStore(str(tmp_path / "quarantine"))
+    try:
+        item_id = store.quarantine(str(path))
+        path.write_bytes(b"novo")
+        results = store.restore_many([item_id])
+        assert results[0][2]  # Erro: o caminho já existe
+        assert path.read_bytes() == b"novo"
+        store.restore_many([item_id], overwrite=True)
+        assert path.read_bytes() == b"original"
+    finally:
+        store.close()
+
+
+def test_delete_while_identical_content_is_staging(tmp_path, monkeypatch):
+    first, second = tmp_path / "a.bin", tmp_path / "b.bin"
+    content = b"mesmo conteudo" * 1000
+    first.write_bytes(content)
+    second.write_bytes(content)
+    store = QuarantineStore(str(tmp_path / "quarantine"))
+    try:
+        first_id = store.quarantine(str(first))
+        deleted = []
+        fsync_dir = quarantine._fsync_dir
+
+        def delete_first_then_sync(directory):
+            # O objeto de b.bin já está no lugar, mas o item ainda não foi marcado como guardado
+            if not deleted:
+                deleted.append(store.delete_many([first_id]))
+            fsync_dir(directory)
+
+        monkeypatch.setattr(quarantine, "_fsync_dir", delete_first_then_sync)
+        second_id = store.quarantine(str(second))
+        assert deleted == [1]
+        assert os.path.exists(store.object_path(store.get(second_id)["sha256"]))
+        store.restore(second_id)
+        assert second.read_bytes() == content
+    finally:
+        store.close()
+
+
+def test_rename_across_mounts_falls_back_to_copy(tmp_path, monkeypatch):
+    path = tmp_path / "file.bin"
+    path.write_bytes(b"conteudo" * 100)
+    store = QuarantineStore(str(tmp_path / "quarantine"))
+    rename = os.rename
+
+    def cross_device(src, dst):
+        if os.path.dirname(dst) == store.incoming_dir:
+            raise OSError(errno.EXDEV, os.strerror(errno.EXDEV))
+        rename(src, dst)
+
+    monkeypatch.setattr(os, "rename", cross_device)
+    try:
+        item_id = store.quarantine(str(path))
+        assert not path.exists()
+        assert store.get(item_id)["state"] == quarantine.STATE_STORED
+        store.restore(item_id)
+        assert path.read_bytes() == b"conteudo" * 100
+    finally:
+        store.close()
+
+
+def test_identical_files_share_one_object(tmp_path):
+    paths = [tmp_path / f"copia{i}.bin" for i in range(3)]
+    for path in paths:
+        path.write_bytes(b"igual" * 5000)
+    store = QuarantineStore(str(tmp_path / "quarantine"))
+    try:
+        results = store.quarantine_many([str(p) for p in paths] + [str(tmp_path)])
+        ids = [item_id for _, item_id, error in results if not error]
+        assert len(ids) == 3 and "não é um arquivo regular" in results[0][2]
+        stats = store.stats()
+        assert (stats["items"], stats["objects"], stats["size"]) == (3, 1, 3 * 25000)
+        assert stats["stored"] < 25000
+        sha256 = store.get(ids[0])["sha256"]
+        assert store.delete_many(ids[:2]) == 2
+        assert os.path.exists(store.object_path(sha256))  # Ainda usado pelo terceiro item
+        store.restore(ids[2], dest=str(tmp_path / "restaurados"))
+        assert (tmp_path / "restaurados" / "copia2.bin").read_bytes() == b"igual" * 5000
+        assert not os.path.exists(store.object_path(sha256))
+        assert store.delete_many(ids) == 0
+    finally:
+        store.close()
+
+
+def test_cancelled_batch_puts_files_back(tmp_path):
+    paths = [tmp_path / f"f{i}.bin" for i in range(3)]
+    for i, path in enumerate(paths):
+        path.write_bytes(b"%d" % i * 100)
+    store = QuarantineStore(str(tmp_path / "quarantine"))
+    try:
+        calls = []
+        results = store.quarantine_many([str(p) for p in paths], should_stop=lambda: calls.append(1) or len(calls) > 1)
+        assert sorted((path, bool(item_id)) for path, item_id, _ in results) == [
+            (str(paths[0]), True), (str(paths[1]), False), (str(paths[2]), False)]
+        assert [p.exists() for p in paths] == [False, True, True]
+        assert len(store.items()) == 1 and store.items(state=None)[0]["path"] == str(paths[0])
+        assert os.listdir(store.incoming_dir) == []
+    finally:
+        store.close()
+
+
+def test_interrupted_quarantine_is_recovered_on_open(tmp_path, monkeypatch):
+    staged, copied = tmp_path / "staged.bin", tmp_path / "copied.bin"
+    staged.write_bytes(b"s" * 1000)
+    copied.write_bytes(b"c" * 1000)
+    os.chmod(copied, 0o755)
+    directory = str(tmp_path / "quarantine")
+    store = QuarantineStore(directory)
+    monkeypatch.setattr(store, "_store_staged", lambda *args, **kwargs: None)  # Queda antes da compressão
+    store.quarantine_many([str(staged)])
+    rename = os.rename
+
+    def cross_device(src, dst):
+        if os.path.dirname(dst) == store.incoming_dir:
+            raise OSError(errno.EXDEV, os.strerror(errno.EXDEV))
+        rename(src, dst)
+
+    monkeypatch.setattr(os, "rename", cross_device)
+    store.quarantine_many([str(copied)])
+    monkeypatch.undo()
+    assert stat.S_IMODE(os.stat(copied).st_mode) == 0o644 & ~0o7111 | stat.S_IRUSR
+    store.close()
+
+    store = QuarantineStore(directory)
+    try:
+        items = store.items(state=None)
+        assert [(item["path"], item["state"]) for item in items] == [(str(staged), quarantine.STATE_STORED)]
+        assert stat.S_IMODE(os.stat(copied).st_mode) == 0o755  # Cópia interrompida: o original fica como estava
+        store.restore(items[0]["id"])
+        assert staged.read_bytes() == b"s" * 1000
+    finally:
+        store.close()
+
+
+def test_corrupted_object_is_not_restored(tmp_path):
+    path = tmp_path / "file.bin"
+    path.write_bytes(os.urandom(10000))
+    store = QuarantineStore(str(tmp_path / "quarantine"))
+    try:
+        item_id = store.quarantine(str(path))
+        with open(store.object_path(store.get(item_id)["sha256"]), "r+b") as f:
+            f.seek(100)
+            byte = f.read(1)
+            f.seek(100)
+            f.write(bytes([byte[0] ^ 1]))
+        try:
+            store.restore(item_id)
+        except quarantine.QuarantineError as e:
+            assert "corrompido" in str(e)
+        else:
+            raise AssertionError("objeto corrompido restaurado")
+        os.truncate(store.object_path(store.get(item_id)["sha256"]), 10)
+        assert "corrompido" in store.restore_many([item_id])[0][2]
+        assert os.listdir(tmp_path) == ["quarantine"]
+        assert store.get(item_id)["state"] == quarantine.STATE_STORED
+    finally:
+        store.close()
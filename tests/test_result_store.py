@@ -0,0 +1,74 @@
+import os
+import hashlib
+from core.result_store import ScanResults, STATUS_CLEAN, STATUS_SUSPICIOUS, STATUS_ERROR, STATUS_SKIPPED, split_path
+
+
+def _digests(data):
+    return {"md5": hashlib.md5(data).hexdigest(), "sha256": hashlib.sha256(data).hexdigest()}
+
+
+def test_round_trip_paths_statuses_and_digests():
+    results = ScanResults()
+    rows = [
+        ("/srv/a/arquivo.bin", "Clean", _digests(b"a")),
+        ("/srv/a/ação \udcff.txt", "Suspicious", _digests(b"b")),  # Nome não decodificável preservado
+        ("/srv/b/x", "Error: Permissão negada", {}),
+        ("/srv/a/pulado.iso", "Skipped", None),
+        ("relativo", "Clean", {"sha256": hashlib.sha256(b"c").hexdigest()}),
+    ]
+    results.extend({"path": p, "status": s, "digests": d} for p, s, d in rows)
+    assert len(results) == len(rows)
+    for row, (path, status, digests) in enumerate(rows):
+        assert results.path(row) == path
+        assert results.status(row) == status
+        assert results.digests(row) == (digests or {})
+    assert results.digest(4, "md5") is None
+    assert results.digest_text(0) == f"md5={_digests(b'a')['md5']} sha256={_digests(b'a')['sha256']}"
+    assert [r[:2] for r in results] == [(p, s) for p, s, _ in rows]
+
+
+def test_directories_are_interned():
+    results = ScanResults()
+    for d in range(10):
+        for i in range(100):
+            results.append(f"/dados/dir{d}/arquivo{i}", "Clean")
+    assert len(results.dirs) == 10
+    assert split_path("/dados/dir1/arquivo2") == ("/dados/dir1/", "arquivo2")
+    assert split_path("sem-diretorio") == ("", "sem-diretorio")
+    assert results.memory_usage() < 1000 * 40
+
+
+def test_counts_rows_and_actions():
+    results = ScanResults()
+    for i, status in enumerate(["Clean", "Suspicious", "Error: x", "Suspicious", "Skipped", "Clean"]):
+        results.append(f"/r/f{i}", status)
+    assert results.count() == 6
+    assert [results.count(c) for c in (STATUS_CLEAN, STATUS_SUSPICIOUS, STATUS_ERROR, STATUS_SKIPPED)] == [2, 2, 1, 1]
+    assert list(results.paths(STATUS_SUSPICIOUS)) == ["/r/f1", "/r/f3"]
+    results.set_action(3, "Quarentena")
+    assert results.action(3) == "Quarentena" and results.action(1) == ""
+    order = sorted(range(len(results)), key=results.sort_key(1))
+    assert [results.status_code(r) for r in order] == [0, 0, 1, 1, 2, 3]
+    assert sorted(range(len(results)), key=results.sort_key(2))[-1] == 3
+
+
+def test_algorithm_added_later_keeps_earlier_rows():
+    results = ScanResults()
+    results.append("/r/a", "Clean", {"sha256": "11" * 32})
+    results.append("/r/b", "Clean", {"sha256": "22" * 32, "sha1": "33" * 20})
+    results.append("/r/c", "Clean", {"sha1": "zz"})  # Digest malformado: ignorado
+    assert results.digests(0) == {"sha256": "11" * 32}
+    assert results.digests(1) == {"sha256": "22" * 32, "sha1": "33" * 20}
+    assert results.digests(2) == {}
+    assert len(results.digest_data["sha1"]) == 3 * 20
+
+
+def test_too_many_algorithms():
+    results = ScanResults()
+    digests = {f"alg{i}": os.urandom(8).hex() for i in range(9)}
+    try:
+        results.append("/r/a", "Clean", digests)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("nono algoritmo aceito")
@@ -0,0 +1,123 @@
+import os
+import hashlib
+import threading
+from core.scanner import Scanner
+from infra.scan_cache import ScanCache
+from infra.signature_db import build_image
+
+
+def test_lookup_hit_until_file_changes(tmp_path):
+    path = tmp_path / "file.bin"
+    path.write_bytes(b"conteudo")
+    cache = ScanCache(str(tmp_path / "cache.db"), "v1")
+    try:
+        st = os.stat(path)
+        cache.store(st, {"sha256": "ab" * 32}, False)
+        assert cache.lookup(st, ("sha256",))[0] == {"sha256": "ab" * 32}
+        assert cache.lookup(st, ("sha256", "md5")) is None  # Digest pedido que não foi gravado
+        path.write_bytes(b"outro conteudo")
+        assert cache.lookup(os.stat(path), ("sha256",)) is None
+    finally:
+        cache.close()
+
+
+def test_persisted_until_pattern_version_changes(tmp_path):
+    path = tmp_path / "file.bin"
+    path.write_bytes(b"dados")
+    st = os.stat(path)
+    db = str(tmp_path / "cache.db")
+    cache = ScanCache(db, "v1")
+    cache.store(st, {"sha256": "cd" * 32}, True, {"status": None, "members": []})
+    cache.close()
+
+    cache = ScanCache(db, "v1")
+    assert cache.lookup(st) == ({"sha256": "cd" * 32}, True, {"status": None, "members": []})
+    cache.close()
+
+    cache = ScanCache(db, "v2")  # Padrões de conteúdo mudaram
+    assert cache.lookup(st) is None
+    cache.close()
+
+
+def test_scanner_reuses_cache_and_follows_signature_updates(tmp_path):
+    data = b"arquivo qualquer" * 100
+    path = tmp_path / "file.bin"
+    path.write_bytes(data)
+    cache_path = str(tmp_path / "cache.db")
+
+    def scan(signatures):
+        scanner = Scanner(workers=1, cache_path=cache_path, history_path=None, checkpoint_dir=None,
+                          signature_db_path=signatures)
+        scanner.open()
+        try:
+            return scanner.scan_file(str(path))[0], scanner.cache.hits
+        finally:
+            scanner.close()
+
+    assert scan(str(tmp_path / "none.fsig")) == ("Clean", 0)
+    # Feed atualizado: o veredito sai dos digests em cache, sem reler o arquivo
+    signatures = tmp_path / "signatures.fsig"
+    signatures.write_bytes(build_image([hashlib.sha256(data).hexdigest()]))
+    assert scan(str(signatures)) == ("Suspicious", 1)
+    # Arquivo alterado: lido de novo
+    path.write_bytes(data + b"!")
+    assert scan(str(signatures)) == ("Clean", 0)
+
+
+def test_metadata_change_invalidates(tmp_path):
+    # chmod não muda size nem mtime, mas muda ctime (ex.: conteúdo trocado preservando o mtime)
+    path = tmp_path / "file.bin"
+    path.write_bytes(b"conteudo")
+    cache = ScanCache(str(tmp_path / "cache.db"), "v1")
+    try:
+        st = os.stat(path)
+        cache.store(st, {"sha256": "ab" * 32}, False)
+        assert cache.contains(st) and cache.hits == 0
+        os.chmod(path, 0o600)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+        assert cache.lookup(os.stat(path)) is None
+        assert (cache.hits, cache.misses) == (0, 1)
+    finally:
+        cache.close()
+
+
+def test_pending_writes_visible_and_flushed_in_batches(tmp_path):
+    db = str(tmp_path / "cache.db")
+    cache = ScanCache(db, "v1", flush_every=3)
+    stats = []
+    for i in range(4):
+        path = tmp_path / f"f{i}"
+        path.write_bytes(b"x" * i)
+        stats.append(os.stat(path))
+        cache.store(stats[-1], {"md5": f"{i:032x}"}, False)
+    # Três gravadas de uma vez, a quarta ainda pendente (e já visível)
+    assert len(cache.pending) == 1
+    assert cache.lookup(stats[3])[0] == {"md5": f"{3:032x}"}
+    other = ScanCache(db, "v1")
+    assert [other.lookup(st) is not None for st in stats] == [True, True, True, False]
+    other.close()
+    cache.close()
+    cache = ScanCache(db, "v1")
+    assert all(cache.lookup(st) is not None for st in stats)
+    cache.close()
+
+
+def test_hard_link_waits_for_the_first_worker(tmp_path):
+    path = tmp_path / "file.bin"
+    path.write_bytes(b"dados")
+    os.link(path, tmp_path / "link.bin")
+    st = os.stat(path)
+    cache = ScanCache(str(tmp_path / "cache.db"), "v1")
+    try:
+        assert cache.acquire(st) is None  # Este worker calcula
+        result = []
+        waiter = threading.Thread(target=lambda: result.append(cache.acquire(os.stat(tmp_path / "link.bin"))))
+        waiter.start()
+        waiter.join(0.2)
+        assert waiter.is_alive()  # Esperando o resultado do primeiro
+        cache.store(st, {"sha256": "ef" * 32}, False)
+        waiter.join(10)
+        assert result == [({"sha256": "ef" * 32}, False, None)]
+        assert not cache.inflight
+    finally:
+        cache.close()
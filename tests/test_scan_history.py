@@ -0,0 +1,117 @@
+import csv
+import json
+import hashlib
+from infra.scan_history import ScanHistory
+
+
+def _result(path, status, data=None):
+    digests = {"sha256": hashlib.sha256(data).hexdigest(), "md5": hashlib.md5(data).hexdigest()} if data else {}
+    return {"path": path, "status": status, "digests": digests}
+
+
+def _history(tmp_path):
+    history = ScanHistory(str(tmp_path / "history.db"), flush_every=3)
+    scan_id = history.begin_scan("/srv")
+    history.add_results(scan_id, [
+        _result("/srv/a", "Clean", b"a"),
+        _result("/srv/b", "Suspicious", b"b"),
+        _result("/srv/ç \udcff", "Error: [Errno 13] Permissão negada: '/srv/ç \udcff'"),
+        _result("/srv/d", "Skipped"),
+    ])
+    history.finish_scan(scan_id)
+    return history, scan_id
+
+
+def test_totals_and_digest_lookup(tmp_path):
+    history, scan_id = _history(tmp_path)
+    try:
+        assert history.get_scan(scan_id)[6:] == ("done", 4, 1, 1)
+        found = history.find_digest(hashlib.md5(b"b").hexdigest())
+        assert [(row[0], row[3], row[4]) for row in found] == [(scan_id, "/srv/b", 1)]
+        errors = list(history.iter_results(scan_id, verdict=2))
+        assert [(path, status) for path, status, _, _ in errors] == [
+            ("/srv/ç \udcff", "Error: [Errno 13] Permissão negada: '/srv/ç \ufffd'")]
+        history.set_action(scan_id, "/srv/ç \udcff", "Excluído")
+        assert next(history.iter_results(scan_id, verdict=2))[2] == "Excluído"
+        history.set_action(scan_id, "/srv/b", "Quarentena")
+        assert [r for r in history.iter_results(scan_id, verdict=1)] == [
+            ("/srv/b", "Suspicious", "Quarentena", {"md5": hashlib.md5(b"b").hexdigest(),
+                                                    "sha256": hashlib.sha256(b"b").hexdigest()})]
+    finally:
+        history.close()
+
+
+def test_diff_against_previous_scan(tmp_path):
+    history, first = _history(tmp_path)
+    try:
+        second = history.begin_scan("/srv")
+        history.add_results(second, [
+            _result("/srv/a", "Clean", b"a2"),  # Conteúdo mudou
+            _result("/srv/b", "Clean", b"b"),  # Veredito mudou
+            _result("/srv/d", "Skipped"),
+            _result("/srv/e", "Clean", b"e"),
+        ])
+        history.finish_scan(second)
+        assert history.previous_scan(second) == first
+        assert sorted(change[:2] for change in history.diff(second)) == [
+            ("added", "/srv/e"), ("changed", "/srv/b"), ("modified", "/srv/a"), ("removed", "/srv/ç \udcff")]
+    finally:
+        history.close()
+
+
+def test_export_formats(tmp_path):
+    history, scan_id = _history(tmp_path)
+    try:
+        out = str(tmp_path / "report")
+        assert history.export(scan_id, out + ".csv", "csv") == 4
+        with open(out + ".csv", newline="", encoding="utf-8", errors="surrogateescape") as f:
+            rows = list(csv.reader(f))
+        assert rows[0] == ["path", "status", "action", "md5", "sha1", "sha256"]
+        assert sorted(r[0] for r in rows[1:]) == ["/srv/a", "/srv/b", "/srv/d", "/srv/ç \udcff"]
+        assert history.export(scan_id, out + ".jsonl", "jsonl", verdict=1) == 1
+        with open(out + ".jsonl", encoding="utf-8") as f:
+            assert json.loads(f.read())["path"] == "/srv/b"
+        assert history.export(scan_id, out + ".txt") == 4
+        with open(out + ".txt", encoding="utf-8", errors="surrogateescape") as f:
+            assert f.read().endswith("Total: 4\nAmeaças: 1\n")
+    finally:
+        history.close()
+
+
+def test_export_leaves_nothing_behind_on_failure_or_stop(tmp_path, monkeypatch):
+    history, scan_id = _history(tmp_path)
+    try:
+        out = tmp_path / "report.csv"
+        out.write_text("relatório anterior")
+
+        def broken(*args, **kwargs):
+            yield "/srv/a", "Clean", "", {}
+            raise OSError(28, "Sem espaço no dispositivo")
+
+        monkeypatch.setattr(history, "iter_results", broken)
+        try:
+            history.export(scan_id, str(out), "csv")
+        except OSError:
+            pass
+        else:
+            raise AssertionError("erro engolido")
+        monkeypatch.undo()
+        assert history.export(scan_id, str(out), "csv", should_stop=lambda: True) is None
+        assert out.read_text() == "relatório anterior"
+        assert sorted(p.name for p in tmp_path.iterdir() if p.name.startswith("report")) == ["report.csv"]
+    finally:
+        history.close()
+
+
+def test_reader_while_writer_thread_is_busy(tmp_path):
+    # iter_results e a gravação em lotes compartilham a conexão
+    history = ScanHistory(str(tmp_path / "history.db"), flush_every=50)
+    try:
+        scan_id = history.begin_scan("/srv")
+        for batch in range(40):
+            history.add_results(scan_id, [_result(f"/srv/{batch}/{i}", "Clean", b"%d" % i) for i in range(50)])
+            sum(1 for _ in history.iter_results(scan_id))
+        history.finish_scan(scan_id)
+        assert sum(1 for _ in history.iter_results(scan_id)) == 2000
+    finally:
+        history.close()
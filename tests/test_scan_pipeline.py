@@ -0,0 +1,134 @@
+import os
+import time
+import threading
+from core.scan_pipeline import ScanPipeline, ScanCancelled
+from core.walker import DirectoryWalker
+
+
+class ListWalker:
+    # Walker em memória: a ordem de geração é a da lista
+    def __init__(self, paths):
+        self.root = "/lista"
+        self.paths = paths
+
+    def walk(self, should_stop=None):
+        for path in self.paths:
+            if should_stop is not None and should_stop():
+                return
+            yield path, None
+
+
+def _run(pipeline, timeout=30):
+    results = []
+    runner = threading.Thread(target=pipeline.run, args=(results.extend,), daemon=True)
+    runner.start()
+    runner.join(timeout)
+    assert not runner.is_alive(), "pipeline não terminou"
+    return results
+
+
+def test_every_file_once_with_byte_count(tmp_path):
+    expected = {}
+    for d in range(5):
+        os.makedirs(tmp_path / f"d{d}" / "sub")
+        for i in range(30):
+            path = tmp_path / f"d{d}" / ("sub" if i % 2 else "") / f"f{i}"
+            path.write_bytes(b"x" * (i * 1000 + 1))
+            expected[str(path)] = i * 1000 + 1
+
+    def scan_file(file_path, buffer, on_chunk, st, context):
+        with open(file_path, "rb") as f:
+            while True:
+                n = f.readinto(buffer)
+                if not n:
+                    break
+                on_chunk(n)
+        return "Clean", {"size": st.st_size}
+
+    pipeline = ScanPipeline(DirectoryWalker(str(tmp_path)), scan_file, workers=4, buffer_size=4096)
+    results = _run(pipeline)
+    assert sorted(r["path"] for r in results) == sorted(expected)
+    assert all(r["digests"]["size"] == expected[r["path"]] for r in results)
+    assert pipeline.files_found == pipeline.files_done == len(expected)
+    assert pipeline.bytes_done == sum(expected.values())
+
+
+def test_priority_order_then_walker_order():
+    paths = [f"/lista/{kind}{i}" for i in range(20) for kind in ("c", "a", "b")]
+    walked = threading.Event()
+
+    def classify(file_path, st):
+        return "abc".index(os.path.basename(file_path)[0]), None
+
+    def scan_file(file_path, buffer, on_chunk, st, context):
+        # O primeiro arquivo segura o único worker até o walker enfileirar todos os outros
+        walked.wait(10)
+        return "Clean", {}
+
+    pipeline = ScanPipeline(ListWalker(paths), scan_file, workers=1, classify=classify)
+
+    def release():
+        while not pipeline.walk_done:
+            time.sleep(0.01)
+        walked.set()
+    threading.Thread(target=release, daemon=True).start()
+    results = [r["path"] for r in _run(pipeline)]
+    # O primeiro é o que estava na fila quando o worker começou; o resto já estava todo enfileirado
+    queued = [p for p in paths if p != results[0]]
+    assert results[1:] == sorted(queued, key=lambda p: ("abc".index(os.path.basename(p)[0]), queued.index(p)))
+
+
+def test_priority_none_is_resolved_by_the_walker():
+    paths = [f"/lista/f{i}" for i in range(10)]
+    scanned_by = {}
+
+    def classify(file_path, st):
+        return (None if file_path.endswith(("1", "3")) else 0), "ctx"
+
+    def scan_file(file_path, buffer, on_chunk, st, context):
+        scanned_by[file_path] = (threading.current_thread().name, buffer is None, context)
+        return "Clean", {}
+
+    pipeline = ScanPipeline(ListWalker(paths), scan_file, workers=2, classify=classify)
+    assert sorted(r["path"] for r in _run(pipeline)) == sorted(paths)
+    for path, (thread, no_buffer, context) in scanned_by.items():
+        inline = path.endswith(("1", "3"))
+        assert (thread == "scan-walker") == inline and no_buffer == inline and context == "ctx"
+
+
+def test_stop_cancels_in_flight_scans_and_drops_late_results():
+    paths = [f"/lista/f{i}" for i in range(1000)]
+    pipeline = None
+
+    def scan_file(file_path, buffer, on_chunk, st, context):
+        if file_path == "/lista/f5":
+            pipeline.stop()
+        on_chunk(1)  # Depois do stop, o chunk levanta ScanCancelled
+        return "Clean", {}
+
+    pipeline = ScanPipeline(ListWalker(paths), scan_file, workers=1)
+    results = [r["path"] for r in _run(pipeline)]
+    # Resultados ainda na fila depois do stop também são descartados
+    assert results == paths[:len(results)] and len(results) <= 5
+    assert pipeline.files_done == 5
+    assert pipeline.files_found < len(paths)
+
+
+def test_cancelled_scan_is_not_reported():
+    def scan_file(file_path, buffer, on_chunk, st, context):
+        raise ScanCancelled()
+
+    pipeline = ScanPipeline(ListWalker(["/lista/a", "/lista/b"]), scan_file, workers=2)
+    assert _run(pipeline) == []
+    assert pipeline.files_done == 0
+
+
+def test_scan_errors_become_results():
+    def scan_file(file_path, buffer, on_chunk, st, context):
+        if file_path.endswith("b"):
+            raise ValueError("falhou")
+        return "Clean", {}, [{"path": file_path + "!membro", "status": "Clean", "digests": {}}]
+
+    pipeline = ScanPipeline(ListWalker(["/lista/a", "/lista/b"]), scan_file, workers=1)
+    results = {r["path"]: r["status"] for r in _run(pipeline)}
+    assert results == {"/lista/a": "Clean", "/lista/a!membro": "Clean", "/lista/b": "Error: falhou"}
@@ -0,0 +1,102 @@
+import os
+import queue
+import threading
+from core.shard_scanner import ShardWalker, ShardCoordinator
+from core.walker import DirectoryWalker
+
+
+def _tree(root, dirs=4, files=5):
+    paths = []
+    for d in range(dirs):
+        for sub in ("", "/x", "/x/y"):
+            directory = root / f"d{d}{sub}"
+            directory.mkdir(parents=True, exist_ok=True)
+            for i in range(files):
+                (directory / f"f{i}.bin").write_bytes(b"%d" % i)
+                paths.append(str(directory / f"f{i}.bin"))
+    (root / "topo.bin").write_bytes(b"t")
+    return paths + [str(root / "topo.bin")]
+
+
+def test_shard_walker_lists_its_shards_and_donates_the_shallowest(tmp_path):
+    _tree(tmp_path)
+    inbox, outbox = queue.Queue(), queue.Queue()
+    walker = ShardWalker(str(tmp_path), 0, inbox, outbox)
+    walker.stack = [(str(tmp_path / "d0"), 1, False), (str(tmp_path / "d1"), 1, False),
+                    (str(tmp_path / "d2" / "x"), 2, False)]
+    inbox.put(("steal",))
+    walker._poll()
+    assert outbox.get_nowait() == ("donate", 0, [(str(tmp_path / "d0"), 1, False), (str(tmp_path / "d1"), 1, False)])
+    assert walker.pending() == 1
+
+    walked = []
+    for path, _ in walker.walk():
+        walked.append(os.path.relpath(path, tmp_path))
+        if len(walked) == 10:
+            inbox.put(("shard", str(tmp_path), 0, True))  # Só os arquivos da raiz
+        if len(walked) == 11:
+            inbox.put(("stop",))
+    assert sorted(walked) == sorted([f"d2/x/f{i}.bin" for i in range(5)] + [f"d2/x/y/f{i}.bin" for i in range(5)] +
+                                    ["topo.bin"])
+    assert walker.stopped and outbox.empty()  # Sempre houve trabalho: nunca ficou ocioso
+
+
+def test_initial_shards_follow_the_walk_options(tmp_path):
+    _tree(tmp_path)
+    (tmp_path / "d1" / "ignorado").mkdir()
+    coordinator = ShardCoordinator(str(tmp_path), {})
+    walker = DirectoryWalker(str(tmp_path), exclude_globs=("d1",), exclude_paths=(str(tmp_path / "d3"),))
+    assert coordinator._initial_shards(walker) == [
+        (str(tmp_path), 0, True), (str(tmp_path / "d0"), 1, False), (str(tmp_path / "d2"), 1, False)]
+    assert coordinator._initial_shards(DirectoryWalker(str(tmp_path), max_depth=0)) == [(str(tmp_path), 0, True)]
+    assert coordinator._initial_shards(DirectoryWalker(str(tmp_path), exclude_paths=(str(tmp_path),))) == []
+
+
+class Inbox:
+    def __init__(self):
+        self.messages = []
+
+    def put(self, message):
+        self.messages.append(message)
+
+
+def test_idle_workers_get_shards_then_steal_from_the_busiest():
+    coordinator = ShardCoordinator("/r", {}, processes=3)
+    coordinator.pool = [("/r/a", 1, False)]
+    inboxes = [Inbox(), Inbox(), Inbox()]
+    running = {0, 1, 2}
+    batches = []
+    coordinator._dispatch(("idle", 0), batches.append, inboxes, running)
+    assert inboxes[0].messages == [("shard", "/r/a", 1, False)] and not coordinator.pool
+    coordinator._dispatch(("results", 0, [{"path": "/r/a/f", "status": "Suspicious"}], 7, 1, 1, 10),
+                          batches.append, inboxes, running)
+    coordinator._dispatch(("results", 1, [], 2, 0, 0, 0), batches.append, inboxes, running)
+    coordinator._dispatch(("idle", 2), batches.append, inboxes, running)
+    assert inboxes[0].messages[-1] == ("steal",) and coordinator.stealing == 0
+    coordinator._dispatch(("donate", 0, [["/r/a/x", 2, False]]), batches.append, inboxes, running)
+    assert inboxes[2].messages == [("shard", "/r/a/x", 2, False)]
+    assert coordinator.steals == 1 and coordinator.stealing is None
+    assert coordinator.totals["suspicious"] == 1 and len(batches) == 1
+    coordinator.stop()
+    coordinator._dispatch(("results", 1, [{"path": "/r/b", "status": "Clean"}], 0, 1, 1, 1),
+                          batches.append, inboxes, running)
+    assert len(batches) == 1 and coordinator.totals["files"] == 1  # Cancelado: nada mais é entregue
+
+
+def test_every_file_scanned_once_across_processes(tmp_path):
+    root = tmp_path / "raiz"
+    root.mkdir()
+    expected = _tree(root, dirs=6, files=20)
+    options = {"cache_path": None, "signature_db_path": None, "walk_options": {}, "workers": 1}
+    coordinator = ShardCoordinator(str(root), options, processes=2, threads_per_process=2)
+    results = []
+    lock = threading.Lock()
+
+    def on_batch(batch):
+        with lock:
+            results.extend(r["path"] for r in batch)
+
+    coordinator.run(on_batch)
+    assert sorted(results) == sorted(expected)
+    assert coordinator.totals["files"] == len(expected) and not coordinator.incomplete
+    assert sum(s["files"] for s in coordinator.stats.values()) == len(expected)
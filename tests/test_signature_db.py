@@ -0,0 +1,144 @@
+import os
+import hashlib
+import threading
+from infra.signature_builder import build_signature_db
+from infra.signature_db import (
+    SignatureDatabase, SignatureSet, build_image, get_signature_db, signature_db_path, bloom_params, BLOOM_BLOCK_BYTES,
+    BLOOM_MAGIC, DATA_OFFSET
+)
+
+
+def _digests(count, seed):
+    return [hashlib.sha256(f"{seed}-{i}".encode()).hexdigest() for i in range(count)]
+
+
+def test_bloom_filter_has_no_false_negatives():
+    known = _digests(5000, "known")
+    db = SignatureDatabase.from_digests(known, fp_rate=0.01)
+    assert len(db) == len(known)
+    assert db.bloom is not None
+    assert all(d in db for d in known)
+    assert all(bytes.fromhex(d) in db for d in known[:100])
+
+
+def test_bloom_filter_rejects_most_unknown_digests():
+    db = SignatureDatabase.from_digests(_digests(5000, "known"), fp_rate=0.01)
+    unknown = _digests(20000, "unknown")
+    assert not any(d in db for d in unknown)  # O índice resolve os falsos positivos do filtro
+    stats = db.filter_stats()
+    assert stats["lookups"] == len(unknown)
+    assert stats["hits"] == 0
+    assert stats["observed_fp_rate"] < 0.03
+
+
+def test_filter_stats_count_every_thread():
+    known = _digests(1000, "known")
+    db = SignatureDatabase.from_digests(known)
+    probes = known + _digests(1000, "unknown")
+
+    def lookups():
+        for d in probes:
+            d in db
+
+    threads = [threading.Thread(target=lookups) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    stats = db.filter_stats()
+    assert stats["lookups"] == 4 * len(probes)
+    assert stats["hits"] == 4 * len(known)
+
+
+def test_database_without_bloom_filter():
+    known = _digests(100, "known")
+    db = SignatureDatabase.from_digests(known, fp_rate=0)
+    assert db.bloom is None
+    assert all(d in db for d in known)
+    assert "00" * 32 not in db
+    assert "não é hex" not in db
+
+
+def test_signature_set_matches_any_algorithm(tmp_path):
+    base = str(tmp_path / "signatures.fsig")
+    data = os.urandom(4096)
+    with open(signature_db_path("md5", base), "wb") as f:
+        f.write(build_image([hashlib.md5(data).hexdigest()], algorithm="md5"))
+    signatures = SignatureSet(base)
+    assert signatures.algorithms == ["md5"]
+    digests = {"md5": hashlib.md5(data).hexdigest(), "sha256": hashlib.sha256(data).hexdigest()}
+    assert signatures.match(digests) == "md5"
+    assert signatures.match({"md5": hashlib.md5(b"outro").hexdigest()}) is None
+
+
+def test_lookup_at_fanout_edges():
+    # Primeiro e último prefixo da tabela fan-out, vizinhos e um prefixo com várias entradas
+    edges = ["00" * 32, "0000" + "ff" * 30, "0001" + "00" * 30, "ff" * 32, "fffe" + "ff" * 30]
+    crowded = [f"abcd{i:060x}" for i in range(50)]
+    db = SignatureDatabase.from_digests(edges + crowded, fp_rate=0)
+    assert all(d in db for d in edges + crowded)
+    assert "0000" + "ff" * 29 + "fe" not in db
+    assert f"abcd{50:060x}" not in db
+    assert [d.hex() for d in db] == sorted(set(edges + crowded))
+
+
+def test_builder_matches_in_memory_image(tmp_path):
+    digests = _digests(3000, "feed")
+    (tmp_path / "feed.txt").write_text("# comentário\n" + "\n".join(f"{d}  amostra" for d in digests[:2000]) + "\n")
+    rows = [f"x,{d},y" for d in digests[1500:]] + ["x,nao-e-hash,y", f"x,{digests[0][:-2]},y"]
+    (tmp_path / "feed.csv").write_text("\n".join(rows) + "\n")
+    output = str(tmp_path / "signatures.fsig")
+    assert build_signature_db([str(tmp_path / "feed.txt"), str(tmp_path / "feed.csv")], output) == 3000
+    with open(output, "rb") as f:
+        assert f.read() == build_image(digests)
+    db = SignatureDatabase.open(output)
+    try:
+        assert all(d in db for d in digests)
+        assert db.version == SignatureDatabase.from_digests(reversed(digests)).version
+    finally:
+        db.close()
+
+
+def test_corrupt_database_falls_back_to_empty(tmp_path):
+    image = build_image(_digests(10, "known"))
+    for name, data in (("truncated", image[:-32]), ("magic", b"X" + image[1:]), ("empty", b"")):
+        path = tmp_path / f"{name}.fsig"
+        path.write_bytes(data)
+        db = get_signature_db(str(path))
+        assert len(db) == 0, name
+    path = tmp_path / "md5.fsig"
+    path.write_bytes(build_image([hashlib.md5(b"x").hexdigest()], algorithm="md5"))
+    assert len(get_signature_db(str(path), "sha256")) == 0  # Algoritmo diferente do esperado
+    assert len(get_signature_db(str(path), "md5")) == 1
+
+
+def test_bloom_filter_holds_the_configured_rate():
+    # Inclusive com taxas baixas, em que blocos mais carregados e posições repetidas pesam mais
+    known = _digests(20000, "known")
+    unknown = [bytes.fromhex(d) for d in _digests(50000, "unknown")]
+    sizes = []
+    for rate in (0.05, 0.01, 0.001, 0.0001):
+        db = SignatureDatabase.from_digests(known, fp_rate=rate)
+        assert db.bloom.fp_rate == rate
+        assert db.bloom.nblocks == bloom_params(len(known), rate)[0]
+        passed = sum(db.bloom.might_contain(d) for d in unknown)
+        assert passed <= max(rate * len(unknown), 10), rate
+        sizes.append(db.bloom.size)
+    assert sizes == sorted(sizes)
+
+
+def test_bloom_section_of_another_version_is_ignored():
+    known = _digests(100, "known")
+    image = bytearray(build_image(known, fp_rate=0.01))
+    offset = DATA_OFFSET + len(known) * 32
+    assert image[offset:offset + 8] == BLOOM_MAGIC
+    image[offset + 7] = 1
+    db = SignatureDatabase(bytes(image))
+    assert db.bloom is None
+    assert all(d in db for d in known)
+    try:
+        SignatureDatabase(bytes(build_image(known, fp_rate=0.01))[:-BLOOM_BLOCK_BYTES])
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("seção truncada aceita")
@@ -0,0 +1,111 @@
+import pytest
+from core import throttle
+from core.throttle import TokenBucket, Throttle, MIN_SCALE, MAX_PAUSE
+
+
+class Clock:
+    # time.monotonic/time.sleep falsos: sleep só avança o relógio
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        seconds = max(seconds, 1e-6)
+        self.now += seconds
+        self.slept += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(throttle.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(throttle.time, "sleep", clock.sleep)
+    return clock
+
+
+def test_bucket_paces_to_its_rate(clock):
+    bucket = TokenBucket(100)
+    for _ in range(10):
+        bucket.acquire(100)
+    # A capacidade inicial paga o primeiro pedido e o saldo positivo libera o segundo, que fica devendo
+    assert clock.slept == pytest.approx(8.0, abs=0.01)
+    clock.slept = 0.0
+    for _ in range(10):
+        bucket.acquire(50, scale=0.5)
+    assert clock.slept == pytest.approx(2.0 + 9.0, abs=0.01)  # Dívida anterior a 50/s, depois 50 por segundo
+
+
+def test_oversized_request_leaves_a_debt(clock):
+    bucket = TokenBucket(100)
+    bucket.acquire(1000)  # Maior que a capacidade: passa, mas o saldo fica negativo
+    assert clock.slept == 0
+    bucket.acquire(1)
+    assert clock.slept == pytest.approx(9.0, abs=0.01)
+
+
+def test_bucket_returns_when_stopped(clock):
+    bucket = TokenBucket(1)
+    bucket.acquire(1)
+    bucket.acquire(1000, should_stop=lambda: True)
+    bucket.acquire(1, should_stop=lambda: True)
+    assert clock.slept == 0
+
+
+def test_backs_off_under_load_and_recovers(clock, monkeypatch):
+    load = [3.0]
+    monkeypatch.setattr(throttle, "read_load", lambda: load[0])
+    t = Throttle(bytes_per_sec=1024 * 1024, max_load=1.0)
+    scales = []
+    for _ in range(7):
+        clock.now += 1
+        t._sample()
+        scales.append(t.scale)
+    assert scales == [1 / 2, 1 / 4, 1 / 8, 1 / 16, MIN_SCALE, MIN_SCALE, MIN_SCALE]
+    assert t.overloaded and "reduzido a 3%" in t.describe()
+    t._sample()  # Antes de SAMPLE_INTERVAL: nada muda
+    assert t.scale == MIN_SCALE
+    load[0] = 0.5
+    clock.now += 1
+    t._sample()
+    assert not t.overloaded and t.scale == MIN_SCALE * 1.25
+    assert t.state()["bytes_per_sec"] == 1024 * 1024 * MIN_SCALE * 1.25
+
+
+def test_iowait_from_proc_stat_deltas(clock, monkeypatch):
+    samples = iter([(100, 1000), (190, 1100), (195, 1200)])
+    monkeypatch.setattr(throttle, "read_cpu_times", lambda: next(samples))
+    t = Throttle(files_per_sec=10, max_iowait=0.5)
+    for expected in (None, 0.9, 0.05):
+        clock.now += 1
+        t._sample()
+        assert t.iowait == pytest.approx(expected) if expected else t.iowait is None
+    assert t.scale == 1 / 2 * 1.25 and not t.overloaded
+
+
+def test_without_fixed_limit_the_backoff_is_a_bounded_pause(clock, monkeypatch):
+    monkeypatch.setattr(throttle, "read_load", lambda: 10.0)
+    t = Throttle(max_load=1.0)
+    assert t.enabled
+    t.wait_bytes(4096)
+    assert MAX_PAUSE - 0.01 < clock.slept < MAX_PAUSE + 0.5
+    assert t.throttled_time == pytest.approx(clock.slept)
+    clock.slept = 0.0
+    t.wait_bytes(4096, should_stop=lambda: True)
+    assert clock.slept == 0
+    t.wait_file()  # Sem limite de arquivos: não espera
+    assert clock.slept == 0
+
+
+def test_missing_proc_keeps_the_fixed_limits(clock, monkeypatch):
+    def missing():
+        raise FileNotFoundError("/proc/loadavg")
+
+    monkeypatch.setattr(throttle, "read_load", missing)
+    t = Throttle(bytes_per_sec=100, max_load=1.0)
+    clock.now += 1
+    t._sample()
+    assert t.scale == 1.0 and t.load is None
+    assert not Throttle().enabled
@@ -0,0 +1,124 @@
+import os
+from core import walker
+from core.walker import DirectoryWalker, PathListWalker
+
+
+def _tree(root):
+    # root/a.txt, root/b.log, root/sub/c.txt, root/sub/deep/d.txt, root/skip/e.txt, root/cache/f.txt
+    files = ["a.txt", "b.log", "sub/c.txt", "sub/deep/d.txt", "skip/e.txt", "cache/f.txt"]
+    for name in files:
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"x")
+    return files
+
+
+def _walked(w, root):
+    return sorted(os.path.relpath(path, root) for path, _ in w.walk())
+
+
+def test_walk_yields_every_regular_file_with_its_stat(tmp_path):
+    files = _tree(tmp_path)
+    os.symlink(tmp_path / "a.txt", tmp_path / "link.txt")
+    os.symlink(tmp_path / "sub", tmp_path / "sublink")
+    w = DirectoryWalker(str(tmp_path))
+    results = list(w.walk())
+    assert sorted(os.path.relpath(p, tmp_path) for p, _ in results) == sorted(files)
+    assert all(st.st_ino == os.lstat(p).st_ino for p, st in results)
+    assert w.dirs_scanned == 5 and w.errors == 0
+
+
+def test_exclude_globs_and_paths(tmp_path):
+    _tree(tmp_path)
+    w = DirectoryWalker(str(tmp_path), exclude_globs=("*.log", "skip"), exclude_paths=(str(tmp_path / "cache"),))
+    assert _walked(w, tmp_path) == ["a.txt", "sub/c.txt", "sub/deep/d.txt"]
+    # Glob contra o caminho inteiro
+    w = DirectoryWalker(str(tmp_path), exclude_globs=(str(tmp_path / "sub") + "/*",), exclude_paths=())
+    assert _walked(w, tmp_path) == ["a.txt", "b.log", "cache/f.txt", "skip/e.txt"]
+
+
+def test_max_depth(tmp_path):
+    _tree(tmp_path)
+    assert _walked(DirectoryWalker(str(tmp_path), max_depth=0), tmp_path) == ["a.txt", "b.log"]
+    assert _walked(DirectoryWalker(str(tmp_path), max_depth=1), tmp_path) == [
+        "a.txt", "b.log", "cache/f.txt", "skip/e.txt", "sub/c.txt"]
+
+
+def test_same_filesystem_does_not_cross_mount_points(tmp_path, monkeypatch):
+    _tree(tmp_path)
+    mount = str(tmp_path / "sub")
+    real_scandir = os.scandir
+
+    class Entry:
+        # DirEntry com st_dev trocado: simula um ponto de montagem em sub/
+        def __init__(self, entry):
+            self.entry = entry
+            self.name, self.path = entry.name, entry.path
+
+        def is_dir(self, follow_symlinks=True):
+            return self.entry.is_dir(follow_symlinks=follow_symlinks)
+
+        def is_file(self, follow_symlinks=True):
+            return self.entry.is_file(follow_symlinks=follow_symlinks)
+
+        def stat(self, follow_symlinks=True):
+            st = self.entry.stat(follow_symlinks=follow_symlinks)
+            if self.path != mount:
+                return st
+            return os.stat_result(tuple(st)[:2] + (st.st_dev + 1,) + tuple(st)[3:])
+
+    class Scandir:
+        def __init__(self, path):
+            self.it = real_scandir(path)
+
+        def __enter__(self):
+            return (Entry(e) for e in self.it)
+
+        def __exit__(self, *exc):
+            self.it.close()
+
+    monkeypatch.setattr(walker.os, "scandir", Scandir)
+    assert _walked(DirectoryWalker(str(tmp_path), same_filesystem=True), tmp_path) == [
+        "a.txt", "b.log", "cache/f.txt", "skip/e.txt"]
+    assert len(_walked(DirectoryWalker(str(tmp_path)), tmp_path)) == 6
+    visited = []
+    DirectoryWalker(str(tmp_path), same_filesystem=True).visit_directories(visited.append)
+    assert mount not in visited and str(tmp_path / "cache") in visited
+
+
+def test_root_under_excluded_path(tmp_path):
+    _tree(tmp_path)
+    for root in (tmp_path / "cache", tmp_path / "cache" / "f.txt"):
+        w = DirectoryWalker(str(root), exclude_paths=(str(tmp_path / "cache"),))
+        assert list(w.walk()) == []
+        visited = []
+        w.visit_directories(visited.append)
+        assert visited == []
+    # Arquivo avulso: os globs valem para o próprio nome
+    assert list(DirectoryWalker(str(tmp_path / "b.log"), exclude_globs=("*.log",)).walk()) == []
+    assert len(list(DirectoryWalker(str(tmp_path / "a.txt"), exclude_globs=("*.log",)).walk())) == 1
+
+
+def test_visit_directories_prunes_subtrees(tmp_path):
+    _tree(tmp_path)
+    visited = []
+
+    def visit(directory):
+        visited.append(os.path.relpath(directory, tmp_path))
+        return not directory.endswith("sub")
+
+    DirectoryWalker(str(tmp_path)).visit_directories(visit)
+    assert sorted(visited) == [".", "cache", "skip", "sub"]
+
+
+def test_excludes_agrees_with_walk(tmp_path):
+    files = _tree(tmp_path)
+    options = {"exclude_globs": ("*.log", "skip"), "exclude_paths": (str(tmp_path / "cache"),), "max_depth": 1}
+    w = DirectoryWalker(str(tmp_path), **options)
+    walked = _walked(w, tmp_path)
+    assert [f for f in sorted(files) if not w.excludes(str(tmp_path / f))] == walked
+    assert w.excludes("/fora/da/raiz")
+    # PathListWalker com a raiz: cada caminho passa pelos mesmos filtros
+    paths = [str(tmp_path / f) for f in files] + [str(tmp_path / "sub")]
+    listed = PathListWalker(paths, roots=[str(tmp_path)], **options)
+    assert sorted(os.path.relpath(p, tmp_path) for p, _ in listed.walk()) == sorted(walked + ["sub/c.txt"])